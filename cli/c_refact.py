@@ -1,11 +1,15 @@
 import json
 import re
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass
+import functools
+import itertools
 from pathlib import Path
 import subprocess
+import sys
 import shutil
-from typing import TypedDict
+from typing import Callable, TypedDict
 import pprint
 from os import environ
 
@@ -100,14 +104,19 @@ def parse_translation_unit_with_args(
     )
 
 
-def parse_project(
-    index: Index,
-    compdb: compilation_database.CompileCommands,
-) -> dict[str, TranslationUnit]:
-    """Parse all translation units in the compilation database.
+@dataclass
+class TUParseJob:
+    """Everything needed to parse one translation unit of a compilation database,
+    in a form that can be sent to a worker process."""
 
-    Returns a mapping from absolute source file path to TranslationUnit."""
-    tus = {}
+    abs_path: str
+    srcfile: str
+    args: list[str]
+    in_dir: str
+
+
+def tu_parse_jobs(compdb: compilation_database.CompileCommands) -> list[TUParseJob]:
+    jobs = []
     for srcfile in compdb.get_source_files():
         cmds = compdb.get_commands_for_path(srcfile)
         if not srcfile.is_absolute():
@@ -126,38 +135,123 @@ def parse_project(
                 f"Expected exactly one compile command for {srcfile}, got {pprint.pformat(cmds)}"
             )
         parts = cmds[0].get_command_parts()[1:]  # Skip compiler executable
-        tu = parse_translation_unit_with_args(
-            index,
-            srcfile.as_posix(),
-            parts,
-            in_dir=cmds[0].directory_path.as_posix(),
-        )
         if srcfile.is_absolute():
             abs_path = srcfile.resolve()
         else:
             abs_path = (cmds[0].directory_path / srcfile).resolve()
-        tus[abs_path.as_posix()] = tu
-    return tus
+        jobs.append(
+            TUParseJob(
+                abs_path=abs_path.as_posix(),
+                srcfile=srcfile.as_posix(),
+                args=parts,
+                in_dir=cmds[0].directory_path.as_posix(),
+            )
+        )
+    return jobs
+
+
+def parse_tu_parse_job(index: Index, job: TUParseJob) -> TranslationUnit:
+    return parse_translation_unit_with_args(index, job.srcfile, job.args, in_dir=job.in_dir)
+
 
+def parse_project(
+    index: Index,
+    compdb: compilation_database.CompileCommands,
+) -> dict[str, TranslationUnit]:
+    """Parse all translation units in the compilation database.
 
-def preprocess_build(b: targets.BuildInfo, t: targets.BuildTarget, target_dir: Path) -> None:
+    Returns a mapping from absolute source file path to TranslationUnit."""
+    return {job.abs_path: parse_tu_parse_job(index, job) for job in tu_parse_jobs(compdb)}
+
+
+@functools.cache
+def _worker_index() -> Index:
+    """Each worker process of `map_project_tus` lazily creates its own index."""
+    return create_xj_clang_index()
+
+
+def _parse_and_extract_in_worker[T](job: TUParseJob, extract: Callable[[TranslationUnit], T]) -> T:
+    return extract(parse_tu_parse_job(_worker_index(), job))
+
+
+def map_project_tus[T](
+    compdb: compilation_database.CompileCommands,
+    extract: Callable[[TranslationUnit], T],
+    jobs: int = 1,
+) -> dict[str, T]:
+    """Parse each translation unit in the compilation database and apply `extract` to it,
+    returning a mapping from absolute source file path to the extracted facts.
+
+    Unlike `parse_project`, this does not keep every TU alive at once, and with `jobs > 1`
+    it parses TUs in worker processes. Cursors cannot cross process boundaries, so
+    `extract` must be a picklable (module-level) function returning picklable results,
+    such as `NamedDeclInfo`s. Results are in the same order as with `jobs == 1`.
     """
-    For each TU, run clang -E to preprocess it into target_dir.
+    parse_jobs = tu_parse_jobs(compdb)
+    results = map_tu_parse_jobs(parse_jobs, extract, jobs)
+    return {job.abs_path: result for job, result in zip(parse_jobs, results)}
+
+
+def map_tu_parse_jobs[T](
+    parse_jobs: list[TUParseJob],
+    extract: Callable[[TranslationUnit], T],
+    jobs: int = 1,
+) -> list[T]:
+    """See `map_project_tus`; results are in the same order as `parse_jobs`."""
+    if jobs <= 1 or len(parse_jobs) <= 1:
+        index = create_xj_clang_index()
+        return [extract(parse_tu_parse_job(index, job)) for job in parse_jobs]
+    with ProcessPoolExecutor(max_workers=min(jobs, len(parse_jobs))) as executor:
+        return list(
+            executor.map(_parse_and_extract_in_worker, parse_jobs, itertools.repeat(extract))
+        )
+
+
+def map_per_tu_concurrently[T, R](items: list[T], work: Callable[[T], R], jobs: int = 1) -> list[R]:
+    """Applies `work` to each item, running up to `jobs` at a time in threads.
+
+    Meant for work dominated by external processes, like `clang -E`.
+    Results are in the same order as `items`. If any `work` raises, the
+    exception for the earliest such item is re-raised (after in-flight work
+    finishes), so errors don't depend on scheduling.
+    """
+    if jobs <= 1 or len(items) <= 1:
+        return [work(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(jobs, len(items))) as executor:
+        return list(executor.map(work, items))
+
+
+def preprocess_build(
+    b: targets.BuildInfo, t: targets.BuildTarget, target_dir: Path, jobs: int = 1
+) -> None:
+    """
+    For each TU, run clang -E to preprocess it into target_dir,
+    running up to `jobs` preprocessors at a time.
     """
     target_dir.mkdir(parents=True, exist_ok=True)
 
     clang_path = hermetic.xj_llvm_root(repo_root.localdir()) / "bin" / "clang"
 
     compdb = b.compdb_for_target_within(t.key, target_dir)
-    for cmd in compdb.commands:
-        # 1. Determine paths
+
+    def preprocessed_file_path_for(cmd: compilation_database.CompileCommand) -> Path:
         abs_src_path = cmd.absolute_file_path
         try:
             rel_src_path = abs_src_path.relative_to(target_dir)
         except ValueError:
             rel_src_path = Path(abs_src_path.name)
+        return (target_dir / rel_src_path).with_suffix(".nolines.i")
 
-        preprocessed_file_path = (target_dir / rel_src_path).with_suffix(".nolines.i")
+    # Commands that would write the same output stay together, in their original
+    # order, so that (as when running serially) the last of them wins.
+    cmds_by_output: dict[Path, list[compilation_database.CompileCommand]] = {}
+    for cmd in compdb.commands:
+        cmds_by_output.setdefault(preprocessed_file_path_for(cmd), []).append(cmd)
+
+    def preprocess_one(cmd: compilation_database.CompileCommand) -> None:
+        # 1. Determine paths
+        abs_src_path = cmd.absolute_file_path
+        preprocessed_file_path = preprocessed_file_path_for(cmd)
         preprocessed_file_path.parent.mkdir(parents=True, exist_ok=True)
 
         # 2. Run preprocessor
@@ -210,6 +304,12 @@ def preprocess_build(b: targets.BuildInfo, t: targets.BuildTarget, target_dir: P
         cp.check_returncode()
 
         shutil.copyfile(preprocessed_file_path, preprocessed_file_path.with_suffix(".unmodified.i"))
+
+    def preprocess_all(cmds: list[compilation_database.CompileCommand]) -> None:
+        for cmd in cmds:
+            preprocess_one(cmd)
+
+    map_per_tu_concurrently(list(cmds_by_output.values()), preprocess_all, jobs)
     b._use_preprocessed_files = True
 
 
@@ -271,12 +371,17 @@ def refold_build(
     t: targets.BuildTarget,
     target_dir_path: Path,
     consolidation_data_by_rel_tu: dict[str, ConsolidationRevertContext] | None = None,
+    jobs: int = 1,
 ) -> None:
     """
-    For each TU in compdb, run clang-refold to produce .c files from modified .i files
+    For each TU in compdb, run clang-refold to produce .c files from modified .i files,
+    running up to `jobs` refolds (and `XJ_REFOLD_CHECK` verifications) at a time.
     """
     target_dir_path.mkdir(parents=True, exist_ok=True)
     compdb = b.compdb_for_target_within(t.key, target_dir_path)
+
+    abs_src_paths: list[Path] = []
+    refold_specs: list[tuple[hermetic.RunSpec, Path | str]] = []
     for cmd in compdb.commands:
         abs_src_path = cmd.absolute_file_path
 
@@ -286,45 +391,62 @@ def refold_build(
         refold_map_path = abs_src_path_base.with_suffix(".nolines.refoldmap.json")
         edit_map_path = abs_src_path_base.with_suffix(".nolines.editmap.json")
 
-        print("Refolding", abs_src_path, "to", c_path)
-        print(cmd.get_command_parts())
-        hermetic.run(
+        abs_src_paths.append(abs_src_path)
+        refold_specs.append((
             [
                 "clang-refold",
                 "-P",  # modified preprocessed file
-                abs_src_path,
+                str(abs_src_path),
                 "-p",  # unmodified preprocessed file
-                abs_src_path.with_suffix(".unmodified.i"),
+                str(abs_src_path.with_suffix(".unmodified.i")),
                 "-r",  # refold map
                 refold_map_path.as_posix(),
                 "-o",
                 str(c_path),
                 f"--emit-edit-map={edit_map_path.as_posix()}",
             ],
-            check=True,
-            cwd=cmd.directory,
-        )
+            cmd.directory,
+        ))
+
+    refold_cps = hermetic.run_many(refold_specs, jobs)
+
+    # Output is reported, and failures raised, in compdb order.
+    for cmd, abs_src_path, (refold_cmd, _cwd), cp in zip(
+        compdb.commands, abs_src_paths, refold_specs, refold_cps
+    ):
+        abs_src_path_base = abs_src_path.with_suffix("")
+        c_path = abs_src_path_base.with_suffix(".c")
+        print("Refolding", abs_src_path, "to", c_path)
+        print(cmd.get_command_parts())
+        sys.stdout.write(cp.stdout.decode("utf-8", errors="replace"))
+        sys.stderr.write(cp.stderr.decode("utf-8", errors="replace"))
+        if cp.returncode != 0:
+            raise subprocess.CalledProcessError(cp.returncode, refold_cmd, cp.stdout, cp.stderr)
 
         if consolidation_data_by_rel_tu:
             rel_tu_path = abs_src_path.relative_to(target_dir_path).as_posix()
             ctx = consolidation_data_by_rel_tu.get(rel_tu_path)
             if ctx is not None and ctx.reverts:
+                edit_map_path = abs_src_path_base.with_suffix(".nolines.editmap.json")
                 restore_dropped_consolidation_reverts(c_path, edit_map_path, ctx)
 
-        if environ.get("XJ_REFOLD_CHECK"):
-            crc_cp = hermetic.run(
+    if environ.get("XJ_REFOLD_CHECK"):
+        check_specs: list[tuple[hermetic.RunSpec, Path | str]] = []
+        for abs_src_path in abs_src_paths:
+            abs_src_path_base = abs_src_path.with_suffix("")
+            check_specs.append((
                 [
                     "clang-refold",
                     "--check",
-                    c_path,
+                    str(abs_src_path_base.with_suffix(".c")),
                     "--refold-map",
-                    refold_map_path,
+                    str(abs_src_path_base.with_suffix(".nolines.refoldmap.json")),
                     "--pp-mod",
-                    abs_src_path,
+                    str(abs_src_path),
                 ],
-                check=False,
-                capture_output=True,
-            )
+                Path.cwd(),
+            ))
+        for crc_cp in hermetic.run_many(check_specs, jobs):
             if crc_cp.returncode != 0:
                 print("clang-refold --check failed:")
                 print("stdout:")
@@ -604,6 +726,65 @@ def compute_globals_and_statics_for_translation_units(
     return combined
 
 
+def compute_named_globals_and_statics_for_project(
+    compdb: compilation_database.CompileCommands,
+    elide_functions: bool = False,
+    statics_only: bool = False,
+    jobs: int = 1,
+) -> list[NamedDeclInfo]:
+    """Like `compute_globals_and_statics_for_project`, but returning (picklable)
+    `NamedDeclInfo`s, which allows the TUs to be parsed in parallel."""
+    per_tu = map_project_tus(
+        compdb,
+        functools.partial(
+            named_globals_and_statics_of_tu,
+            elide_functions=elide_functions,
+            statics_only=statics_only,
+        ),
+        jobs,
+    )
+    return [info for infos in per_tu.values() for info in infos]
+
+
+def named_globals_and_statics_of_tu(
+    translation_unit: TranslationUnit, elide_functions: bool, statics_only: bool
+) -> list[NamedDeclInfo]:
+    return [
+        mk_NamedDeclInfo(c)
+        for c in compute_globals_and_statics_for_translation_unit(
+            translation_unit, elide_functions, statics_only
+        )
+    ]
+
+
+def is_inline_function(cursor: Cursor) -> bool:
+    if cursor.kind != CursorKind.FUNCTION_DECL:
+        return False
+    for token in cursor.get_tokens():
+        if token.spelling == cursor.spelling:
+            break  # didn't see `inline` before the function name.
+        if token.spelling in (
+            "inline",
+            "__inline",
+            "__inline__",
+            "__always_inline__",
+            "always_inline",
+        ):
+            return True
+    return False
+
+
+def named_static_inline_fns_of_tu(translation_unit: TranslationUnit) -> list[NamedDeclInfo]:
+    # With `statics_only`, every cursor is static; only inline-ness needs checking.
+    return [
+        mk_NamedDeclInfo(c)
+        for c in compute_globals_and_statics_for_translation_unit(
+            translation_unit, elide_functions=False, statics_only=True
+        )
+        if is_inline_function(c)
+    ]
+
+
 def mk_NamedDeclInfo(node: Cursor) -> NamedDeclInfo:
     extent = node.extent
     start = extent.start
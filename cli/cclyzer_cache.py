@@ -0,0 +1,127 @@
+"""Directory-backed, content-addressed cache of cclyzer++ results.
+
+cclyzer++ can take hours on larger programs, so its results are cached across
+translations. Entries are keyed by a hash of the analyzed bitcode, the tool
+version, and the analysis flags, so alternating between projects (or between
+configurations of one project) doesn't evict the others' results.
+
+Each entry is a single gzip-compressed JSON file, written to a temporary file
+and atomically renamed into place, so concurrent readers and writers (e.g.
+pytest-xdist workers) only ever see complete entries. An entry's mtime records
+when it was last used; once the cache exceeds its size bound, the least
+recently used entries are evicted.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import repo_root
+
+DEFAULT_MAX_CACHE_MB = 2048
+
+ENTRY_SUFFIX = ".json.gz"
+
+
+def cache_dir() -> Path:
+    return repo_root.localdir() / "xj-cclyzer-cache"
+
+
+def legacy_cache_path() -> Path:
+    """The single-entry cache file used before the cache became a directory."""
+    return repo_root.localdir() / "xj-cclyzer-cache.json"
+
+
+def should_use_cclyzer_cache() -> bool:
+    return os.environ.get("XJ_CCLYZER_CACHE", "1") != "0"
+
+
+def max_cache_bytes() -> int:
+    return int(os.environ.get("XJ_CCLYZER_CACHE_MAX_MB", DEFAULT_MAX_CACHE_MB)) * 1024 * 1024
+
+
+def key_of_signature(signature: list[str]) -> str:
+    return hashlib.sha256(json.dumps(signature).encode("utf-8")).hexdigest()
+
+
+class CclyzerCache:
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+
+    def _entry_path(self, signature: list[str]) -> Path:
+        key = key_of_signature(signature)
+        return self.root / key[:2] / f"{key}{ENTRY_SUFFIX}"
+
+    def lookup(self, signature: list[str]) -> dict | None:
+        entry_path = self._entry_path(signature)
+        try:
+            with gzip.open(entry_path, "rt", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, json.JSONDecodeError) as e:
+            print(f"Ignoring unreadable cclyzer++ cache entry {entry_path}: {e}")
+            return None
+
+        if entry["signature"] != signature:
+            return None
+
+        try:
+            os.utime(entry_path)  # Mark as recently used, for LRU eviction.
+        except FileNotFoundError:
+            pass  # Evicted by another process since we read it.
+        return entry["contents"]
+
+    def store(self, signature: list[str], contents: dict) -> None:
+        entry_path = self._entry_path(signature)
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=entry_path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.open(raw, "wt", encoding="utf-8") as f:
+                json.dump({"signature": signature, "contents": contents}, f)
+            os.replace(tmp_name, entry_path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        self.evict_to_fit()
+
+    def entries(self) -> list[tuple[Path, os.stat_result]]:
+        found = []
+        for path in self.root.glob(f"*/*{ENTRY_SUFFIX}"):
+            try:
+                found.append((path, path.stat()))
+            except FileNotFoundError:
+                pass  # Evicted concurrently.
+        return found
+
+    def evict_to_fit(self) -> None:
+        """Deletes least recently used entries until the cache fits in `max_bytes`.
+        The most recently used entry is always kept, even if it alone is too big."""
+        entries = sorted(self.entries(), key=lambda e: e[1].st_mtime, reverse=True)
+        total = sum(st.st_size for _path, st in entries)
+        while total > self.max_bytes and len(entries) > 1:
+            path, st = entries.pop()
+            path.unlink(missing_ok=True)
+            total -= st.st_size
+
+    def import_legacy_cache_file(self, legacy_path: Path) -> None:
+        """Moves the entry from a pre-directory single-entry cache file, if any."""
+        try:
+            legacy = json.loads(legacy_path.read_text(encoding="utf-8"))
+            self.store(legacy["signature"], legacy["contents"])
+        except FileNotFoundError:
+            return
+        except (json.JSONDecodeError, KeyError):
+            pass
+        legacy_path.unlink(missing_ok=True)
+
+
+def open_cclyzer_cache() -> CclyzerCache:
+    cache = CclyzerCache(cache_dir(), max_cache_bytes())
+    if legacy_cache_path().exists():
+        cache.import_legacy_cache_file(legacy_cache_path())
+    return cache
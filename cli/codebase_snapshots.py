@@ -0,0 +1,155 @@
+import dataclasses
+import errno
+import os
+import platform
+import shutil
+from pathlib import Path
+
+# From <linux/fs.h>: _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+# errno values indicating that the filesystem (or the pair of filesystems)
+# cannot share extents between the two files, as opposed to a real I/O error.
+_REFLINK_UNSUPPORTED_ERRNOS = {
+    errno.EOPNOTSUPP,
+    errno.ENOTTY,
+    errno.EXDEV,
+    errno.EINVAL,
+    errno.ENOSYS,
+    errno.EBADF,
+}
+
+
+@dataclasses.dataclass
+class SnapshotStats:
+    files: int = 0
+    bytes_cloned: int = 0
+    """Bytes shared with the source via reflinks; no data was written for these."""
+    bytes_written: int = 0
+    """Bytes physically copied."""
+
+    def describe(self) -> str:
+        mib = 1024 * 1024
+        return (
+            f"{self.files} files, {self.bytes_written / mib:.1f} MiB written, "
+            f"{self.bytes_cloned / mib:.1f} MiB shared via reflink"
+        )
+
+
+def snapshot_mode() -> str:
+    """Either "reflink" (the default, falling back to copying where the
+    filesystem doesn't support it) or "copy" (always copy file contents)."""
+    mode = os.environ.get("XJ_SNAPSHOT_MODE", "reflink")
+    assert mode in ("reflink", "copy"), f"Unknown XJ_SNAPSHOT_MODE: {mode}"
+    return mode
+
+
+def try_reflink(src: str, dst: str) -> bool:
+    """Make `dst` a copy-on-write clone of `src`, returning False (with `dst`
+    possibly created but empty) if the filesystem does not support it."""
+    if platform.system() != "Linux":
+        return False
+
+    import fcntl  # noqa: PLC0415
+
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        except OSError as e:
+            if e.errno in _REFLINK_UNSUPPORTED_ERRNOS:
+                return False
+            raise
+    shutil.copystat(src, dst)
+    return True
+
+
+def snapshot_tree(src: Path, dst: Path, exclude: frozenset[str] = frozenset()) -> SnapshotStats:
+    """Like `shutil.copytree(src, dst)`, but sharing file contents with `src`
+    via reflinks when the filesystem supports them (btrfs, XFS, bcachefs...).
+    Top-level entries named in `exclude` are not copied.
+
+    Unlike hardlinks, reflinked files are independent copies as far as readers
+    and writers are concerned, so passes (and the external tools they run) can
+    keep modifying files in place without affecting earlier snapshots.
+    """
+    stats = SnapshotStats()
+    use_reflink = snapshot_mode() == "reflink"
+
+    def copy_function(s: str, d: str) -> str:
+        nonlocal use_reflink
+        size = os.stat(s).st_size
+        stats.files += 1
+        if use_reflink:
+            if try_reflink(s, d):
+                stats.bytes_cloned += size
+                return d
+            # Don't keep paying for failed ioctls on a filesystem without support.
+            use_reflink = False
+        shutil.copy2(s, d)
+        stats.bytes_written += size
+        return d
+
+    def ignore(dirpath: str, names: list[str]) -> set[str]:
+        return set(names) & exclude if Path(dirpath) == src else set()
+
+    shutil.copytree(src, dst, copy_function=copy_function, ignore=ignore)
+    return stats
+
+
+def sync_tree(src: Path, dst: Path, exclude: frozenset[str] = frozenset()) -> int:
+    """Makes `dst` mirror `src`, rewriting only files whose contents differ and
+    removing files and directories that `src` lacks. Top-level entries named
+    in `exclude` are neither copied nor removed. Returns the number of files
+    written or removed.
+
+    Unchanged files keep their mtimes, so tools that track freshness by mtime
+    (like cargo) see only the files that actually changed. Rewritten files get
+    the current time as their mtime, rather than that of their source, which
+    may well predate the last build (e.g. when a pass restores an older file).
+    """
+    changed = 0
+    dst.mkdir(parents=True, exist_ok=True)
+    for dirpath, dirnames, filenames in os.walk(src):
+        rel_dir = Path(dirpath).relative_to(src)
+        if rel_dir == Path("."):
+            dirnames[:] = [d for d in dirnames if d not in exclude]
+            filenames = [f for f in filenames if f not in exclude]
+        dst_dir = dst / rel_dir
+        if dst_dir.is_symlink() or (dst_dir.exists() and not dst_dir.is_dir()):
+            dst_dir.unlink()
+        dst_dir.mkdir(exist_ok=True)
+
+        for name in filenames:
+            s = Path(dirpath) / name
+            d = dst_dir / name
+            if d.is_file() and not d.is_symlink() and _same_contents(s, d):
+                continue
+            if d.is_dir() and not d.is_symlink():
+                shutil.rmtree(d)
+            shutil.copyfile(s, d)
+            shutil.copymode(s, d)
+            changed += 1
+
+        wanted = set(dirnames) | set(filenames)
+        for stale in dst_dir.iterdir():
+            if stale.name in wanted or (rel_dir == Path(".") and stale.name in exclude):
+                continue
+            if stale.is_dir() and not stale.is_symlink():
+                changed += sum(1 for p in stale.rglob("*") if not p.is_dir())
+                shutil.rmtree(stale)
+            else:
+                stale.unlink()
+                changed += 1
+    return changed
+
+
+def _same_contents(a: Path, b: Path) -> bool:
+    if a.stat().st_size != b.stat().st_size:
+        return False
+    with open(a, "rb") as fa, open(b, "rb") as fb:
+        while True:
+            chunk_a = fa.read(1024 * 1024)
+            if chunk_a != fb.read(1024 * 1024):
+                return False
+            if not chunk_a:
+                return True
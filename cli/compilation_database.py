@@ -3,7 +3,7 @@ from __future__ import annotations
 import json
 from pathlib import Path
 import shlex
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 import repo_root
 import hermetic
@@ -89,6 +89,21 @@ class CompileCommands:
 
     commands: list[CompileCommand]
 
+    # Commands keyed by absolute file path, built on first lookup. Dropped when
+    # `commands` is assigned; after modifying `commands` in place, callers must
+    # call `invalidate_path_index`.
+    _path_index: dict[Path, list[CompileCommand]] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    def __setattr__(self, name: str, value) -> None:
+        super().__setattr__(name, value)
+        if name == "commands":
+            self.invalidate_path_index()
+
+    def invalidate_path_index(self) -> None:
+        super().__setattr__("_path_index", None)
+
     @classmethod
     def from_json_file(cls, file_path: str | Path) -> CompileCommands:
         """Load compile commands from a JSON file"""
@@ -136,7 +151,15 @@ class CompileCommands:
         assert path.is_absolute(), (
             "To avoid ambiguity from duplicate file names, queried path must be absolute"
         )
-        return [cmd for cmd in self.commands if cmd.absolute_file_path == path]
+        return list(self._commands_by_path().get(path, ()))
+
+    def _commands_by_path(self) -> dict[Path, list[CompileCommand]]:
+        if self._path_index is None:
+            index: dict[Path, list[CompileCommand]] = {}
+            for cmd in self.commands:
+                index.setdefault(cmd.absolute_file_path, []).append(cmd)
+            self._path_index = index
+        return self._path_index
 
 
 def synthetic_compile_commands_for_c_file(c_file: Path, builddir: Path) -> CompileCommands:
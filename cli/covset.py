@@ -1,18 +1,26 @@
 import sys
 import json
 import base64
+import contextlib
 import zlib
 import compression.zstd as zstd
 import os
 from pathlib import Path
-from typing import TypedDict, Union, Any, Optional, Literal, cast
+from typing import TypedDict, Union, Any, Optional, Literal, Iterable, Iterator, TextIO, cast
 import hashlib
+import heapq
+import itertools
+import mmap
+import re
+import shlex
+import struct
 from typing_extensions import NotRequired
 import tempfile
 from subprocess import CompletedProcess
 
-import hermetic
-import repo_root
+# `hermetic` and `repo_root` are imported by the functions that generate covsets,
+# so that evaluating and minimizing covsets doesn't pay for importing them.
+# See COMMENTARY(lazy-subcommand-imports) in main.py.
 
 """
 Type definitions for the Coverage Set (covset) format.
@@ -30,6 +38,12 @@ A covset is a JSON document with two top-level keys:
 
 The coverage data for each file is stored as a bitmap where each bit
 corresponds to a source line (bit=1 means covered, bit=0 means not covered).
+
+Covsets can also be stored in an equivalent binary container (see
+`save_binary`), which holds the compressed bitmaps without base64 and is
+memory-mapped when loaded, so that bitmaps are only read and decompressed when
+an operation actually needs them. Files with the `BINARY_SUFFIX` suffix are
+written in the binary format; either format is accepted wherever covsets are read.
 """
 
 type CompressionType = Literal["identity", "zlib", "zstd"]
@@ -47,12 +61,16 @@ class EncodedCoverage(TypedDict):
     b64 : str
         Base64-encoded binary data. After decoding and decompressing,
         this yields a bitmap where bit N indicates whether line N is covered.
+    raw : bytes | memoryview
+        In memory only, instead of `b64`: the still-compressed data, as read
+        (without copying) from a binary covset file. Never written to JSON.
     compression : CompressionType
         Compression algorithm: "identity", "zlib", or "zstd".
         Defaults to "identity" if not present.
     """
 
-    b64: str
+    b64: NotRequired[str]
+    raw: NotRequired[bytes | memoryview]
     compression: NotRequired[CompressionType]
 
 
@@ -225,20 +243,159 @@ class CovSet:
 
     def to_json_dict(self) -> CovSetDict:
         """Returns the covset data as a dictionary."""
-        return {"files": self.files, "configs": self.configs}
+        files: FilesDict = {}
+        for fhash, info in self.files.items():
+            entries: dict[str, Any] = cast(dict, info)
+            raw_keys = [k for k in BITMAP_KEYS if "raw" in entries.get(k, {})]
+            if raw_keys:
+                entries = {**entries, **{k: _as_json_encoded(entries[k]) for k in raw_keys}}
+            files[fhash] = cast(FileInfo, entries)
+        return {"files": files, "configs": self.configs}
 
     @staticmethod
     def load(filepath: str) -> "CovSet":
-        """Loads a covset from a JSON file."""
+        """Loads a covset from a JSON or binary covset file."""
+        with open(filepath, "rb") as f:
+            is_binary = f.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+        if is_binary:
+            return load_binary(filepath)
         with open(filepath, "r", encoding="utf-8") as f:
             return CovSet(json.load(f))
 
     def save(self, filepath: str):
-        """Saves a covset to a JSON file."""
+        """Saves a covset, in the binary format if `filepath` ends with `BINARY_SUFFIX`
+        and as JSON otherwise."""
+        if filepath.endswith(BINARY_SUFFIX):
+            save_binary(self, filepath)
+            return
         with open(filepath, "w", encoding="utf-8") as f:
             json.dump(self.to_json_dict(), f, indent=2)
 
 
+BINARY_SUFFIX = ".xjcov"
+BINARY_MAGIC = b"XJCOVSET"
+BINARY_VERSION = 1
+BITMAP_KEYS = ("encodedcoverage", "encodedcoverable")
+
+# Binary covset layout (all integers little-endian):
+#
+#   header      magic, version, file count, and the offset & length of the metadata
+#   file table  per file, in metadata order: for each bitmap in BITMAP_KEYS,
+#               its compression code and the offset & length of its bytes
+#   metadata    zstd-compressed JSON: {"configs": [...], "files": [[hash, info], ...]},
+#               where each info has the bitmaps replaced by null
+#   bitmaps     the compressed bitmaps, back to back
+_HEADER = struct.Struct("<8sHxxIQQ")
+_TABLE_ENTRY = struct.Struct("<BB6xQQQQ")
+_COMPRESSION_CODES: dict[CompressionType, int] = {"identity": 0, "zlib": 1, "zstd": 2}
+_COMPRESSION_BY_CODE = {code: c for c, code in _COMPRESSION_CODES.items()}
+_ABSENT_BITMAP = 0xFF
+
+
+def _as_json_encoded(encoded: EncodedCoverage) -> EncodedCoverage:
+    if "raw" not in encoded:
+        return encoded
+    return {
+        "b64": base64.b64encode(encoded["raw"]).decode("ascii"),
+        "compression": encoded.get("compression", "identity"),
+    }
+
+
+def _compressed_bytes(encoded: EncodedCoverage) -> bytes | memoryview:
+    if "raw" in encoded:
+        return encoded["raw"]
+    return base64.b64decode(encoded["b64"])
+
+
+def save_binary(covset: CovSet, filepath: str):
+    """Saves a covset in the binary container format.
+
+    The file is written to a temporary file and renamed into place, so that
+    covsets loaded (and still mapped) from `filepath` remain readable.
+    """
+    entries: list[tuple[int, int]] = []  # (compression code, size) per bitmap
+    blobs: list[bytes | memoryview] = []
+    meta_files = []
+    for fhash, info in covset.files.items():
+        meta_info: dict[str, Any] = dict(info)
+        for key in BITMAP_KEYS:
+            encoded = cast(EncodedCoverage | None, info.get(key))
+            if encoded is None:
+                entries.append((_ABSENT_BITMAP, 0))
+                continue
+            meta_info[key] = None
+            blob = _compressed_bytes(encoded)
+            entries.append((_COMPRESSION_CODES[encoded.get("compression", "identity")], len(blob)))
+            blobs.append(blob)
+        meta_files.append([fhash, meta_info])
+    meta = zstd.compress(
+        json.dumps({"configs": covset.configs, "files": meta_files}).encode("utf-8")
+    )
+
+    meta_offset = _HEADER.size + _TABLE_ENTRY.size * len(meta_files)
+    table = bytearray()
+    offset = meta_offset + len(meta)
+    for (code1, size1), (code2, size2) in zip(entries[0::2], entries[1::2]):
+        table += _TABLE_ENTRY.pack(code1, code2, offset, size1, offset + size1, size2)
+        offset += size1 + size2
+
+    output = Path(filepath)
+    fd, tmp_name = tempfile.mkstemp(dir=output.parent, prefix=output.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(
+                _HEADER.pack(BINARY_MAGIC, BINARY_VERSION, len(meta_files), meta_offset, len(meta))
+            )
+            f.write(table)
+            f.write(meta)
+            for blob in blobs:
+                f.write(blob)
+        os.replace(tmp_name, output)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def load_binary(filepath: str) -> CovSet:
+    """Loads a covset from the binary container format.
+
+    The file is memory-mapped, and the loaded bitmaps refer to it rather than
+    holding copies; they are decompressed only when passed to `decode_bitmap`.
+    """
+    with open(filepath, "rb") as f:
+        # The mapping outlives the file object, and lives as long as any bitmap views into it.
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    try:
+        magic, version, num_files, meta_offset, meta_length = _HEADER.unpack_from(view, 0)
+        if magic != BINARY_MAGIC or version != BINARY_VERSION:
+            raise ValueError(f"Unsupported binary covset version {version} in {filepath}")
+        meta = json.loads(zstd.decompress(view[meta_offset : meta_offset + meta_length]))
+        if len(meta["files"]) != num_files:
+            raise ValueError(f"Corrupt binary covset {filepath}: file table size mismatch")
+
+        files: FilesDict = {}
+        for i, (fhash, info) in enumerate(meta["files"]):
+            code1, code2, off1, size1, off2, size2 = _TABLE_ENTRY.unpack_from(
+                view, _HEADER.size + i * _TABLE_ENTRY.size
+            )
+            for key, code, off, size in zip(
+                BITMAP_KEYS, (code1, code2), (off1, off2), (size1, size2)
+            ):
+                if code == _ABSENT_BITMAP:
+                    continue
+                if off + size > len(view):
+                    raise ValueError(f"Corrupt binary covset {filepath}: bitmap out of bounds")
+                info[key] = {
+                    "raw": view[off : off + size],
+                    "compression": _COMPRESSION_BY_CODE[code],
+                }
+            files[fhash] = info
+    except (struct.error, KeyError, zstd.ZstdError) as e:
+        raise ValueError(f"Corrupt binary covset {filepath}: {e}") from e
+    return CovSet({"files": files, "configs": meta["configs"]})
+
+
 def llvm_profdata_to_CovSetDict(
     llvm_cov_export: dict[str, Any],
     *,
@@ -265,6 +422,201 @@ def llvm_profdata_to_CovSetDict(
     codebase_only:
         If True, discard coverage for files outside `codebase_path`.
     """
+    # The JSON schema varies somewhat across LLVM versions and flags.
+    # We support the common shape:
+    #   {"data": [{"files": [{"filename": "...", "segments": [...]}, ...]}]}
+    data = llvm_cov_export.get("data")
+    if not isinstance(data, list):
+        raise TypeError("Invalid llvm-cov export JSON: missing/invalid 'data' array")
+
+    def files() -> Iterator[Any]:
+        for datum in data:
+            if isinstance(datum, dict) and isinstance(datum.get("files"), list):
+                yield from datum["files"]
+
+    return _llvm_cov_files_to_CovSetDict(
+        files(), codebase_path=codebase_path, compression=compression, only_within=only_within
+    )
+
+
+def llvm_cov_export_stream_to_CovSetDict(
+    llvm_cov_export: TextIO,
+    *,
+    codebase_path: Path,
+    compression: CompressionType = "zstd",
+    only_within: list[Path] = [],
+) -> CovSetDict:
+    """
+    Like `llvm_profdata_to_CovSetDict`, but reads the `llvm-cov export` JSON
+    incrementally: each file's segments are converted to bitmaps (and dropped)
+    as soon as that file's entry has been read. Peak memory use is thus bounded
+    by the largest single file entry, rather than by the whole export.
+    """
+    return llvm_cov_export_streams_to_CovSetDict(
+        [llvm_cov_export],
+        codebase_path=codebase_path,
+        compression=compression,
+        only_within=only_within,
+    )
+
+
+def llvm_cov_export_streams_to_CovSetDict(
+    llvm_cov_exports: list[TextIO],
+    *,
+    codebase_path: Path,
+    compression: CompressionType = "zstd",
+    only_within: list[Path] = [],
+) -> CovSetDict:
+    """
+    Like `llvm_cov_export_stream_to_CovSetDict`, for the exports of several
+    objects (e.g. executables and the shared libraries they load) from the same
+    profile. A line is covered (or coverable) if it is in any of the exports.
+    """
+    return _llvm_cov_files_to_CovSetDict(
+        itertools.chain.from_iterable(_streamed_llvm_cov_files(e) for e in llvm_cov_exports),
+        codebase_path=codebase_path,
+        compression=compression,
+        only_within=only_within,
+    )
+
+
+def _streamed_llvm_cov_files(llvm_cov_export: TextIO) -> Iterator[Any]:
+    reader = _JsonStreamReader(llvm_cov_export)
+    found_data = False
+    for key in reader.object_keys():
+        if key != "data":
+            reader.skip_value()
+            continue
+        if reader.peek() != "[":
+            break
+        found_data = True
+        for _ in reader.array_items():
+            if reader.peek() != "{":
+                reader.skip_value()
+                continue
+            for datum_key in reader.object_keys():
+                if datum_key != "files" or reader.peek() != "[":
+                    reader.skip_value()
+                    continue
+                for _ in reader.array_items():
+                    yield reader.read_value()
+    if not found_data:
+        raise TypeError("Invalid llvm-cov export JSON: missing/invalid 'data' array")
+
+
+class _JsonStreamReader:
+    """Reads a JSON document from a text stream, a few values at a time.
+
+    Callers walk the document's outer structure with `object_keys` and
+    `array_items`, and read (or skip) the values within it whole. Only the
+    text of the value being read is buffered.
+    """
+
+    _CHUNK_SIZE = 1 << 20
+
+    def __init__(self, stream: TextIO):
+        self._stream = stream
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self, min_chars: int) -> bool:
+        """Reads at least `min_chars` more characters, unless at EOF."""
+        if self._pos > len(self._buf) // 2:
+            self._buf = self._buf[self._pos :]
+            self._pos = 0
+        chunks = [self._buf]
+        read = 0
+        while read < min_chars:
+            chunk = self._stream.read(max(self._CHUNK_SIZE, min_chars - read))
+            if not chunk:
+                self._eof = True
+                break
+            chunks.append(chunk)
+            read += len(chunk)
+        self._buf = "".join(chunks)
+        return read > 0
+
+    def peek(self) -> str:
+        """Returns the next non-whitespace character, or "" at the end of input."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos].isspace():
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill(1):
+                return ""
+
+    def _expect(self, chars: str) -> str:
+        c = self.peek()
+        if not c or c not in chars:
+            raise ValueError(f"Invalid JSON: expected one of {chars!r}, found {c!r}")
+        self._pos += 1
+        return c
+
+    def read_value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+                # A number at the end of the buffer may continue in the next chunk.
+                if end < len(self._buf) or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            # Grow geometrically, so that a large value is re-scanned a bounded number of times.
+            self._fill(max(self._CHUNK_SIZE, len(self._buf) - self._pos))
+
+    def skip_value(self):
+        """Like `read_value`, but only holds one element of a skipped array or object
+        in memory at a time."""
+        c = self.peek()
+        if c == "[":
+            for _ in self.array_items():
+                self.read_value()
+        elif c == "{":
+            for _ in self.object_keys():
+                self.read_value()
+        else:
+            self.read_value()
+
+    def object_keys(self) -> Iterator[str]:
+        """Yields each key of an object; the caller must read or skip its value."""
+        self._expect("{")
+        if self.peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self.read_value()
+            if not isinstance(key, str):
+                raise TypeError("Invalid JSON: object key is not a string")
+            self._expect(":")
+            yield key
+            if self._expect(",}") == "}":
+                return
+
+    def array_items(self) -> Iterator[None]:
+        """Yields once per item of an array; the caller must read or skip the item."""
+        self._expect("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield None
+            if self._expect(",]") == "]":
+                return
+
+
+def _llvm_cov_files_to_CovSetDict(
+    llvm_cov_files: Iterable[Any],
+    *,
+    codebase_path: Path,
+    compression: CompressionType,
+    only_within: list[Path],
+) -> CovSetDict:
     if not codebase_path.is_dir():
         if (
             codebase_path.exists()
@@ -276,83 +628,79 @@ def llvm_profdata_to_CovSetDict(
         else:
             raise FileNotFoundError(f"Codebase path not found or not a directory: {codebase_path}")
 
-    # The JSON schema varies somewhat across LLVM versions and flags.
-    # We support the common shape:
-    #   {"data": [{"files": [{"filename": "...", "segments": [...]}, ...]}]}
-    data = llvm_cov_export.get("data")
-    if not isinstance(data, list):
-        raise TypeError("Invalid llvm-cov export JSON: missing/invalid 'data' array")
+    # (filename, covered, coverable) per file hash. A file may be listed more
+    # than once, e.g. by the exports of several binaries that include it.
+    bitmaps: dict[Sha256Hex, tuple[str, int, int]] = {}
 
-    files_out: FilesDict = {}
-    # We don't currently reconstruct per-file compiler configurations from
-    # llvm-cov export; keep a single empty config to satisfy schema.
-    configs_out: ConfigsArray = [[]]
-
-    for datum in data:
-        if not isinstance(datum, dict):
+    for f in llvm_cov_files:
+        if not isinstance(f, dict):
             continue
-        files = datum.get("files")
-        if not isinstance(files, list):
+        filename = f.get("filename") or f.get("name")
+        if not isinstance(filename, str) or not filename:
             continue
 
-        for f in files:
-            if not isinstance(f, dict):
-                continue
-            filename = f.get("filename") or f.get("name")
-            if not isinstance(filename, str) or not filename:
-                continue
+        filepath = Path(filename)
+        if filepath.is_absolute():
+            if only_within:
+                if not any(filepath.resolve().is_relative_to(p) for p in only_within):
+                    continue
+            source_path = filepath
+        else:
+            source_path = codebase_path / filepath
+
+        # Hash original source bytes to produce CovSet file key.
+        source_bytes = source_path.read_bytes()
+        file_hash = hashlib.sha256(source_bytes).hexdigest()
+
+        # Determine number of lines to size the bitmap.
+        # Compute per-line lengths from a robust UTF-8 decode (with replacement)
+        # and derive the line count from that.
+        text = source_bytes.decode("utf-8", errors="replace")
+        line_texts = text.splitlines()
+        # Preserve previous semantics of counting a trailing newline as an
+        # additional (empty) final line.
+        if text.endswith("\n"):
+            line_texts.append("")
+        if not line_texts:
+            line_texts = [""]
+        line_lengths = [len(line) for line in line_texts]
+
+        segments = f.get("segments")
+        if segments is None:
+            # Some versions nest under "segments": {"segments": ...}
+            seg_obj = f.get("segments")
+            segments = seg_obj.get("segments") if isinstance(seg_obj, dict) else None
+
+        # If no segments are available, we still record the file with an
+        # empty bitmap (useful for reporting).
+        if isinstance(segments, list):
+            covered, coverable = _covered_lines_from_llvm_segments(segments, line_lengths)
+        else:
+            covered = 0
+            coverable = 0
 
-            filepath = Path(filename)
-            if filepath.is_absolute():
-                if only_within:
-                    if not any(filepath.resolve().is_relative_to(p) for p in only_within):
-                        continue
-                source_path = filepath
-            else:
-                source_path = codebase_path / filepath
-
-            # Hash original source bytes to produce CovSet file key.
-            source_bytes = source_path.read_bytes()
-            file_hash = hashlib.sha256(source_bytes).hexdigest()
-
-            # Determine number of lines to size the bitmap.
-            # Compute per-line lengths from a robust UTF-8 decode (with replacement)
-            # and derive the line count from that.
-            text = source_bytes.decode("utf-8", errors="replace")
-            line_texts = text.splitlines()
-            # Preserve previous semantics of counting a trailing newline as an
-            # additional (empty) final line.
-            if text.endswith("\n"):
-                line_texts.append("")
-            if not line_texts:
-                line_texts = [""]
-            line_lengths = [len(line) for line in line_texts]
-
-            segments = f.get("segments")
-            if segments is None:
-                # Some versions nest under "segments": {"segments": ...}
-                seg_obj = f.get("segments")
-                segments = seg_obj.get("segments") if isinstance(seg_obj, dict) else None
-
-            # If no segments are available, we still record the file with an
-            # empty bitmap (useful for reporting).
-            if isinstance(segments, list):
-                covered, coverable = _covered_lines_from_llvm_segments(segments, line_lengths)
-            else:
-                covered = 0
-                coverable = 0
-
-            files_out[file_hash] = cast(
-                FileInfo,
-                {
-                    "filepath": {"utf8": filename, "hex": None},
-                    "expandedhash": None,
-                    "encodedcoverage": encode_bitmap(covered, compression),
-                    "encodedcoverable": encode_bitmap(coverable, compression),
-                    "misc": None,
-                },
-            )
+        if file_hash in bitmaps:
+            filename, covered_before, coverable_before = bitmaps[file_hash]
+            covered |= covered_before
+            coverable |= coverable_before
+        bitmaps[file_hash] = (filename, covered, coverable)
+
+    files_out: FilesDict = {}
+    for file_hash, (filename, covered, coverable) in bitmaps.items():
+        files_out[file_hash] = cast(
+            FileInfo,
+            {
+                "filepath": {"utf8": filename, "hex": None},
+                "expandedhash": None,
+                "encodedcoverage": encode_bitmap(covered, compression),
+                "encodedcoverable": encode_bitmap(coverable, compression),
+                "misc": None,
+            },
+        )
 
+    # We don't currently reconstruct per-file compiler configurations from
+    # llvm-cov export; keep a single empty config to satisfy schema.
+    configs_out: ConfigsArray = [[]]
     return {"files": files_out, "configs": configs_out}
 
 
@@ -451,9 +799,7 @@ def _covered_lines_from_llvm_segments(
 def decode_bitmap(encoded_data: EncodedCoverage) -> int:
     """Decodes and decompresses bitmap data from the covset format."""
     compression = encoded_data.get("compression", "identity")
-    b64_data = encoded_data["b64"]
-
-    binary_data = base64.b64decode(b64_data)
+    binary_data = _compressed_bytes(encoded_data)
 
     if compression == "identity":
         return _bytes_to_bits(binary_data)
@@ -484,44 +830,52 @@ def encode_bitmap(bitmap: int, compression: CompressionType) -> EncodedCoverage:
 type Sexpr = Union[str, list["Sexpr"]]
 
 
+# Parentheses, runs of whitespace, and atoms, which may contain double-quoted
+# sections (e.g. paths with spaces or parentheses). An unterminated quoted
+# section extends to the end of the input.
+_SEXP_TOKEN = re.compile(r'[()]|\s+|(?:"[^"]*(?:"|$)|[^\s()"])+')
+
+
+def _tokenize_sexp(s: str) -> Iterator[str]:
+    """Yields the parentheses and atoms of `s`, in a single pass."""
+    for m in _SEXP_TOKEN.finditer(s):
+        token = m.group()
+        if not token.isspace():
+            yield token
+
+
 def parse_sexp(s: str) -> Sexpr:
     """
     Parses a simple s-expression string into a nested list structure.
     Handles quoted strings as atoms.
-    """
-    s = s.strip()
-    if not s.startswith("(") or not s.endswith(")"):
-        # It's an atom
-        return s.strip('"')
-
-    # It's an expression
-    s = s[1:-1].strip()
-
-    parts = []
-    balance = 0
-    current_part = ""
-    in_string = False
-
-    for char in s:
-        if char == '"':
-            in_string = not in_string
 
-        if char == "(" and not in_string:
-            balance += 1
-        elif char == ")" and not in_string:
-            balance -= 1
+    Parsing takes linear time and uses an explicit stack, so machine-generated
+    expressions may be arbitrarily long and deeply nested.
 
-        if char.isspace() and balance == 0 and not in_string:
-            if current_part:
-                parts.append(parse_sexp(current_part))
-                current_part = ""
+    Input without parentheses or quotes is a single atom, even if it contains
+    spaces, so that a covset path like `my cov.json` can be given by itself.
+    """
+    if s.strip() and not any(c in s for c in '()"'):
+        return s.strip()
+    stack: list[list[Sexpr]] = []
+    parsed: list[Sexpr] = []  # Complete top-level expressions.
+    for token in _tokenize_sexp(s):
+        if token == "(":
+            stack.append([])
+            continue
+        if token == ")":
+            if not stack:
+                raise ValueError("Unbalanced parentheses: unexpected ')'")
+            done: Sexpr = stack.pop()
         else:
-            current_part += char
-
-    if current_part:
-        parts.append(parse_sexp(current_part))
+            done = token.strip('"')
+        (stack[-1] if stack else parsed).append(done)
 
-    return parts
+    if stack:
+        raise ValueError(f"Unbalanced parentheses: {len(stack)} unclosed '('")
+    if len(parsed) != 1:
+        raise ValueError(f"Expected a single expression, found {len(parsed)}")
+    return parsed[0]
 
 
 def _merge_configs(
@@ -531,19 +885,19 @@ def _merge_configs(
     Merges two config lists, creating a unified list and mappings
     from the old config indices to the new ones.
     """
-    conf1_tuples = [tuple(c) for c in configs1]
-    conf2_tuples = [tuple(c) for c in configs2]
-
-    # Create a sorted list of unique configs
-    new_configs_tuples = sorted(list(set(conf1_tuples) | set(conf2_tuples)))
-
-    new_configs = [list(c) for c in new_configs_tuples]
+    new_configs, (map1, map2) = _merge_all_configs([configs1, configs2])
+    return new_configs, map1, map2
 
-    # Create mappings from old indices to new indices
-    map1 = {i: new_configs_tuples.index(conf) for i, conf in enumerate(conf1_tuples)}
-    map2 = {i: new_configs_tuples.index(conf) for i, conf in enumerate(conf2_tuples)}
 
-    return new_configs, map1, map2
+def _merge_all_configs(
+    configs_per_set: list[ConfigsArray],
+) -> tuple[ConfigsArray, list[dict[int, int]]]:
+    """Like `_merge_configs`, for any number of config lists. Configs are interned
+    by value, so this takes time linear in the number of configs (plus sorting)."""
+    new_configs_tuples = sorted({tuple(c) for configs in configs_per_set for c in configs})
+    new_index = {conf: i for i, conf in enumerate(new_configs_tuples)}
+    maps = [{i: new_index[tuple(c)] for i, c in enumerate(configs)} for configs in configs_per_set]
+    return [list(c) for c in new_configs_tuples], maps
 
 
 def _remap_file_info_configs(file_info, mapping):
@@ -596,6 +950,19 @@ def op_negate(covset: CovSet, compression: CompressionType) -> CovSet:
     return CovSet({"files": new_files, "configs": covset.configs})
 
 
+def _check_expanded_hashes(
+    fhash: Sha256Hex, info1: FileInfo, info2: FileInfo, mismatch_policy: MismatchPolicy
+):
+    exp_hash1 = info1.get("expandedhash")
+    exp_hash2 = info2.get("expandedhash")
+    if exp_hash1 and exp_hash2 and exp_hash1 != exp_hash2:
+        msg = f"Expanded hash mismatch for file hash {fhash[:10]}..."
+        if mismatch_policy == "error":
+            raise ValueError(msg)
+        elif mismatch_policy == "warn":
+            print(f"Warning: {msg}", file=sys.stderr)
+
+
 def set_operation(
     op: SetOperation,
     set1: CovSet,
@@ -620,14 +987,7 @@ def set_operation(
 
         if in1 and in2:
             assert info1 is not None and info2 is not None
-            exp_hash1 = info1.get("expandedhash")
-            exp_hash2 = info2.get("expandedhash")
-            if exp_hash1 and exp_hash2 and exp_hash1 != exp_hash2:
-                msg = f"Expanded hash mismatch for file hash {fhash[:10]}..."
-                if mismatch_policy == "error":
-                    raise ValueError(msg)
-                elif mismatch_policy == "warn":
-                    print(f"Warning: {msg}", file=sys.stderr)
+            _check_expanded_hashes(fhash, info1, info2, mismatch_policy)
 
         base_info = info1 if in1 else info2
         new_info = _remap_file_info_configs(base_info, map1 if in1 else map2)
@@ -673,6 +1033,79 @@ def set_operation(
     return CovSet({"files": new_files, "configs": new_configs})
 
 
+def nary_set_operation(
+    op: Literal["union", "intersection"],
+    sets: list[CovSet],
+    mismatch_policy: MismatchPolicy,
+    compression: CompressionType,
+) -> CovSet:
+    """
+    Computes the union or intersection of any number of CovSets in one pass.
+
+    The result is the same as folding `set_operation` over `sets` from the left,
+    but each input bitmap is decoded once and each output bitmap encoded once,
+    rather than encoding and decoding every intermediate result.
+    """
+    new_configs, maps = _merge_all_configs([s.configs for s in sets])
+
+    # For each file, its (set index, info) in each set that has it, in order.
+    occurrences: dict[Sha256Hex, list[tuple[int, FileInfo]]] = {}
+    for i, covset in enumerate(sets):
+        for fhash, info in covset.files.items():
+            occurrences.setdefault(fhash, []).append((i, info))
+
+    new_files: FilesDict = {}
+    for fhash, occs in occurrences.items():
+        if op == "intersection" and len(occs) < len(sets):
+            # A left fold compares each set's info with the first set's as long as
+            # the file is in every set so far.
+            for m in range(1, len(occs)):
+                if occs[m][0] != m:
+                    break
+                _check_expanded_hashes(fhash, occs[0][1], occs[m][1], mismatch_policy)
+            continue
+
+        first_set, base_info = occs[0]
+        for _i, info in occs[1:]:
+            _check_expanded_hashes(fhash, base_info, info, mismatch_policy)
+
+        new_info = _remap_file_info_configs(base_info, maps[first_set])
+        if len(occs) > 1:
+            if op == "union":
+                bitmap = 0
+                for _i, info in occs:
+                    bitmap |= decode_bitmap(info["encodedcoverage"])
+            else:
+                bitmap = decode_bitmap(base_info["encodedcoverage"])
+                for _i, info in occs[1:]:
+                    if not bitmap:
+                        break
+                    bitmap &= decode_bitmap(info["encodedcoverage"])
+            new_info["encodedcoverage"] = encode_bitmap(bitmap, compression)
+        new_files[fhash] = new_info
+
+    return CovSet({"files": new_files, "configs": new_configs})
+
+
+def _left_fold_operands(exp: list[Sexpr], op: str) -> list[Sexpr]:
+    """Returns the operands of `exp`, a variadic `op`, splicing in the operands of
+    `op`s nested as its first operand, so `(op (op a b) c d)` gives `[a, b, c, d]`."""
+    tails: list[list[Sexpr]] = []
+    inner: Sexpr = exp
+    while (
+        isinstance(inner, list)
+        and len(inner) >= 3
+        and isinstance(inner[0], str)
+        and inner[0].lower() == op
+    ):
+        tails.append(inner[2:])
+        inner = inner[1]
+    operands = [inner]
+    for tail in reversed(tails):
+        operands.extend(tail)
+    return operands
+
+
 def evaluate_exp(
     exp: Sexpr, mismatch_policy: MismatchPolicy, compression: CompressionType
 ) -> CovSet:
@@ -703,8 +1136,20 @@ def evaluate_exp(
         covset = evaluate_exp(exp[1], mismatch_policy, compression)
         return op_show(covset)
 
+    # Variadic operations, evaluated as a left fold.
+    if op in ("union", "intersection"):
+        if len(exp) < 3:
+            raise ValueError(f"Operation '{op}' requires at least 2 arguments, got {len(exp) - 1}")
+        sets = [
+            evaluate_exp(operand, mismatch_policy, compression)
+            for operand in _left_fold_operands(exp, op)
+        ]
+        return nary_set_operation(
+            cast(Literal["union", "intersection"], op), sets, mismatch_policy, compression
+        )
+
     # Binary operations
-    binary_ops = {"union", "intersection", "difference", "symmetric_diff"}
+    binary_ops = {"difference", "symmetric_diff"}
     if op in binary_ops:
         if len(exp) != 3:
             raise ValueError(f"Operation '{op}' requires 2 arguments, got {len(exp) - 1}")
@@ -817,23 +1262,112 @@ def do_eval(
         parsed_exp = parse_sexp(expression)
         result_covset = evaluate_exp(parsed_exp, on_mismatch, compression)
 
-        output_json = json.dumps(result_covset.to_json_dict(), indent=2)
-
         if output:
-            with open(output, "w", encoding="utf-8") as f:
-                f.write(output_json)
+            result_covset.save(output)
         else:
             if expression.strip().startswith("(cat ") or expression.strip().startswith("(show "):
                 return
-            print(output_json)
+            print(json.dumps(result_covset.to_json_dict(), indent=2))
 
     except (ValueError, FileNotFoundError, json.JSONDecodeError, TypeError) as e:
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
 
 
+def minimize_covsets(covsets: list[CovSet]) -> list[tuple[int, int]]:
+    """
+    Greedily picks covsets whose combined coverage equals that of all `covsets`:
+    at each step, the one covering the most lines not covered so far (the first,
+    on ties). Returns the picked covsets' indices, in the order picked, each with
+    the number of lines it newly covered.
+    """
+    bitmaps = [
+        {fhash: decode_bitmap(info["encodedcoverage"]) for fhash, info in cs.files.items()}
+        for cs in covsets
+    ]
+    covered: dict[Sha256Hex, int] = {}
+
+    def gain(i: int) -> int:
+        return sum((b & ~covered.get(fhash, 0)).bit_count() for fhash, b in bitmaps[i].items())
+
+    # Gains only shrink as lines get covered, so a stale gain is an upper bound,
+    # and a covset whose recomputed gain still beats every other bound is the best.
+    heap = [(-gain(i), i) for i in range(len(bitmaps))]
+    heapq.heapify(heap)
+    picked: list[tuple[int, int]] = []
+    while heap:
+        _stale, i = heapq.heappop(heap)
+        current = (-gain(i), i)
+        if current[0] == 0:
+            continue
+        if heap and current > heap[0]:
+            heapq.heappush(heap, current)
+            continue
+        picked.append((i, -current[0]))
+        for fhash, b in bitmaps[i].items():
+            covered[fhash] = covered.get(fhash, 0) | b
+    return picked
+
+
+def do_minimize(paths: list[str], output: Optional[str]) -> None:
+    """Prints (and optionally writes to `output`) a small subset of the covsets
+    at `paths` with the same combined coverage."""
+    try:
+        covsets = [CovSet.load(p) for p in paths]
+    except (ValueError, FileNotFoundError, json.JSONDecodeError, TypeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    picked = minimize_covsets(covsets)
+    total = 0
+    for i, new_lines in picked:
+        total += new_lines
+        print(f"{paths[i]}: +{new_lines} lines ({total} total)")
+    print(f"Selected {len(picked)} of {len(paths)} covsets, covering {total} lines.")
+    if output:
+        Path(output).write_text("".join(f"{paths[i]}\n" for i, _ in picked), encoding="utf-8")
+
+
+_SHARED_LIBRARY_NAME = re.compile(r"\.(so(\.\d+)*|dylib)$")
+
+
+def _is_shared_library(p: Path) -> bool:
+    return _SHARED_LIBRARY_NAME.search(p.name) is not None
+
+
 def _binaries_within(dir: Path) -> list[Path]:
-    return [p for p in dir.iterdir() if p.is_file() and os.access(p, os.X_OK)]
+    return [
+        p
+        for p in dir.iterdir()
+        if p.is_file() and os.access(p, os.X_OK) and not _is_shared_library(p)
+    ]
+
+
+def _shared_libraries_within(dir: Path) -> list[Path]:
+    return [p for p in dir.iterdir() if p.is_file() and _is_shared_library(p)]
+
+
+def coverage_objects(target_binary: Path, objects: list[str]) -> list[tuple[Path, bool]]:
+    """The binaries whose coverage to export: the target binary, the shared
+    libraries next to it, and the given `objects` (paths, or names of files next
+    to the target binary). Each is listed once, even if reached via symlinks,
+    along with whether it was asked for, rather than found next to the target."""
+    candidates = [(target_binary, True)]
+    candidates += [(p, False) for p in sorted(_shared_libraries_within(target_binary.parent))]
+    for obj in objects:
+        path = Path(obj)
+        if not path.exists() and (target_binary.parent / obj).exists():
+            path = target_binary.parent / obj
+        if not path.is_file():
+            raise ValueError(f"Coverage object not found: {obj}")
+        candidates.append((path, True))
+
+    found: dict[Path, tuple[Path, bool]] = {}
+    for path, requested in candidates:
+        key = path.resolve()
+        requested = requested or (key in found and found[key][1])
+        found[key] = (found[key][0] if key in found else path.absolute(), requested)
+    return list(found.values())
 
 
 def generate_via(
@@ -844,8 +1378,30 @@ def generate_via(
     html: bool,
     rust: bool,
     rest: list[str],
+    objects: list[str] = [],
+    jobs: int | None = None,
+    inputs: list[tuple[str, list[str]]] | None = None,
+    per_input_dir: Path | None = None,
 ) -> CompletedProcess:
+    """Runs the target binary and saves its coverage as a covset at `output`.
+
+    Coverage is collected from the target binary, the shared libraries next to
+    it, and any other `objects`, e.g. further executables the target runs.
+    Up to `jobs` threads (by default, one per CPU) merge the raw profiles and
+    export the objects' coverage.
+
+    If `inputs` (labels and arguments, see `read_inputs_file`) are given, the
+    target is run once per input, with `rest` followed by that input's
+    arguments, up to `jobs` runs at a time. `output` then has the combined
+    coverage of all runs, and if `per_input_dir` is given, it also gets a covset
+    for each input, named after the input's label.
+    """
+    import hermetic  # noqa: PLC0415
+    import repo_root  # noqa: PLC0415
+
     assert resultsdir.is_dir(), f"Results directory not found: {resultsdir}"
+    if inputs is not None and not inputs:
+        raise ValueError("No inputs to run the target with")
     # Resolve relative paths before changing working directory
     resultsdir = resultsdir.absolute()
 
@@ -906,47 +1462,48 @@ def generate_via(
         )
 
     target_binary = binaries_matching_target[0].as_posix()
+    objects_requested = coverage_objects(binaries_matching_target[0], objects)
+    jobs = jobs or os.cpu_count() or 1
+    tools = _CoverageTools(llvm_tools_path, objects_requested, jobs)
+
+    def export_covset(profdata: Path, tmp_path: Path) -> CovSetDict:
+        return tools.export_covset(
+            profdata,
+            tmp_path,
+            codebase_path=codebase_path,
+            only_within=[codebase_path, resultsdir],
+        )
 
     with tempfile.TemporaryDirectory() as tmpdir:
         tmp_path = Path(tmpdir)
-        # Use LLVM_PROFILE_FILE to direct coverage output and ensure
-        # shared libraries do not collide in their output files.
-        #    %p = process ID
-        #    %m = module name
-        cp = hermetic.run(
-            [target_binary, *rest],
-            env_ext={"LLVM_PROFILE_FILE": (tmp_path / "xj-%p-%m.profraw").as_posix()},
-            check=False,
-        )
-
-        raws = [p.as_posix() for p in tmp_path.glob("xj-*.profraw")]
-        hermetic.run(
-            [
-                llvm_tools_path / "llvm-profdata",
-                "merge",
-                "-sparse",
-                *raws,
-                "-o",
-                str(tmp_path / "merged.profdata"),
-            ],
-            check=True,
-        )
-
-        # --compilation-dir
-        covex = hermetic.run(
-            [
-                llvm_tools_path / "llvm-cov",
-                "export",
-                target_binary,
-                "-instr-profile",
-                str(tmp_path / "merged.profdata"),
-                "--skip-branches",
-                "--skip-expansions",
-                "--check-binary-ids",
-            ],
-            check=True,
-            capture_output=True,
-        )
+        if inputs is None:
+            # Use LLVM_PROFILE_FILE to direct coverage output and ensure
+            # shared libraries do not collide in their output files.
+            #    %p = process ID
+            #    %m = module name
+            cp = hermetic.run(
+                [target_binary, *rest],
+                env_ext={"LLVM_PROFILE_FILE": (tmp_path / "xj-%p-%m.profraw").as_posix()},
+                check=False,
+            )
+            tools.merge(list(tmp_path.glob("xj-*.profraw")), tmp_path / "merged.profdata")
+        else:
+            cp = _run_inputs(target_binary, rest, inputs, tmp_path, jobs)
+            input_profdatas = tools.merge_per_input(
+                [list((tmp_path / label).glob("xj-*.profraw")) for label, _args in inputs],
+                [tmp_path / label / "merged.profdata" for label, _args in inputs],
+            )
+            if per_input_dir is not None:
+                per_input_dir.mkdir(parents=True, exist_ok=True)
+                suffix = BINARY_SUFFIX if output.name.endswith(BINARY_SUFFIX) else ".json"
+                for (label, _args), profdata in zip(inputs, input_profdatas):
+                    if profdata is not None:
+                        CovSet(export_covset(profdata, tmp_path / label)).save(
+                            str(per_input_dir / f"{label}{suffix}")
+                        )
+            tools.merge([p for p in input_profdatas if p is not None], tmp_path / "merged.profdata")
+
+        covset_dict = export_covset(tmp_path / "merged.profdata", tmp_path)
 
         if html:
             covex_html = hermetic.run(
@@ -954,6 +1511,7 @@ def generate_via(
                     llvm_tools_path / "llvm-cov",
                     "show",
                     target_binary,
+                    *(f"-object={obj.as_posix()}" for obj in tools.exported_objects[1:]),
                     "-instr-profile",
                     str(tmp_path / "merged.profdata"),
                     "-show-line-counts-or-regions",
@@ -965,21 +1523,163 @@ def generate_via(
         else:
             covex_html = None
 
-    # TODO parse target info from serialized JSON to reconstruct
-    # the `-object` flags needed to get coverage for shared libraries
-
-    llvm_cov_json = json.loads(covex.stdout.decode("utf-8"))
-    covset_dict = llvm_profdata_to_CovSetDict(
-        llvm_cov_json,
-        codebase_path=codebase_path,
-        compression="zstd",
-        only_within=[codebase_path, resultsdir],
-    )
-    with open(output, "w", encoding="utf-8") as f:
-        json.dump(covset_dict, f, indent=2)
+    CovSet(covset_dict).save(str(output))
 
-    # output.with_suffix(".llvm.json").write_bytes(covex.stdout)
     if covex_html:
         output.with_suffix(".llvm.html").write_bytes(covex_html)
 
     return cp
+
+
+def read_inputs_file(path: Path) -> list[tuple[str, list[str]]]:
+    """Reads a file listing the arguments for each run of a target, one
+    (shell-quoted) line per run. Returns a label for each non-blank line,
+    derived from its line number, along with the arguments."""
+    inputs = []
+    for lineno, line in enumerate(path.read_text(encoding="utf-8").splitlines(), start=1):
+        if line.strip():
+            inputs.append((f"line-{lineno}", shlex.split(line)))
+    if not inputs:
+        raise ValueError(f"Inputs file lists no inputs: {path}")
+    return inputs
+
+
+def _run_inputs(
+    target_binary: str,
+    rest: list[str],
+    inputs: list[tuple[str, list[str]]],
+    tmp_path: Path,
+    jobs: int,
+) -> CompletedProcess:
+    """Runs the target once per input, up to `jobs` at a time, each writing its
+    profiles to its own directory. Output is replayed in input order. Returns
+    the first failing run, or the last run if none failed."""
+    import hermetic  # noqa: PLC0415
+
+    for label, _args in inputs:
+        (tmp_path / label).mkdir()
+    cps = hermetic.run_many(
+        [([target_binary, *rest, *args], Path.cwd()) for _label, args in inputs],
+        jobs=jobs,
+        env_exts=[
+            {"LLVM_PROFILE_FILE": (tmp_path / label / "xj-%p-%m.profraw").as_posix()}
+            for label, _args in inputs
+        ],
+    )
+    for cp in cps:
+        sys.stdout.buffer.write(cp.stdout)
+        sys.stderr.buffer.write(cp.stderr)
+    sys.stdout.flush()
+    return next((cp for cp in cps if cp.returncode != 0), cps[-1])
+
+
+class _CoverageTools:
+    """Runs `llvm-profdata` and `llvm-cov` for a set of coverage objects."""
+
+    def __init__(
+        self, llvm_tools_path: Path, objects_requested: list[tuple[Path, bool]], jobs: int
+    ):
+        self.llvm_tools_path = llvm_tools_path
+        self.objects_requested = objects_requested
+        self.jobs = jobs
+        self.exported_objects: list[Path] = []
+        """The objects whose coverage was exported by the latest `export_covset`."""
+
+    def _merge_cmd(self, raws: list[Path], profdata: Path, threads: int) -> list[str]:
+        return [
+            str(self.llvm_tools_path / "llvm-profdata"),
+            "merge",
+            "-sparse",
+            f"--num-threads={threads}",
+            *(p.as_posix() for p in raws),
+            "-o",
+            str(profdata),
+        ]
+
+    def merge(self, raws: list[Path], profdata: Path):
+        import hermetic  # noqa: PLC0415
+
+        hermetic.run(self._merge_cmd(raws, profdata, self.jobs), check=True)
+
+    def merge_per_input(
+        self, raws_per_input: list[list[Path]], profdatas: list[Path]
+    ) -> list[Path | None]:
+        """Merges each input's raw profiles, concurrently. Inputs that produced no
+        profiles (e.g. because the target crashed) have no profile data."""
+        import hermetic  # noqa: PLC0415
+
+        todo = [i for i, raws in enumerate(raws_per_input) if raws]
+        cps = hermetic.run_many(
+            [
+                (self._merge_cmd(raws_per_input[i], profdatas[i], 1), profdatas[i].parent)
+                for i in todo
+            ],
+            jobs=self.jobs,
+        )
+        for cp in cps:
+            sys.stderr.buffer.write(cp.stderr)
+            cp.check_returncode()
+        merged: list[Path | None] = [None] * len(profdatas)
+        for i in todo:
+            merged[i] = profdatas[i]
+        return merged
+
+    def export_covset(
+        self,
+        profdata: Path,
+        tmp_path: Path,
+        *,
+        codebase_path: Path,
+        only_within: list[Path],
+    ) -> CovSetDict:
+        """Exports the coverage of each object concurrently, and combines them."""
+        import hermetic  # noqa: PLC0415
+
+        # The exports can be hundreds of megabytes for large binaries; they go to
+        # files so that they can be converted as they're read, rather than all at once.
+        export_paths = [tmp_path / f"export-{i}.json" for i in range(len(self.objects_requested))]
+        export_cps = hermetic.run_many(
+            [
+                (
+                    [
+                        str(self.llvm_tools_path / "llvm-cov"),
+                        "export",
+                        obj.as_posix(),
+                        "-instr-profile",
+                        str(profdata),
+                        "--skip-branches",
+                        "--skip-expansions",
+                        "--skip-functions",
+                        "--check-binary-ids",
+                    ],
+                    tmp_path,
+                )
+                for obj, _requested in self.objects_requested
+            ],
+            jobs=self.jobs,
+            stdout_paths=export_paths,
+        )
+        exported: dict[Path, Path] = {}  # object -> its export
+        for (obj, requested), export_cp, export_path in zip(
+            self.objects_requested, export_cps, export_paths
+        ):
+            sys.stderr.buffer.write(export_cp.stderr)
+            if export_cp.returncode == 0:
+                exported[obj] = export_path
+            elif requested:
+                export_cp.check_returncode()
+            else:
+                # E.g. an uninstrumented library, or one the target never loaded.
+                print(f"Note: no coverage exported for {obj.name}", file=sys.stderr)
+        self.exported_objects = list(exported)
+
+        with contextlib.ExitStack() as stack:
+            covset_dict = llvm_cov_export_streams_to_CovSetDict(
+                [stack.enter_context(open(p, "r", encoding="utf-8")) for p in exported.values()],
+                codebase_path=codebase_path,
+                compression="zstd",
+                only_within=only_within,
+            )
+        for export_path in export_paths:
+            export_path.unlink(missing_ok=True)
+        return covset_dict
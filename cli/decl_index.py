@@ -0,0 +1,228 @@
+"""Persistent, content-addressed index of the top-level declarations in each TU.
+
+Parsing is the dominant cost of collecting declarations, and the same TUs get
+parsed again and again: by different passes, and by every re-translation of the
+same codebase. This index records, for each TU, the facts that
+`translation_preparation.collect_decls_by_rel_tu` consumes, keyed by a hash of the
+TU's contents and (codebase-relative) compile arguments. Each entry also lists
+the files the TU included along with their hashes; an entry is only reused when
+all of them are unchanged.
+
+Paths within the codebase are stored relative to it, so entries can be shared
+between the `c_NN_*` preparation directories and between results directories.
+Declaration names can embed absolute paths too (libclang spells anonymous records
+like `struct (unnamed at /path/to/codebase/a.c:1:1)`); within stored names, the
+codebase directory is replaced by a placeholder, and restored upon lookup.
+"""
+
+import dataclasses
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Callable
+
+from clang.cindex import TranslationUnit  # type: ignore
+
+import c_refact
+import compilation_database
+import repo_root
+from constants import WANT
+from tenj_types import FilePathStr, RelativeFilePathStr
+
+# Bump when the shape or meaning of the stored facts changes.
+SCHEMA_VERSION = 2
+
+# Entries not used for this long are dropped when the index is opened.
+MAX_UNUSED_AGE_S = 30 * 24 * 60 * 60
+
+CODEBASE_PLACEHOLDER = "<xj-codebase>"
+
+
+@dataclasses.dataclass(frozen=True)
+class DeclFact:
+    kind: str
+    """Name of the cursor's `CursorKind`, e.g. `FUNCTION_DECL`."""
+    spelling: str
+    quss: str
+    rel_file: RelativeFilePathStr
+    start: int
+    end: int
+    macro_adjusted_end: int
+    """`end`, extended over a macro instantiation that ends the declaration."""
+    signature_end: int | None
+    """For function definitions, the end of the signature, excluding the body."""
+    is_definition: bool
+    linkage: str
+    """Name of the cursor's `LinkageKind`."""
+
+
+@dataclasses.dataclass
+class TUDeclFacts:
+    decls: list[DeclFact]
+    deps: list[FilePathStr]
+    """Files included by the TU; codebase-relative where possible, otherwise absolute."""
+
+
+def index_path() -> Path:
+    return repo_root.localdir() / "xj-decl-index.sqlite3"
+
+
+def should_use_decl_index() -> bool:
+    return os.environ.get("XJ_DECL_INDEX", "1") != "0"
+
+
+def sha256_of_file(path: Path) -> str | None:
+    try:
+        with open(path, "rb") as f:
+            return hashlib.file_digest(f, "sha256").hexdigest()
+    except OSError:
+        return None
+
+
+class DeclIndex:
+    def __init__(self, db_path: Path, codebase: Path):
+        self._codebase = codebase
+        self._file_hashes: dict[FilePathStr, str | None] = {}
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Parallel translations (e.g. under pytest-xdist) share the index;
+        # WAL mode lets readers proceed while another process writes.
+        self._db = sqlite3.connect(db_path, timeout=60)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        with self._db:
+            self._db.execute(
+                """CREATE TABLE IF NOT EXISTS tu_decls (
+                    key TEXT NOT NULL,
+                    deps TEXT NOT NULL,
+                    facts TEXT NOT NULL,
+                    last_used REAL NOT NULL
+                )"""
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS tu_decls_key ON tu_decls (key)")
+            self._db.execute(
+                "DELETE FROM tu_decls WHERE last_used < ?", (time.time() - MAX_UNUSED_AGE_S,)
+            )
+
+    def close(self):
+        self._db.close()
+
+    def _abs(self, path: FilePathStr) -> Path:
+        return self._codebase / path
+
+    def _hash(self, path: FilePathStr) -> str | None:
+        if path not in self._file_hashes:
+            self._file_hashes[path] = sha256_of_file(self._abs(path))
+        return self._file_hashes[path]
+
+    def _abstract_codebase(self, fact: DeclFact) -> DeclFact:
+        prefix = self._codebase.as_posix() + "/"
+        return dataclasses.replace(
+            fact,
+            spelling=fact.spelling.replace(prefix, CODEBASE_PLACEHOLDER + "/"),
+            quss=fact.quss.replace(prefix, CODEBASE_PLACEHOLDER + "/"),
+        )
+
+    def _concretize_codebase(self, fact: DeclFact) -> DeclFact:
+        prefix = self._codebase.as_posix() + "/"
+        return dataclasses.replace(
+            fact,
+            spelling=fact.spelling.replace(CODEBASE_PLACEHOLDER + "/", prefix),
+            quss=fact.quss.replace(CODEBASE_PLACEHOLDER + "/", prefix),
+        )
+
+    def key_for(self, job: c_refact.TUParseJob) -> str | None:
+        """Returns None for TUs that can't be indexed, e.g. because they are not
+        within the codebase or can't be read."""
+        if not Path(job.abs_path).is_relative_to(self._codebase):
+            return None
+        main_hash = sha256_of_file(Path(job.srcfile))
+        if main_hash is None:
+            return None
+        codebase = self._codebase.as_posix()
+        key_material = [
+            SCHEMA_VERSION,
+            WANT["10j-llvm"],
+            Path(job.abs_path).relative_to(self._codebase).as_posix(),
+            main_hash,
+            [arg.replace(codebase, CODEBASE_PLACEHOLDER) for arg in job.args],
+            job.in_dir.replace(codebase, CODEBASE_PLACEHOLDER),
+        ]
+        return hashlib.sha256(json.dumps(key_material).encode("utf-8")).hexdigest()
+
+    def lookup(self, key: str) -> TUDeclFacts | None:
+        rows = self._db.execute(
+            "SELECT rowid, deps, facts FROM tu_decls WHERE key = ? ORDER BY last_used DESC",
+            (key,),
+        ).fetchall()
+        for rowid, deps_json, facts_json in rows:
+            deps: dict[FilePathStr, str] = json.loads(deps_json)
+            if all(self._hash(path) == digest for path, digest in deps.items()):
+                with self._db:
+                    self._db.execute(
+                        "UPDATE tu_decls SET last_used = ? WHERE rowid = ?", (time.time(), rowid)
+                    )
+                raw = json.loads(facts_json)
+                return TUDeclFacts(
+                    decls=[self._concretize_codebase(DeclFact(**d)) for d in raw["decls"]],
+                    deps=raw["deps"],
+                )
+        return None
+
+    def store(self, key: str, facts: TUDeclFacts):
+        deps = {path: self._hash(path) for path in facts.deps}
+        if any(digest is None for digest in deps.values()):
+            return  # Can't validate this entry later, so don't bother recording it.
+        with self._db:
+            self._db.execute(
+                "INSERT INTO tu_decls (key, deps, facts, last_used) VALUES (?, ?, ?, ?)",
+                (
+                    key,
+                    json.dumps(deps, sort_keys=True),
+                    json.dumps({
+                        "decls": [
+                            dataclasses.asdict(self._abstract_codebase(d)) for d in facts.decls
+                        ],
+                        "deps": facts.deps,
+                    }),
+                    time.time(),
+                ),
+            )
+
+
+def collect_tu_decl_facts(
+    codebase: Path,
+    compdb: compilation_database.CompileCommands,
+    extract: Callable[[TranslationUnit], TUDeclFacts],
+    jobs: int = 1,
+) -> dict[FilePathStr, TUDeclFacts]:
+    """Returns `extract`ed facts for each TU in `compdb`, keyed by absolute TU path,
+    parsing only those TUs whose facts are not already in the index."""
+    parse_jobs = c_refact.tu_parse_jobs(compdb)
+    if not should_use_decl_index():
+        results = c_refact.map_tu_parse_jobs(parse_jobs, extract, jobs)
+        return {job.abs_path: r for job, r in zip(parse_jobs, results)}
+
+    index = DeclIndex(index_path(), codebase)
+    try:
+        facts_by_tu: dict[FilePathStr, TUDeclFacts] = {}
+        keys: dict[FilePathStr, str | None] = {}
+        for job in parse_jobs:
+            key = keys[job.abs_path] = index.key_for(job)
+            cached = index.lookup(key) if key is not None else None
+            if cached is not None:
+                facts_by_tu[job.abs_path] = cached
+
+        to_parse = [job for job in parse_jobs if job.abs_path not in facts_by_tu]
+        print(f"Declaration index: {len(facts_by_tu)} of {len(parse_jobs)} TUs already indexed")
+        for job, facts in zip(to_parse, c_refact.map_tu_parse_jobs(to_parse, extract, jobs)):
+            facts_by_tu[job.abs_path] = facts
+            key = keys[job.abs_path]
+            if key is not None:
+                index.store(key, facts)
+    finally:
+        index.close()
+
+    # Preserve the compdb's TU order regardless of which TUs came from the index.
+    return {job.abs_path: facts_by_tu[job.abs_path] for job in parse_jobs}
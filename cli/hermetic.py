@@ -3,6 +3,7 @@ import subprocess
 import shlex
 import shutil
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import tomllib
 import os
@@ -107,7 +108,33 @@ def xj_localize_errno_build_dir(localdir: Path) -> Path:
     return localdir / "_build_localize_errno"
 
 
+# The most recent environment built by `mk_env_for` without `env_ext`,
+# along with what it was built from.
+_env_memo: dict[tuple, dict[str, str]] = {}
+
+
 def mk_env_for(localdir: Path, with_tenjin_deps=True, env_ext=None, **kwargs) -> dict[str, str]:
+    if env_ext or "env" in kwargs:
+        return _mk_env_for(localdir, with_tenjin_deps, env_ext, **kwargs)
+
+    # Building the environment takes a few hundred microseconds, which adds up over
+    # the thousands of commands in a translation, so reuse it while nothing it
+    # depends on has changed. (Snapshotting os.environ is much cheaper than that.)
+    key = (
+        localdir,
+        with_tenjin_deps,
+        provisioning.HAVE.all_verified,
+        tuple(os.environ.items()),
+    )
+    env = _env_memo.get(key)
+    if env is None:
+        env = _mk_env_for(localdir, with_tenjin_deps, env_ext, **kwargs)
+        _env_memo.clear()
+        _env_memo[key] = env
+    return dict(env)  # Callers may modify their copy.
+
+
+def _mk_env_for(localdir: Path, with_tenjin_deps=True, env_ext=None, **kwargs) -> dict[str, str]:
     if isinstance(env_ext, dict) and env_ext.get("XJ_USE_LLVM14", "") == "1":
         llvm_root = xj_llvm14_root(localdir)
     else:
@@ -177,6 +204,9 @@ def mk_env_for(localdir: Path, with_tenjin_deps=True, env_ext=None, **kwargs) ->
             ld_lib_paths.append(existing_ld_lib_path)
         env["LD_LIBRARY_PATH"] = os.pathsep.join(ld_lib_paths)
 
+    if provisioning.HAVE.all_verified:
+        env[provisioning.PROVISIONED_ENV_VAR] = provisioning.provisioned_marker()
+
     return env
 
 
@@ -228,9 +258,14 @@ def shellize(cmd: RunSpec) -> str:
 
 
 def common_helper_for_run(cmd: RunSpec, cmd_cwd: Path | str | None = None):
-    if provisioning.HAVE.provisioning_depth == 0 and not running_in_ci():
+    if (
+        provisioning.HAVE.provisioning_depth == 0
+        and not running_in_ci()
+        and not provisioning.provisioning_verified()
+    ):
         # CI is careful to provision what it needs; doing more here
         # would merely slow down the CI run with unnecessary work.
+        # Elsewhere, once per process (tree) suffices.
         provisioning.provision_desires("all")
 
     def print_cmd_only():
@@ -281,6 +316,43 @@ def run(
     )
 
 
+def run_many(
+    specs: Sequence[tuple[RunSpec, Path | str]],
+    jobs: int = 1,
+    with_tenjin_deps=True,
+    stdout_paths: Sequence[Path] | None = None,
+    env_exts: Sequence[dict[str, str]] | None = None,
+) -> list[subprocess.CompletedProcess]:
+    """Like `run` for each `(cmd, cwd)`, but running up to `jobs` commands at a time.
+
+    Output is captured rather than interleaved. Results are in the same
+    order as `specs` and are not checked; callers report them in order.
+    If `stdout_paths` is given, each command's stdout is written to the
+    corresponding file instead of being captured. If `env_exts` is given,
+    each command's environment is extended with the corresponding dict.
+    """
+    # Provisioning checks are not safe to run concurrently, so they
+    # (and XJ_SHOW_CMDS echoing) happen up front, in order.
+    for cmd, cwd in specs:
+        common_helper_for_run(cmd, cwd)
+    env = mk_env_for(repo_root.localdir(), with_tenjin_deps=with_tenjin_deps)
+
+    def run_one(i: int) -> subprocess.CompletedProcess:
+        cmd, cwd = specs[i]
+        env_i = env if env_exts is None else {**env, **env_exts[i]}
+        if stdout_paths is None:
+            return subprocess.run(cmd, check=False, cwd=cwd, env=env_i, capture_output=True)
+        with open(stdout_paths[i], "wb") as stdout:
+            return subprocess.run(
+                cmd, check=False, cwd=cwd, env=env_i, stdout=stdout, stderr=subprocess.PIPE
+            )
+
+    if jobs <= 1 or len(specs) <= 1:
+        return [run_one(i) for i in range(len(specs))]
+    with ThreadPoolExecutor(max_workers=min(jobs, len(specs))) as executor:
+        return list(executor.map(run_one, range(len(specs))))
+
+
 def run_shell_cmd(
     cmd: RunSpec, check=False, with_tenjin_deps=True, env_ext=None, **kwargs
 ) -> subprocess.CompletedProcess:
@@ -450,6 +522,23 @@ def run_cargo_on_translated_code(
     )
 
 
+def cargo_invocation_for_translated_code(
+    args: Sequence[str], cwd: Path
+) -> tuple[list[str], dict[str, str]]:
+    """The command and environment that `run_cargo_on_translated_code` would use,
+    for callers that run cargo themselves, e.g. from several threads at once.
+    Provisioning checks happen here rather than when the command runs."""
+    provisioning.want_10j_rust_toolchains()
+    rustflags = os.environ.get("RUSTFLAGS_FOR_TRANSLATED_CODE", "")
+    cmd = ["cargo", *implicit_cargo_toolchain_arg(cwd, args), *args]
+    common_helper_for_run(cmd, cwd)
+    env = mk_env_for(
+        repo_root.localdir(),
+        env_ext={"RUSTFLAGS": rustflags, **cargo_encoded_rustflags_env_ext(cwd, rustflags)},
+    )
+    return cmd, env
+
+
 def run_cargo_in(
     args: Sequence[str],
     cwd: Path,
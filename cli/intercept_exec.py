@@ -2,8 +2,9 @@ import os
 import hashlib
 import json
 import subprocess
+import sys
 from pathlib import Path
-from typing import Literal, TypedDict
+from typing import Literal, TypedDict, cast
 
 type InterceptedBuildType = Literal["cc", "ld", "ar"]
 
@@ -42,6 +43,16 @@ def resolve_sans_intercept(name: str) -> Path:
     raise FileNotFoundError(f"Could not find non-intercepted command for {name}")
 
 
+def fast_path_env_ext() -> dict[str, str]:
+    """Environment for builds whose compiler/linker calls we intercept.
+
+    Naming the current interpreter lets the cc-ld-intercept wrappers run
+    this module directly instead of going through `10j intercept-exec`.
+    """
+    # XREF:XJ_INTERCEPT_PYTHON in cli/sh/cc-ld-intercept/cc
+    return {"XJ_INTERCEPT_PYTHON": sys.executable}
+
+
 # Integrated functionality from c2rust/scripts/cc-wrappers/common.py
 # which does not require Python to be installed outside the hermetic environment.
 def intercept_exec(build_type: InterceptedBuildType, run_as: Path, args: list[str]) -> int:
@@ -86,3 +97,28 @@ def intercept_exec(build_type: InterceptedBuildType, run_as: Path, args: list[st
         arguments.insert(1, "-B" + script_dir)
 
     return subprocess.call(arguments)
+
+
+def main(argv: list[str]) -> int:
+    """Entry point for the cc-ld-intercept wrappers' fast path.
+
+    `argv` is `[category, run_as, *args]`, mirroring `10j intercept-exec`.
+    This deliberately depends only on the standard library, so that it can
+    be run with `python -S` without paying for the imports done by main.py.
+    """
+    if len(argv) < 2:
+        print("Error: Not enough arguments for intercept-exec", file=sys.stderr)
+        return 1
+
+    category, run_as, args = argv[0], argv[1], argv[2:]
+    assert category in ("cc", "ld", "ar")
+    if len(args) < 2:
+        # As with `10j intercept-exec`, a wrapper invoked with at most one
+        # flag (like `--version`) is passed through without interception.
+        real_cmd = resolve_sans_intercept(Path(run_as).name)
+        return subprocess.call([str(real_cmd), *args])
+    return intercept_exec(cast(InterceptedBuildType, category), Path(run_as), args)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,30 +1,29 @@
 import subprocess
 import sys
 import os
-import argparse
 from pathlib import Path
 import shutil
 import tempfile
-import textwrap
-import json
-from typing import Literal, cast
+from typing import TYPE_CHECKING, Literal, cast
 
 import click
-import requests
 
 import repo_root
-import provisioning
-import hermetic
-import translation
-import translation_multi_config
-import cli_subcommands
-import covset
-from tenj_types import ResolvedPath, style_path, style_flag, UserFacingError
-from translation_types import TranslationFlags
+
+if TYPE_CHECKING:
+    import argparse
+
+#                   COMMENTARY(lazy-subcommand-imports)
+# Every `10j` invocation, including the per-compiler-call `10j intercept-exec`,
+# imports this module, so it imports only what every command needs. Each command
+# imports the rest of what it needs itself: importing everything up front (in
+# particular `translation` and `requests`) would take most of 200 ms.
+# tests/test_cli_startup.py keeps an eye on this.
 
 
 def do_check_repo_file_sizes() -> bool:
     """Returns True if the check passed, False otherwise"""
+    import hermetic  # noqa: PLC0415
 
     max_file_size = 987654
 
@@ -130,7 +129,8 @@ def cli():
     "--jobs",
     default=1,
     show_default=True,
-    help="Number of parallel translations when running multi-config mode.",
+    help="Number of parallel jobs: translations in multi-config mode, "
+    "per-translation-unit work otherwise.",
 )
 @click.option(
     "--cmake-presets",
@@ -153,6 +153,12 @@ def translate(
     jobs,
     cmake_presets,
 ):
+    import cli_subcommands  # noqa: PLC0415
+    import translation  # noqa: PLC0415
+    import translation_multi_config  # noqa: PLC0415
+    from tenj_types import ResolvedPath, style_path, style_flag, UserFacingError  # noqa: PLC0415
+    from translation_types import TranslationFlags  # noqa: PLC0415
+
     root = repo_root.find_repo_root_dir_Path()
     cli_subcommands.do_build_star()
 
@@ -206,6 +212,7 @@ def translate(
         resolved_do_not_refactor,
         prebuildcmd,
         buildcmd,
+        jobs,
     )
 
     config_path = None
@@ -252,6 +259,9 @@ def translate(
 @cli.command()
 @click.argument("c_file_or_codebase")
 def translate_and_run(c_file_or_codebase):
+    import cli_subcommands  # noqa: PLC0415
+    import hermetic  # noqa: PLC0415
+
     root = repo_root.find_repo_root_dir_Path()
     cli_subcommands.do_build_star(capture_output=True)
 
@@ -285,11 +295,15 @@ def translate_and_run(c_file_or_codebase):
 
 @cli.command()
 def fmt_py():
+    import cli_subcommands  # noqa: PLC0415
+
     cli_subcommands.do_fmt_py()
 
 
 @cli.command()
 def check_py():
+    import cli_subcommands  # noqa: PLC0415
+
     try:
         cli_subcommands.do_check_py()
     except subprocess.CalledProcessError:
@@ -299,16 +313,22 @@ def check_py():
 @cli.command()
 def fix_rs():
     """Run `cargo clippy --fix` (+ flags) on our Rust code"""
+    import cli_subcommands  # noqa: PLC0415
+
     cli_subcommands.do_fix_rs()
 
 
 @cli.command()
 def fmt_rs():
+    import cli_subcommands  # noqa: PLC0415
+
     cli_subcommands.do_fmt_rs()
 
 
 @cli.command()
 def build_rs():
+    import cli_subcommands  # noqa: PLC0415
+
     try:
         cli_subcommands.do_build_rs(repo_root.find_repo_root_dir_Path())
     except subprocess.CalledProcessError:
@@ -317,6 +337,8 @@ def build_rs():
 
 @cli.command()
 def build_star():
+    import cli_subcommands  # noqa: PLC0415
+
     try:
         cli_subcommands.do_build_star()
     except subprocess.CalledProcessError:
@@ -325,6 +347,8 @@ def build_star():
 
 @cli.command()
 def check_rs():
+    import cli_subcommands  # noqa: PLC0415
+
     try:
         cli_subcommands.do_check_rs()
     except subprocess.CalledProcessError:
@@ -333,6 +357,8 @@ def check_rs():
 
 @cli.command()
 def test_unit_rs():
+    import cli_subcommands  # noqa: PLC0415
+
     try:
         cli_subcommands.do_test_unit_rs()
     except subprocess.CalledProcessError:
@@ -342,6 +368,8 @@ def test_unit_rs():
 @cli.command()
 def check_star():
     """Runs all code-level checks (formatting and linting)"""
+    import cli_subcommands  # noqa: PLC0415
+
     # The Click documentation discourages invoking one command from
     # another, and doing so is quite awkward.
     # We instead implement functionality in the do_*() functions
@@ -399,6 +427,8 @@ def exec():
 @cli.command()
 @click.argument("args", nargs=-1)
 def run_c(args: list[str]):
+    import hermetic  # noqa: PLC0415
+
     if not args:
         click.echo("Error: No input file specified", err=True)
         sys.exit(1)
@@ -430,9 +460,29 @@ def run_c(args: list[str]):
 @cli.command()
 @click.argument("wanted", required=False, default="all")
 def provision(wanted: str):
+    import provisioning  # noqa: PLC0415
+
     provisioning.provision_desires(wanted)
 
 
+@cli.command()
+@click.argument("mirror_dir", type=click.Path(file_okay=False, dir_okay=True, path_type=Path))
+@click.option(
+    "--for",
+    "wanted",
+    type=click.Choice(["all", "llvm", "ocaml", "rust"]),
+    default="all",
+    show_default=True,
+    help="Which provisioning target to mirror the artifacts of.",
+)
+def populate_artifact_mirror(mirror_dir: Path, wanted: str):
+    """Download the artifacts that `10j provision` fetches (for this platform)
+    into MIRROR_DIR, for use via XJ_ARTIFACT_MIRROR."""
+    import provisioning  # noqa: PLC0415
+
+    provisioning.populate_artifact_mirror(mirror_dir, wanted)
+
+
 @cli.command()
 @click.argument(
     "directory", type=click.Path(exists=True, file_okay=False, dir_okay=True, path_type=Path)
@@ -442,6 +492,10 @@ def provision(wanted: str):
 )
 def upload_results(directory: Path, host_port: str):
     """Upload translation_metadata.json and translation_snapshot.json to a Tenjin dashboard."""
+    import json  # noqa: PLC0415
+    import textwrap  # noqa: PLC0415
+
+    import requests  # noqa: PLC0415
 
     # Check if required files exist
     metadata_file = directory / "translation_metadata.json"
@@ -543,6 +597,7 @@ def synthesize_compilation_database_for(file: Path):
 )
 def covset_eval(expression: str, output: str | None, on_mismatch: str, compression: str):
     """Evaluate a covset s-expr."""
+    import covset  # noqa: PLC0415
 
     try:
         covset.do_eval(
@@ -555,14 +610,33 @@ def covset_eval(expression: str, output: str | None, on_mismatch: str, compressi
         raise click.exceptions.Exit(code=int(e.code) if e.code is not None else 1)
 
 
+@cli.command()
+@click.argument("covsets", nargs=-1, required=True)
+@click.option(
+    "-o",
+    "--output",
+    help="Also write the selected covset paths to this file, one per line.",
+)
+def covset_minimize(covsets: tuple[str, ...], output: str | None):
+    """Select a small subset of covsets with the same combined coverage."""
+    import covset  # noqa: PLC0415
+
+    try:
+        covset.do_minimize(list(covsets), output)
+    except SystemExit as e:
+        raise click.exceptions.Exit(code=int(e.code) if e.code is not None else 1)
+
+
 @cli.command()
 def covset_gen():
     """Runs a C or Rust program to get coverage data"""
     pass  # placeholder command
 
 
-#   10j covset-gen [--target ...] --codebase ... --resultsdir ... --output ... [EXTRA...]
-def parse_covset_gen_args(argv: list[str]) -> tuple[argparse.Namespace, list[str]]:
+#   10j covset-gen [--target ...] [--object ...] --codebase ... --resultsdir ... --output ... [EXTRA...]
+def parse_covset_gen_args(argv: list[str]) -> tuple["argparse.Namespace", list[str]]:
+    import argparse  # noqa: PLC0415
+
     parser = argparse.ArgumentParser(prog="10j covset-gen")
     parser.add_argument("--target", required=False)
     parser.add_argument("--codebase", required=True)
@@ -572,6 +646,27 @@ def parse_covset_gen_args(argv: list[str]) -> tuple[argparse.Namespace, list[str
     parser.add_argument(
         "--rust", action="store_true", help="Run translated Rust code instead of C code"
     )
+    parser.add_argument(
+        "--object",
+        action="append",
+        default=[],
+        help="Another binary or shared library to collect coverage for (repeatable)",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Threads for running inputs, merging profiles, and exporting coverage "
+        "(default: CPU count)",
+    )
+    parser.add_argument(
+        "--inputs",
+        help="File with the target's arguments for each run, one shell-quoted line per run",
+    )
+    parser.add_argument(
+        "--per-input-dir",
+        help="With --inputs, also write a covset for each input to this directory",
+    )
     ns, rest = parser.parse_known_args(argv)
     if rest and rest[0] == "--":
         rest = rest[1:]
@@ -591,14 +686,25 @@ if __name__ == "__main__":
     # placeholders are effectively "hidden" commands.
     if len(sys.argv) > 1:
         if sys.argv[1] == "opam":
+            import hermetic
+
             sys.exit(hermetic.run_opam(sys.argv[2:]).returncode)
         if sys.argv[1] == "dune":
+            import hermetic
+
             sys.exit(hermetic.run_opam(["exec", "--", "dune", *sys.argv[2:]]).returncode)
         if sys.argv[1] == "cargo":
+            import hermetic
+
             sys.exit(hermetic.run_cargo_in(sys.argv[2:], cwd=Path.cwd(), check=False).returncode)
         if sys.argv[1] == "clang":
+            import hermetic
+
             sys.exit(hermetic.run_shell_cmd(sys.argv[1:]).returncode)
         if sys.argv[1] == "pytest":
+            import cli_subcommands
+            import hermetic
+
             try:
                 cli_subcommands.do_build_star()  # Build once, before concurrent tests start
                 # When pytest executes from outside of the repo, e.g. because `10j` is on the PATH,
@@ -608,12 +714,18 @@ if __name__ == "__main__":
             except KeyboardInterrupt:
                 sys.exit(130)  # Suppress traceback and use conventional exit code for Ctrl-C.
         if sys.argv[1] == "chkc":
+            import hermetic
+
             sys.exit(hermetic.run_chkc(sys.argv[2:]).returncode)
         if sys.argv[1] == "exec":
+            import hermetic
+
             sys.exit(hermetic.run_shell_cmd(sys.argv[2:]).returncode)
         if sys.argv[1] == "true":
             sys.exit(0)
         if sys.argv[1] == "uv":
+            import hermetic
+
             try:
                 hermetic.check_call_uv(sys.argv[2:], cwd=Path.cwd())
             except Exception as e:
@@ -622,6 +734,8 @@ if __name__ == "__main__":
             sys.exit(0)
 
         if sys.argv[1] == "clang-ast-xml":
+            import hermetic
+
             sys.exit(
                 hermetic.run_shell_cmd([
                     "clang",
@@ -639,6 +753,7 @@ if __name__ == "__main__":
             category = sys.argv[2]
             run_as = sys.argv[3]
             assert category in ("cc", "ld", "ar")
+            import hermetic
             import intercept_exec
 
             if len(sys.argv) < 6:
@@ -673,6 +788,7 @@ if __name__ == "__main__":
                 click.echo("Usage: 10j ta3-test-runner TEST_CORPUS_DIR [FLAGS...]", err=True)
                 sys.exit(1)
             import ta3_test_runner as _ta3
+            from tenj_types import UserFacingError
 
             try:
                 _ta3.run(Path(sys.argv[2]), sys.argv[3:])
@@ -681,6 +797,8 @@ if __name__ == "__main__":
                 click.echo(f"Error: {e}", err=True)
                 sys.exit(1)
         if sys.argv[1] == "covset-gen":
+            import covset
+
             ns, rest = parse_covset_gen_args(sys.argv[2:])
             try:
                 cp = covset.generate_via(
@@ -691,6 +809,10 @@ if __name__ == "__main__":
                     ns.html,
                     ns.rust,
                     rest,
+                    objects=ns.object,
+                    jobs=ns.jobs,
+                    inputs=covset.read_inputs_file(Path(ns.inputs)) if ns.inputs else None,
+                    per_input_dir=Path(ns.per_input_dir) if ns.per_input_dir else None,
                 )
             except SystemExit as e:
                 raise click.exceptions.Exit(code=int(e.code) if e.code is not None else 1)
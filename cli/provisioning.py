@@ -6,9 +6,11 @@ import tarfile
 import shutil
 import subprocess
 from urllib.parse import urlparse
-from typing import Protocol
+from typing import TYPE_CHECKING, BinaryIO, Literal, Protocol, cast
 import json
 import enum
+import functools
+import hashlib
 import sys
 import textwrap
 import threading
@@ -19,9 +21,11 @@ import click
 
 import repo_root
 import hermetic
-from sha256sum import compute_sha256
 from constants import WANT, SYSROOT_NAME
 
+if TYPE_CHECKING:
+    from concurrent.futures import Future, ThreadPoolExecutor
+
 
 class InstallationState(enum.Enum):
     NOT_INSTALLED = 0
@@ -36,6 +40,9 @@ class TrackingWhatWeHave:
         # This must be set in any code path that may call back to hermetic.run(), etc.
         # provision_desires() sets this, and individual calls to want_*() must do so as well.
         self.provisioning_depth = 0
+        # Set once provision_desires("all") has completed in this process, so that
+        # later hermetic.run() calls needn't check again.
+        self.all_verified = False
         try:
             with open(Path(self.localdir, "config.10j-HAVE.json"), "r", encoding="utf-8") as f:
                 self._have = json.load(f)
@@ -68,6 +75,7 @@ class TrackingWhatWeHave:
     def note_removed(self, name: str):
         if name in self._have:
             del self._have[name]
+        self.all_verified = False
         self.save()
 
     def query(self, name: str) -> str | None:
@@ -88,6 +96,24 @@ class TrackingWhatWeHave:
 
 HAVE = TrackingWhatWeHave()
 
+# Passed to subprocesses once provisioning has been verified, so that nested
+# Tenjin invocations (e.g. via the intercept wrappers) needn't verify it again.
+PROVISIONED_ENV_VAR = "XJ_PROVISIONED"
+
+
+@functools.cache
+def provisioned_marker() -> str:
+    """Identifies what `provision_desires("all")` verifies: the local directory
+    and the wanted versions of everything in it."""
+    material = json.dumps([str(HAVE.localdir), sorted(WANT.items())])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()[:16]
+
+
+def provisioning_verified() -> bool:
+    """Whether `provision_desires("all")` has completed, either in this process
+    or in the (Tenjin) process that started it."""
+    return HAVE.all_verified or os.environ.get(PROVISIONED_ENV_VAR) == provisioned_marker()
+
 
 class ProvisioningError(Exception):
     pass
@@ -97,12 +123,96 @@ def sez(msg: str, ctx: str, err=False):
     click.echo("TENJIN SEZ: " + ctx + msg, err=err)
 
 
-def download(url: str, filename: Path, first_attempt=True) -> None:
-    # This import is relatively expensive (20 ms) and is rarely needed,
-    # so it is imported here to avoid slowing down the common case.
-    from urllib.request import urlretrieve  # noqa: PLC0415
+# Number of downloads that `prefetch_downloads` fetches concurrently.
+DOWNLOAD_JOBS = int(os.environ.get("XJ_DOWNLOAD_JOBS", "4"))
+
+_DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Downloads started ahead of time by `prefetch_downloads`, by URL.
+_PREFETCHED: "dict[str, Future[Path]]" = {}
+_PREFETCH_EXECUTORS: "list[ThreadPoolExecutor]" = []
+
+
+def _url_tag(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()[:12]
+
+
+def partial_download_path(url: str, filename: Path) -> Path:
+    """Where `download` accumulates the contents of `url` before moving them to
+    `filename`. Naming it after the URL keeps a stale partial download of some
+    other version of the same file from being resumed."""
+    return filename.with_name(f"{filename.name}.{_url_tag(url)}.part")
+
+
+def _fetch_resumably(url: str, filename: Path, sha256: str | None) -> None:
+    from urllib.request import Request, urlopen  # noqa: PLC0415
     from urllib.error import HTTPError  # noqa: PLC0415
-    from http.client import RemoteDisconnected  # noqa: PLC0415
+    from http.client import IncompleteRead  # noqa: PLC0415
+
+    part = partial_download_path(url, filename)
+    offset = part.stat().st_size if part.is_file() else 0
+    request = Request(url)
+    if offset:
+        request.add_header("Range", f"bytes={offset}-")
+    try:
+        response = urlopen(request, timeout=60)
+    except HTTPError as e:
+        if e.code == 416 and offset:
+            # The partial download doesn't fit what the server has now; start over.
+            part.unlink()
+            _fetch_resumably(url, filename, sha256)
+            return
+        raise
+
+    h = hashlib.sha256()
+    with response:
+        content_range = response.headers.get("Content-Range", "")
+        resuming = (
+            offset > 0 and response.status == 206 and content_range.startswith(f"bytes {offset}-")
+        )
+        if resuming:
+            with open(part, "rb") as f:
+                while chunk := f.read(_DOWNLOAD_CHUNK_SIZE):
+                    h.update(chunk)
+        # Otherwise, the server sent the whole file (e.g. it doesn't support ranges).
+        with open(part, "ab" if resuming else "wb") as f:
+            while chunk := response.read(_DOWNLOAD_CHUNK_SIZE):
+                h.update(chunk)
+                f.write(chunk)
+        if response.length:
+            # The connection closed early; the partial download is kept for resumption.
+            raise IncompleteRead(b"", response.length)
+
+    if sha256 is not None and h.hexdigest() != sha256:
+        part.unlink()
+        raise ProvisioningError(
+            f"Checksum mismatch for {url}: expected {sha256}, got {h.hexdigest()}"
+        )
+    os.replace(part, filename)
+
+
+def download(url: str, filename: Path, first_attempt=True, sha256: str | None = None) -> None:
+    """Downloads `url` to `filename`, verifying its SHA-256 checksum if given.
+
+    An interrupted download is resumed (if the server supports range requests)
+    by the next attempt, whether that's the single automatic retry or a later run."""
+    # These imports are relatively expensive (20 ms) and are rarely needed,
+    # so they are imported here to avoid slowing down the common case.
+    from urllib.error import HTTPError, URLError  # noqa: PLC0415
+    from http.client import IncompleteRead, RemoteDisconnected  # noqa: PLC0415
+
+    prefetched = _PREFETCHED.get(url)
+    if prefetched is not None:
+        # This waits for the download if it's still in progress, and re-raises its failure.
+        prefetched_path = prefetched.result()
+        if prefetched_path.is_file():
+            _link_or_copy(prefetched_path, filename)
+            return
+
+    mirror = artifact_mirror()
+    if first_attempt and mirror is not None:
+        if fetch_from_artifact_mirror(mirror, url, filename, sha256):
+            return
 
     def report_potentially_transient_problem_and_retry():
         sez(
@@ -114,7 +224,7 @@ def download(url: str, filename: Path, first_attempt=True) -> None:
         import time  # noqa: PLC0415
 
         time.sleep(6)
-        download(url, filename, first_attempt=False)
+        download(url, filename, first_attempt=False, sha256=sha256)
 
     def report_insurmountable_error_and_die(e: Exception):
         sez(f"Failed to download {url}: {e}", ctx="(download) ", err=True)
@@ -133,7 +243,7 @@ def download(url: str, filename: Path, first_attempt=True) -> None:
         sys.exit(1)
 
     try:
-        urlretrieve(url, filename)
+        _fetch_resumably(url, filename, sha256)
     except HTTPError as e:
         if first_attempt and e.code in (500, 502, 503, 504):
             # These are HTTP error codes for (at least potentially) transient issues.
@@ -142,10 +252,10 @@ def download(url: str, filename: Path, first_attempt=True) -> None:
             return
 
         report_insurmountable_error_and_die(e)
-    except RemoteDisconnected as e:
+    except (RemoteDisconnected, IncompleteRead, ConnectionError, TimeoutError, URLError) as e:
         if first_attempt:
             sez(
-                f"Server closed connection unexpectedly when downloading {url}",
+                f"Connection failed or closed unexpectedly when downloading {url}: {e}",
                 ctx="(download) ",
                 err=True,
             )
@@ -155,6 +265,191 @@ def download(url: str, filename: Path, first_attempt=True) -> None:
         report_insurmountable_error_and_die(e)
 
 
+def _link_or_copy(src: Path, dst: Path) -> None:
+    dst.unlink(missing_ok=True)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def prefetch_downloads(artifacts: list[tuple[str, str | None]], dest_dir: Path) -> None:
+    """Starts concurrently downloading the given (URL, SHA-256 checksum or None)
+    artifacts into `dest_dir`, in the background. Subsequent `download` calls
+    for them wait for just that download, then copy it locally."""
+    from concurrent.futures import ThreadPoolExecutor  # noqa: PLC0415
+
+    pending = list(dict.fromkeys(a for a in artifacts if a[0] not in _PREFETCHED))
+    if len(pending) < 2:
+        return  # Nothing to overlap.
+
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    sez(f"Fetching {len(pending)} downloads concurrently...", ctx="(download) ")
+
+    def fetch(artifact: tuple[str, str | None]) -> Path:
+        url, sha256 = artifact
+        path = dest_dir / f"{_url_tag(url)}-{os.path.basename(urlparse(url).path)}"
+        download(url, path, sha256=sha256)
+        return path
+
+    executor = ThreadPoolExecutor(max_workers=min(DOWNLOAD_JOBS, len(pending)))
+    _PREFETCH_EXECUTORS.append(executor)
+    # Downloads start in order, so the earliest-needed artifacts arrive first.
+    for artifact in pending:
+        _PREFETCHED[artifact[0]] = executor.submit(fetch, artifact)
+
+
+def discard_prefetched_downloads() -> None:
+    while _PREFETCH_EXECUTORS:
+        _PREFETCH_EXECUTORS.pop().shutdown(cancel_futures=True)
+    for future in _PREFETCHED.values():
+        if not future.cancelled() and future.exception() is None:
+            future.result().unlink(missing_ok=True)
+    _PREFETCHED.clear()
+
+
+#                   COMMENTARY(artifact-mirror)
+# When XJ_ARTIFACT_MIRROR is set, `download` looks for artifacts there before
+# going to the network. The mirror is a directory (e.g. on a shared filesystem)
+# or the URL of one served over plain HTTP, laid out as
+#     sha256/<hex>          artifact contents, named by their SHA-256
+#     urls/<hex>.json       {"url": ..., "sha256": ...}, named by the URL's SHA-256
+# Artifacts are verified against their content hash when fetched, and any
+# problem with the mirror falls back to the network. `10j populate-artifact-mirror`
+# fills in a directory mirror with what `provision_desires` would download.
+ARTIFACT_MIRROR_ENV_VAR = "XJ_ARTIFACT_MIRROR"
+
+
+def artifact_mirror() -> str | None:
+    return os.environ.get(ARTIFACT_MIRROR_ENV_VAR) or None
+
+
+def _is_http_mirror(mirror: str) -> bool:
+    return mirror.startswith(("http://", "https://"))
+
+
+def _mirror_index_name(url: str) -> str:
+    return f"urls/{hashlib.sha256(url.encode('utf-8')).hexdigest()}.json"
+
+
+def _read_mirror_index(mirror: str, url: str) -> dict | None:
+    if _is_http_mirror(mirror):
+        from urllib.request import urlopen  # noqa: PLC0415
+        from urllib.error import HTTPError  # noqa: PLC0415
+
+        try:
+            with urlopen(f"{mirror.rstrip('/')}/{_mirror_index_name(url)}", timeout=10) as f:
+                return json.load(f)
+        except HTTPError as e:
+            if e.code == 404:
+                return None
+            raise
+    try:
+        with open(Path(mirror, _mirror_index_name(url)), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def fetch_from_artifact_mirror(mirror: str, url: str, filename: Path, sha256: str | None) -> bool:
+    """Copies the mirrored contents of `url` to `filename`, returning False if
+    the mirror doesn't have (a usable copy of) them."""
+
+    from http.client import HTTPException  # noqa: PLC0415
+
+    def say_skipping(why: str) -> bool:
+        sez(f"Not using mirrored copy of {url}: {why}", ctx="(mirror) ", err=True)
+        return False
+
+    try:
+        entry = _read_mirror_index(mirror, url)
+        if entry is None:
+            return False
+        content_sha256 = entry["sha256"]
+        if sha256 is not None and content_sha256 != sha256:
+            return say_skipping(f"expected SHA-256 {sha256}, mirror has {content_sha256}")
+
+        if _is_http_mirror(mirror):
+            _fetch_resumably(
+                f"{mirror.rstrip('/')}/sha256/{content_sha256}", filename, content_sha256
+            )
+        else:
+            blob = Path(mirror, "sha256", content_sha256)
+            with open(blob, "rb") as f:
+                actual = hashlib.file_digest(f, "sha256").hexdigest()
+            if actual != content_sha256:
+                return say_skipping(f"mirrored file {blob} is corrupt")
+            _link_or_copy(blob, filename)
+    except (OSError, HTTPException, ValueError, KeyError, ProvisioningError) as e:
+        # OSError covers most network errors; ValueError, malformed index entries.
+        return say_skipping(str(e))
+    return True
+
+
+def add_to_artifact_mirror(mirror_dir: Path, url: str, path: Path) -> str:
+    """Stores the contents of `path` in `mirror_dir` as those of `url`.
+    Returns their SHA-256."""
+    with open(path, "rb") as f:
+        content_sha256 = hashlib.file_digest(f, "sha256").hexdigest()
+
+    def write_atomically(dest: Path, write) -> None:
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=dest.parent, prefix=".incoming-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, dest)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    # The contents go in first, so that readers never find an index entry without them.
+    blob = mirror_dir / "sha256" / content_sha256
+    if not blob.is_file():
+        with open(path, "rb") as src:
+            write_atomically(blob, lambda f: shutil.copyfileobj(src, f))
+    entry = json.dumps({"url": url, "sha256": content_sha256}, indent=2).encode("utf-8")
+    write_atomically(mirror_dir / _mirror_index_name(url), lambda f: f.write(entry))
+    return content_sha256
+
+
+def populate_artifact_mirror(mirror_dir: Path, wanted: str) -> None:
+    """Downloads everything that provisioning `wanted` from scratch (on this
+    platform) would download, and stores it in `mirror_dir`."""
+    from concurrent.futures import ThreadPoolExecutor  # noqa: PLC0415
+
+    def say(msg: str):
+        sez(msg, ctx="(mirror) ")
+
+    artifacts = artifacts_to_provision(wanted, only_missing=False)
+    mirrored = mirror_dir.as_posix()
+    missing = [
+        (url, sha256)
+        for url, sha256 in artifacts
+        if (entry := _read_mirror_index(mirrored, url)) is None
+        or not (mirror_dir / "sha256" / entry["sha256"]).is_file()
+    ]
+    say(f"{len(artifacts) - len(missing)} of {len(artifacts)} artifacts already mirrored.")
+    if not missing:
+        return
+
+    incoming = mirror_dir / "incoming"
+    incoming.mkdir(parents=True, exist_ok=True)
+
+    def fetch(artifact: tuple[str, str | None]) -> None:
+        url, sha256 = artifact
+        path = incoming / f"{_url_tag(url)}-{os.path.basename(urlparse(url).path)}"
+        say(f"Downloading {url}...")
+        download(url, path, sha256=sha256)
+        add_to_artifact_mirror(mirror_dir, url, path)
+        path.unlink()
+
+    with ThreadPoolExecutor(max_workers=min(DOWNLOAD_JOBS, len(missing))) as executor:
+        list(executor.map(fetch, missing))
+    say(f"Mirrored {len(missing)} artifacts in {mirror_dir}.")
+
+
 # platform.system() in ["Linux", "Darwin"]
 
 
@@ -252,27 +547,82 @@ def provision_desires(wanted: str):
             say("    Clang+LLVM, a sysroot, and misc build tools like CMake.")
             say("We'll also install Rust and OCaml, which will take a few minutes...")
 
-        # We get these unconditionally, because both Rust and OCaml (and/or the
-        # projects in those languages) end up needing them.
-        want_10j_deps()
-        want_10j_llvm()
-        want_cmake()
-        want_10j_more_deps()
-        want_10j_ast_grep()
-        want_10j_crat()
+        try:
+            # Start fetching what we can up front, concurrently; each provisioner
+            # below waits only for its own downloads, so that unpacking one
+            # artifact overlaps with downloading the rest.
+            prefetch_downloads(artifacts_to_provision(wanted), HAVE.localdir / "downloads")
+
+            # We get these unconditionally, because both Rust and OCaml (and/or the
+            # projects in those languages) end up needing them.
+            want_10j_deps()
+            want_10j_llvm()
+            want_cmake()
+            want_10j_more_deps()
+            want_10j_ast_grep()
+            want_10j_crat()
+
+            if wanted in ("all", "rust"):
+                want_10j_rust_toolchains()
+                want_10j_cargo_nextest()
+
+            if wanted in ("all", "ocaml"):
+                want_dune()
+                want_codehawk_c()
+
+            if wanted == "all":
+                want_10j_reference_c2rust_tag()
+                HAVE.all_verified = True
+        finally:
+            discard_prefetched_downloads()
 
-        if wanted in ("all", "rust"):
-            want_10j_rust_toolchains()
-            want_10j_cargo_nextest()
+        HAVE.provisioning_depth -= 1
 
-        if wanted in ("all", "ocaml"):
-            want_dune()
-            want_codehawk_c()
 
-        if wanted == "all":
-            want_10j_reference_c2rust_tag()
+def artifacts_to_provision(wanted: str, only_missing=True) -> list[tuple[str, str | None]]:
+    """The (URL, SHA-256 checksum or None) of the downloads that provisioning
+    `wanted` will need, as far as can be told up front. Provisioners still call
+    `download` themselves; this just lets `prefetch_downloads` overlap them.
 
-        HAVE.provisioning_depth -= 1
+    With `only_missing=False`, lists the downloads for provisioning from scratch."""
+
+    def needed(keyname: str) -> bool:
+        return not only_missing or HAVE.compatible(keyname) != InstallationState.VERSION_OK
+
+    artifacts: list[tuple[str, str | None]] = []
+
+    def add(mk_url, keyname: str):
+        try:
+            artifacts.append((mk_url(WANT[keyname]), None))
+        except ProvisioningError:
+            pass  # The provisioner will report this in due course.
+
+    on_linux = platform.system() == "Linux"
+    if on_linux and needed("10j-build-deps"):
+        add(mk_build_deps_url, "10j-build-deps")
+    llvm_needed = False
+    for keyname in ["10j-llvm", "10j-llvm14"]:
+        # A manually downloaded LLVM tarball takes precedence; see provision_10j_llvm_with().
+        if not only_missing or (
+            needed(keyname) and not Path(os.path.basename(mk_llvm_url(WANT[keyname]))).is_file()
+        ):
+            add(mk_llvm_url, keyname)
+        llvm_needed = llvm_needed or needed(keyname)
+    if on_linux and llvm_needed:
+        artifacts.append(mk_debian_bullseye_sysroot_url_and_sha256())
+    if on_linux and (llvm_needed or needed("10j-bullseye-sysroot-extras")):
+        add(mk_sysroot_extras_url, "10j-bullseye-sysroot-extras")
+    for keyname, mk_url in [
+        ("10j-cmake", mk_cmake_url),
+        ("10j-more-deps", mk_more_deps_url),
+        ("10j-ast-grep", mk_ast_grep_url),
+        ("10j-crat", mk_crat_url),
+    ]:
+        if needed(keyname):
+            add(mk_url, keyname)
+    if wanted in ("all", "rust") and needed("10j-cargo-nextest"):
+        add(mk_cargo_nextest_url, "10j-cargo-nextest")
+    return artifacts
 
 
 def require_rustup():
@@ -589,6 +939,16 @@ def want_codehawk_c():
     )
 
 
+def mk_tenjin_build_deps_url(release: str, filename: str) -> str:
+    return f"https://github.com/Aarno-Labs/tenjin-build-deps/releases/download/{release}/{filename}"
+
+
+def mk_sysroot_extras_url(version: str) -> str:
+    return mk_tenjin_build_deps_url(
+        version, f"xj-bullseye-sysroot-extras_{machine_normalized()}.tar.xz"
+    )
+
+
 def want_10j_sysroot_extras(xj_llvm_root: Path):
     if platform.system() != "Linux":
         return
@@ -597,16 +957,14 @@ def want_10j_sysroot_extras(xj_llvm_root: Path):
         version: str,
         keyname: str,
     ):
-        filename = f"xj-bullseye-sysroot-extras_{machine_normalized()}.tar.xz"
-        url = f"https://github.com/Aarno-Labs/tenjin-build-deps/releases/download/{version}/{filename}"
-
-        tarball = xj_llvm_root / filename
+        url = mk_sysroot_extras_url(version)
+        tarball = xj_llvm_root / os.path.basename(url)
         download(url, tarball)
 
         tmp_dest = xj_llvm_root / "tmp"
         tmp_dest.mkdir()
 
-        shutil.unpack_archive(tarball, tmp_dest, filter="tar")
+        unpack_tarball(tarball, tmp_dest, ctx="(sysroot-extras) ", filter="tar")
         tarball.unlink()
 
         # We use non-normalized platform.machine() here because we want to match
@@ -669,11 +1027,16 @@ def cook_pkg_config_placeholders_within(target: Path) -> None:
         pc_file.write_text(data, encoding="utf-8")
 
 
+def mk_more_deps_url(version: str) -> str:
+    loweros = {"Linux": "linux", "Darwin": "macos"}[platform.system()]
+    return mk_tenjin_build_deps_url(
+        version, f"xj-more-deps_{loweros}-{machine_normalized()}.tar.xz"
+    )
+
+
 def want_10j_more_deps():
     def provision_10j_more_deps_with(version: str, keyname: str):
-        loweros = {"Linux": "linux", "Darwin": "macos"}[platform.system()]
-        filename = f"xj-more-deps_{loweros}-{machine_normalized()}.tar.xz"
-        url = f"https://github.com/Aarno-Labs/tenjin-build-deps/releases/download/{version}/{filename}"
+        url = mk_more_deps_url(version)
         target = hermetic.xj_more_deps(HAVE.localdir)
         if target.is_dir():
             shutil.rmtree(target)
@@ -745,8 +1108,12 @@ def want_10j_crat():
     want("10j-crat", "crat", "crat", provision_10j_crat_with)
 
 
+def mk_crat_url(version: str) -> str:
+    return f"https://github.com/brk/crat/releases/download/{version}/xj-crat_x86_64.tar.xz"
+
+
 def provision_10j_crat_with(version: str, keyname: str):
-    url = f"https://github.com/brk/crat/releases/download/{version}/xj-crat_x86_64.tar.xz"
+    url = mk_crat_url(version)
     target = hermetic.xj_crat(HAVE.localdir)
     if target.is_dir():
         shutil.rmtree(target)
@@ -792,33 +1159,34 @@ def provision_10j_rust_toolchain_with(version: str, keyname: str):
     HAVE.note_we_have(keyname, specifier=toolchain_spec)
 
 
+def mk_cargo_nextest_url(version: str) -> str:
+    base_url = "https://github.com/nextest-rs/nextest/releases/download"
+    tag = f"cargo-nextest-{version}"
+    match [platform.system(), machine_normalized()]:
+        case ["Linux", "x86_64"]:
+            suffix = "x86_64-unknown-linux-gnu"
+        case ["Linux", "aarch64"]:
+            suffix = "aarch64-unknown-linux-gnu"
+        case ["Darwin", _]:
+            suffix = "universal-apple-darwin"
+        case sys_mach:
+            raise ProvisioningError(f"cargo-nextest: unsupported platform: {sys_mach}")
+
+    filename = f"cargo-nextest-{version}-{suffix}.tar.gz"
+    return f"{base_url}/{tag}/{filename}"
+
+
 def provision_10j_cargo_nextest_with(version: str, keyname: str):
     """Download and install cargo-nextest binary."""
 
     def say(msg: str):
         sez(msg, ctx="(cargo-nextest) ")
 
-    def mk_url() -> str:
-        base_url = "https://github.com/nextest-rs/nextest/releases/download"
-        tag = f"cargo-nextest-{version}"
-        match [platform.system(), machine_normalized()]:
-            case ["Linux", "x86_64"]:
-                suffix = "x86_64-unknown-linux-gnu"
-            case ["Linux", "aarch64"]:
-                suffix = "aarch64-unknown-linux-gnu"
-            case ["Darwin", _]:
-                suffix = "universal-apple-darwin"
-            case sys_mach:
-                raise ProvisioningError(f"cargo-nextest: unsupported platform: {sys_mach}")
-
-        filename = f"cargo-nextest-{version}-{suffix}.tar.gz"
-        return f"{base_url}/{tag}/{filename}"
-
     target_dir = hermetic.xj_cargo_nextest(HAVE.localdir)
     if target_dir.is_dir():
         shutil.rmtree(target_dir)
 
-    download_and_extract_tarball(mk_url(), target_dir, ctx="(cargo-nextest) ")
+    download_and_extract_tarball(mk_cargo_nextest_url(version), target_dir, ctx="(cargo-nextest) ")
 
     binary_path = target_dir / "cargo-nextest"
     if not binary_path.is_file():
@@ -943,12 +1311,7 @@ def provision_ocaml(ocaml_version: str):
     install_ocaml()
 
 
-def provision_debian_bullseye_sysroot_with(dest_sysroot: Path):
-    def say(msg: str):
-        sez(msg, ctx="(sysroot) ")
-
-    say("Downloading and unpacking sysroot tarball, will take maybe 10 s...")
-
+def mk_debian_bullseye_sysroot_url_and_sha256() -> tuple[str, str]:
     CHROME_LINUX_SYSROOT_URL = "https://commondatastorage.googleapis.com/chrome-linux-sysroot"
 
     # These don't go in WANT because they're quite stable;
@@ -959,19 +1322,24 @@ def provision_debian_bullseye_sysroot_with(dest_sysroot: Path):
         "armhf": "fe81e7114b97440262bce004caf02c1514732e2fa7f99693b2836932ad1c4626",
     }
     tarball_sha256sum = DEBIAN_BULLSEYE_SYSROOT_SHA256SUMS[machine_normalized()]
+    return CHROME_LINUX_SYSROOT_URL + "/" + tarball_sha256sum, tarball_sha256sum
 
-    url = CHROME_LINUX_SYSROOT_URL + "/" + tarball_sha256sum
+
+def provision_debian_bullseye_sysroot_with(dest_sysroot: Path):
+    def say(msg: str):
+        sez(msg, ctx="(sysroot) ")
+
+    say("Downloading and unpacking sysroot tarball, will take maybe 10 s...")
+
+    url, tarball_sha256sum = mk_debian_bullseye_sysroot_url_and_sha256()
 
     if dest_sysroot.is_dir():
         shutil.rmtree(dest_sysroot)
     dest_sysroot.mkdir()
     tarball = dest_sysroot / "tenjin-sysroot.tar.xz"
 
-    download(url, tarball)
-    sha256sum = compute_sha256(tarball)
-    if sha256sum != tarball_sha256sum:
-        raise ProvisioningError("Sysroot hash verification failed!")
-    shutil.unpack_archive(tarball, dest_sysroot, filter="tar")
+    download(url, tarball, sha256=tarball_sha256sum)
+    unpack_tarball(tarball, dest_sysroot, ctx="(sysroot) ", filter="tar")
     tarball.unlink()
 
 
@@ -1154,28 +1522,27 @@ def provision_opam_with(version: str, keyname: str):
     # So we don't want to fail if the version is greater than requested.
 
 
-def provision_cmake_with(version: str, keyname: str):
+def mk_cmake_url(version: str) -> str:
     def fmt_url(tag: str) -> str:
         return f"https://github.com/Kitware/CMake/releases/download/v{version}/cmake-{version}-{tag}.tar.gz"
 
-    def mk_url() -> str:
-        match [platform.system(), machine_normalized()]:
-            case ["Linux", "x86_64"]:
-                return fmt_url("linux-x86_64")
-            case ["Linux", "aarch64"]:
-                return fmt_url("linux-aarch64")
-            case ["Darwin", _]:
-                return fmt_url("macos-universal")
-            case sys_mach:
-                raise ProvisioningError(
-                    f"Tenjin does not yet support {sys_mach} for acquiring CMake."
-                )
+    match [platform.system(), machine_normalized()]:
+        case ["Linux", "x86_64"]:
+            return fmt_url("linux-x86_64")
+        case ["Linux", "aarch64"]:
+            return fmt_url("linux-aarch64")
+        case ["Darwin", _]:
+            return fmt_url("macos-universal")
+        case sys_mach:
+            raise ProvisioningError(f"Tenjin does not yet support {sys_mach} for acquiring CMake.")
+
 
+def provision_cmake_with(version: str, keyname: str):
     cmake_dir = HAVE.localdir / "cmake"
     if cmake_dir.is_dir():
         # Clear prior installation to avoid tarball unpacking conflicts
         shutil.rmtree(cmake_dir)
-    download_and_extract_tarball(mk_url(), cmake_dir, ctx="(cmake) ")
+    download_and_extract_tarball(mk_cmake_url(version), cmake_dir, ctx="(cmake) ")
 
     if platform.system() == "Darwin" and (cmake_dir / "CMake.app").is_dir():
         # The tarball for macOS contains a .app bundle; we'll make a symlink
@@ -1206,11 +1573,17 @@ def validate_actual_cmake_version(expected_version: str):
                 raise ProvisioningError(f"Unexpected output from CMake version command:\n{outstr}")
 
 
+def mk_llvm_url(version: str) -> str:
+    llvm_version, release = version.split("@", 1)
+    tarball_name = f"LLVM-{llvm_version}-{platform.system()}-{machine_normalized()}.tar.xz"
+    return mk_tenjin_build_deps_url(release, tarball_name)
+
+
 def provision_10j_llvm_with(version: str, keyname: str):
     xj_llvm_root = xj_llvm_dir(keyname)
 
     assert "@" in version, "Expected version of the form 'LLVM_VERSION@tenjin-build-deps-release'"
-    llvm_version, release = version.split("@", 1)
+    llvm_version, _release = version.split("@", 1)
 
     def provision_clang_config_files(sysroot_path):
         match platform.system():
@@ -1334,12 +1707,12 @@ def provision_10j_llvm_with(version: str, keyname: str):
         # In nuking the prior LLVM installation, we also lose the prior sysroot's extras.
         HAVE.note_removed("10j-bullseye-sysroot-extras")
 
-    tarball_name = f"LLVM-{llvm_version}-{platform.system()}-{machine_normalized()}.tar.xz"
+    url = mk_llvm_url(version)
+    tarball_name = os.path.basename(url)
     if Path(tarball_name).is_file():
         # A local tarball was likely manually downloaded. Use it if we've got it.
         extract_tarball(Path(tarball_name), xj_llvm_root, ctx="(llvm) ")
     else:
-        url = f"https://github.com/Aarno-Labs/tenjin-build-deps/releases/download/{release}/{tarball_name}"
         download_and_extract_tarball(url, xj_llvm_root, ctx="(llvm) ")
 
     match platform.system():
@@ -1598,11 +1971,14 @@ def cook_automake_and_autoconf_within() -> None:
     say("... done cooking automake/aclocal.")
 
 
+def mk_build_deps_url(version: str) -> str:
+    return mk_tenjin_build_deps_url(version, f"xj-build-deps_{machine_normalized()}.tar.xz")
+
+
 def provision_10j_deps_with(version: str, keyname: str):
     match platform.system():
         case "Linux":
-            filename = f"xj-build-deps_{machine_normalized()}.tar.xz"
-            url = f"https://github.com/Aarno-Labs/tenjin-build-deps/releases/download/{version}/{filename}"
+            url = mk_build_deps_url(version)
             target = hermetic.xj_build_deps(HAVE.localdir)
             if target.is_dir():
                 shutil.rmtree(target)
@@ -1638,6 +2014,13 @@ def provision_10j_deps_with(version: str, keyname: str):
     HAVE.note_we_have(keyname, specifier=version)
 
 
+class Readable(Protocol):
+    def read(self, size: int = -1, /) -> bytes: ...
+
+
+TarFilter = Literal["fully_trusted", "tar", "data"]
+
+
 def download_and_extract_tarball(
     tarball_url: str,
     target_dir: Path,
@@ -1646,6 +2029,10 @@ def download_and_extract_tarball(
     """
     Downloads a compressed tar file from the given URL and extracts it to the target directory.
 
+    When the tarball isn't available locally (prefetched or mirrored), it is
+    extracted as it downloads; if that fails, the download is resumed and then
+    extracted as a separate step.
+
     Args:
         tarball_url (str): URL of the tarball file to download
         target_dir (str): Directory to extract contents to.
@@ -1654,37 +2041,89 @@ def download_and_extract_tarball(
     def say(msg: str):
         sez(msg, ctx)
 
-    temp_file = None
-    try:
-        # Create a temporary file name for the download
-        temp_file = os.path.basename(urlparse(tarball_url).path)
+    # Create a temporary file name for the download
+    temp_file = Path(os.path.basename(urlparse(tarball_url).path))
 
-        say(f"Downloading {tarball_url}...")
-        download(tarball_url, Path(temp_file))
+    say(f"Downloading {tarball_url}...")
+    if (
+        tarball_url not in _PREFETCHED
+        and artifact_mirror() is None
+        # A partial download from an earlier attempt is better resumed.
+        and not partial_download_path(tarball_url, temp_file).is_file()
+    ):
+        try:
+            stream_extract_tarball(tarball_url, temp_file, target_dir, ctx)
+        except Exception as e:
+            say(f"Extracting while downloading failed ({e}); finishing the download first...")
+        else:
+            say(f"Download and extraction of {temp_file} completed successfully!")
+            return
+
+    try:
+        download(tarball_url, temp_file)
     except Exception:
         # Clean up any temporary files if they exist
-        if temp_file:
-            if os.path.exists(temp_file):
-                os.remove(temp_file)
+        temp_file.unlink(missing_ok=True)
         raise
 
-    extract_tarball(Path(temp_file), target_dir, ctx)
+    extract_tarball(temp_file, target_dir, ctx)
 
     # Clean up the temporary file
-    os.remove(temp_file)
+    temp_file.unlink()
 
     say(f"Download and extraction of {temp_file} completed successfully!")
 
 
+class _TeeReader:
+    """Reads from an HTTP response, copying what it reads to a file."""
+
+    def __init__(self, response, copy: BinaryIO):
+        self._response = response
+        self._copy = copy
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self._response.read() if size < 0 else self._response.read(size)
+        self._copy.write(chunk)
+        return chunk
+
+    def drain(self) -> None:
+        while self.read(_DOWNLOAD_CHUNK_SIZE):
+            pass
+
+
+def stream_extract_tarball(url: str, filename: Path, target_dir: Path, ctx: str) -> None:
+    """Extracts the tarball at `url` into `target_dir` (as `extract_tarball` would
+    for `filename`) while downloading it. What was downloaded is kept as the
+    partial download of `filename` if extraction fails, and discarded otherwise."""
+    from urllib.request import urlopen  # noqa: PLC0415
+    from http.client import IncompleteRead  # noqa: PLC0415
+
+    part = partial_download_path(url, filename)
+    with urlopen(url, timeout=60) as response, open(part, "wb") as copy:
+        reader = _TeeReader(response, copy)
+        extract_tarball(filename, target_dir, ctx, source=reader)
+        reader.drain()
+        if response.length:
+            raise IncompleteRead(b"", response.length)
+    part.unlink()
+
+
 # The extraction process is about twice as slow on macOS
 # for clang+llvm versus the native bsdtar utility, but
 # since this is a one-time cost it seems better to just
 # avoid non-Python dependencies as much as we can.
+# We do use xz or zstd when available, though: see `external_decompressor_for`.
 def extract_tarball(
-    tarball_path: Path, initial_target_dir: Path, ctx: str, time_estimate="a few seconds"
+    tarball_path: Path,
+    initial_target_dir: Path,
+    ctx: str,
+    time_estimate="a few seconds",
+    source: "Readable | None" = None,
 ) -> Path:
     """
     Extracts the given tarball into (or within) the target directory.
+    If `source` is given, the tarball's contents are read from it rather than
+    from `tarball_path`, which then only supplies the tarball's name.
 
     If the tarball unpacks a single directory with the same name as the tarball
     (minus the suffix), the contents of that directory will be moved up a level,
@@ -1719,6 +2158,10 @@ def extract_tarball(
                 return ".tar.bz2"
             elif filename.endswith(".tbz"):
                 return ".tbz"
+            elif filename.endswith(".tar.zst"):
+                return ".tar.zst"
+            elif filename.endswith(".tzst"):
+                return ".tzst"
             raise ValueError(f"Unknown tarball suffix for URL: {filename}")
 
         suffix = select_tarball_suffix(tarball_path.name)
@@ -1750,8 +2193,12 @@ def extract_tarball(
     initial_target_dir.mkdir(parents=True, exist_ok=True)
 
     # Extract the compressed tar file
-    with tarfile.open(str(tarball_path), "r:*") as tar:
-        tar.extractall(path=final_target_dir)
+    try:
+        unpack_tarball(tarball_path, final_target_dir, ctx, source=source)
+    except BaseException:
+        # Leave things as if we hadn't started, so that extraction can be retried.
+        shutil.rmtree(final_target_dir, ignore_errors=True)
+        raise
 
     if time_estimate is not None:
         say(f"Extraction of {tarball_path.name} completed successfully!")
@@ -1780,33 +2227,168 @@ def extract_tarball(
     return final_target_dir
 
 
+def external_decompressor_for(tarball_name: str) -> list[str] | None:
+    """A command that decompresses the named tarball from stdin to stdout, if one
+    is available that beats Python's own (single-threaded) decompressors.
+
+    Decompressing in a separate process overlaps decompression with extraction;
+    xz 5.4 and later also decompress multi-block archives on several threads.
+    Setting XJ_EXTERNAL_DECOMPRESSOR=0 disables this."""
+    if os.environ.get("XJ_EXTERNAL_DECOMPRESSOR") == "0":
+        return None
+    if tarball_name.endswith((".tar.xz", ".txz")):
+        xz = shutil.which("xz")
+        if xz is not None and _xz_supports_threads(xz):
+            return [xz, "--decompress", "--stdout", "--threads=0"]
+    elif tarball_name.endswith((".tar.zst", ".tzst")):
+        zstd = shutil.which("zstd")
+        if zstd is not None:
+            return [zstd, "--decompress", "--stdout", "--quiet"]
+    return None
+
+
+@functools.cache
+def _xz_supports_threads(xz: str) -> bool:
+    try:
+        out = subprocess.check_output([xz, "--version"], text=True)
+    except (OSError, subprocess.CalledProcessError):
+        return False
+    match out.split():
+        case ["xz", "(XZ", "Utils)", version, *_]:
+            return Version(version) >= Version("5.2")  # The first with --threads.
+        case _:
+            return False
+
+
+def unpack_tarball(
+    tarball_path: Path,
+    dest_dir: Path,
+    ctx: str,
+    source: "Readable | None" = None,
+    filter: TarFilter | None = None,
+) -> None:
+    """Extracts the members of the tarball (read from `source`, if given) into
+    `dest_dir`, and reports the throughput achieved."""
+    import time  # noqa: PLC0415
+
+    decompressor = external_decompressor_for(tarball_path.name)
+    start_ns = time.monotonic_ns()
+    if decompressor is None:
+        method = "Python's tarfile"
+        if source is None:
+            tar = tarfile.open(tarball_path, "r:*")
+        else:
+            # Stream mode only ever calls read().
+            tar = tarfile.open(fileobj=cast(BinaryIO, source), mode="r|*")
+        with tar:
+            tar.extractall(path=dest_dir, filter=filter)
+            unpacked_bytes = sum(member.size for member in tar.getmembers())
+    else:
+        method = os.path.basename(decompressor[0])
+        unpacked_bytes = _unpack_tarball_via(decompressor, tarball_path, dest_dir, source, filter)
+    elapsed_s = max(time.monotonic_ns() - start_ns, 1) / 1e9
+
+    mb = unpacked_bytes / 1e6
+    while_downloading = "" if source is None else ", while downloading"
+    sez(
+        f"Unpacked {mb:.0f} MB from {tarball_path.name} in {elapsed_s:.1f} s"
+        f" ({mb / elapsed_s:.0f} MB/s via {method}{while_downloading})",
+        ctx,
+    )
+
+
+def _unpack_tarball_via(
+    decompressor: list[str],
+    tarball_path: Path,
+    dest_dir: Path,
+    source: "Readable | None",
+    filter: TarFilter | None,
+) -> int:
+    """Returns the number of bytes unpacked."""
+    if source is None:
+        with open(tarball_path, "rb") as tarball:
+            proc = subprocess.Popen(decompressor, stdin=tarball, stdout=subprocess.PIPE)
+    else:
+        proc = subprocess.Popen(decompressor, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    assert proc.stdout is not None
+
+    feeder = None
+    feeder_failures: list[BaseException] = []
+    if source is not None:
+        stdin = proc.stdin
+        assert stdin is not None
+
+        def feed():
+            try:
+                while chunk := source.read(_DOWNLOAD_CHUNK_SIZE):
+                    stdin.write(chunk)
+            except BaseException as e:
+                feeder_failures.append(e)
+            finally:
+                try:
+                    stdin.close()
+                except BrokenPipeError:
+                    pass
+
+        feeder = threading.Thread(target=feed, daemon=True)
+        feeder.start()
+
+    with proc:
+        try:
+            with tarfile.open(fileobj=proc.stdout, mode="r|") as tar:
+                tar.extractall(path=dest_dir, filter=filter)
+                unpacked_bytes = sum(member.size for member in tar.getmembers())
+            # Let the decompressor finish (and consume its input), past any padding.
+            while proc.stdout.read(_DOWNLOAD_CHUNK_SIZE):
+                pass
+        except BaseException:
+            proc.kill()
+            if feeder is not None:
+                feeder.join()
+            # Unless the feeder merely lost its pipe to the killed decompressor,
+            # its failure (e.g. a dropped connection) is the underlying problem.
+            if feeder_failures and not isinstance(feeder_failures[0], BrokenPipeError):
+                raise feeder_failures[0] from None
+            raise
+        if feeder is not None:
+            feeder.join()
+        if feeder_failures:
+            raise feeder_failures[0]
+        if proc.wait() != 0:
+            raise ProvisioningError(
+                f"{decompressor[0]} failed (exit code {proc.returncode}) on {tarball_path.name}"
+            )
+    return unpacked_bytes
+
+
+def mk_ast_grep_url(version: str) -> str:
+    """Build the download URL based on platform and architecture."""
+    base_url = f"https://github.com/ast-grep/ast-grep/releases/download/{version}"
+    match [platform.system(), machine_normalized()]:
+        case ["Linux", "x86_64"]:
+            return f"{base_url}/app-x86_64-unknown-linux-gnu.zip"
+        case ["Linux", "aarch64"]:
+            return f"{base_url}/app-aarch64-unknown-linux-gnu.zip"
+        case ["Darwin", "x86_64"]:
+            return f"{base_url}/app-x86_64-apple-darwin.zip"
+        case ["Darwin", "aarch64"]:
+            return f"{base_url}/app-aarch64-apple-darwin.zip"
+        case sys_mach:
+            raise ProvisioningError(f"ast-grep: unsupported platform: {sys_mach}")
+
+
 def provision_10j_ast_grep_with(version: str, keyname: str):
     """Download and install ast-grep binary."""
 
     def say(msg: str):
         sez(msg, ctx="(ast-grep) ")
 
-    def mk_url() -> str:
-        """Build the download URL based on platform and architecture."""
-        base_url = f"https://github.com/ast-grep/ast-grep/releases/download/{version}"
-        match [platform.system(), machine_normalized()]:
-            case ["Linux", "x86_64"]:
-                return f"{base_url}/app-x86_64-unknown-linux-gnu.zip"
-            case ["Linux", "aarch64"]:
-                return f"{base_url}/app-aarch64-unknown-linux-gnu.zip"
-            case ["Darwin", "x86_64"]:
-                return f"{base_url}/app-x86_64-apple-darwin.zip"
-            case ["Darwin", "aarch64"]:
-                return f"{base_url}/app-aarch64-apple-darwin.zip"
-            case sys_mach:
-                raise ProvisioningError(f"ast-grep: unsupported platform: {sys_mach}")
-
     target_dir = HAVE.localdir / "ast-grep"
     if target_dir.is_dir():
         shutil.rmtree(target_dir)
 
     target_dir.mkdir(parents=True, exist_ok=True)
-    url = mk_url()
+    url = mk_ast_grep_url(version)
 
     say("Downloading and extracting ast-grep...")
     temp_file = None
@@ -91,6 +91,14 @@ class BuildInfo:
         self._intercepted_commands: list[targets_from_intercept.InterceptedCommand] = []
         self._implicit_target: BuildTarget | None = None
         self._use_preprocessed_files: bool = False
+        # Memoized result of `_process_targets`, which is recomputed
+        # only when the intercepted commands (or implicit target) change.
+        self._processed_targets: (
+            dict[
+                BuildTargetKey, tuple[BuildTarget, list[targets_from_intercept.InterceptedCommand]]
+            ]
+            | None
+        ) = None
 
     def __repr__(self) -> str:
         return (
@@ -100,6 +108,7 @@ class BuildInfo:
 
     def for_single_file(self, c_file: Path, builddir: Path, target: BuildTarget) -> None:
         self._implicit_target = target
+        self._processed_targets = None
         self._with_parsed_compile_commands(
             compilation_database.synthetic_compile_commands_for_c_file(c_file, builddir),
             builddir,
@@ -227,13 +236,22 @@ class BuildInfo:
         self._intercepted_commands = []
         for cmd in intercepted_commands:
             self._intercepted_commands.extend(self._split_hybrid_command(cmd))
+        self._processed_targets = None
 
     def _process_targets(
         self,
     ) -> dict[BuildTargetKey, tuple[BuildTarget, list[targets_from_intercept.InterceptedCommand]]]:
         """Returns a mapping from target outputs to (BuildTarget, list of commands).
 
-        The list of commands includes both compilation and linking commands."""
+        The list of commands includes both compilation and linking commands.
+        The result is shared between calls; callers must not modify it."""
+        if self._processed_targets is None:
+            self._processed_targets = self._compute_targets()
+        return self._processed_targets
+
+    def _compute_targets(
+        self,
+    ) -> dict[BuildTargetKey, tuple[BuildTarget, list[targets_from_intercept.InterceptedCommand]]]:
         if self._implicit_target is not None:
             # When an implicit target is given, we assume all commands
             # belong to that target.
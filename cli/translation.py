@@ -20,6 +20,7 @@ import ingest
 import ingest_tracking
 import targets
 import hermetic
+import translation_dedup
 import vcs_helpers
 import static_measurements_rust
 from tenj_types import ResolvedPath, style_path, UserFacingError
@@ -166,13 +167,17 @@ def create_subdirectory_snapshot(
     )
 
 
+# The translation stages recorded in each translation's snapshot.
+SNAPSHOTTED_RUST_DIRS = ["vanilla_c2rust", "00_out", "final"]
+
+
 def create_translation_snapshot(
     root: Path, codebase: Path, resultsdir: Path, record: ingest.TranslationRecord
 ) -> ingest.TranslationResultsSnapshot:
     c_snapshot = create_subdirectory_snapshot(False, codebase, "original_codebase")
 
     rust_snapshots = []
-    for dirname in ["vanilla_c2rust", "00_out", "final"]:
+    for dirname in SNAPSHOTTED_RUST_DIRS:
         subdir = resultsdir / dirname
         assert not subdir.is_file()
         if subdir.is_dir():
@@ -235,6 +240,8 @@ def do_translate(
             tracker,
         )
     finally:
+        if translation_flags.dedup is not None:
+            translation_flags.dedup.release(resultsdir, tracker.mb_mut_translation_results())
         record = tracker.finalize()
         if record is not None:
             with (resultsdir / "translation_metadata.json").open("w") as f:
@@ -314,6 +321,40 @@ def do_translate_with_tracker(
     # We must explicitly pass c2rust our sysroot
     compilation_database.munge_compile_commands_for_hermetic_translation(compdb)
 
+    if translation_flags.dedup is not None:
+        key = translation_dedup.prepared_codebase_digest(
+            final_prepared_codebase,
+            resultsdir,
+            [translation_flags.cratename, *xj_c2rust_transpile_flags],
+        )
+        reusable_resultsdir = translation_flags.dedup.claim_or_wait(key, resultsdir)
+        if reusable_resultsdir is not None:
+            click.echo(
+                f"Prepared codebase is identical to that of {style_path(reusable_resultsdir)};"
+                " reusing its translation."
+            )
+            output.rmdir()
+            with tracker.tracking("reuse-translation", reusable_resultsdir):
+                # Intermediate `NN_out` stages aren't needed to match what a
+                # translation that ran would report.
+                for dirname in SNAPSHOTTED_RUST_DIRS:
+                    if (reusable_resultsdir / dirname).is_dir():
+                        translation_dedup.copy_results_with_relocation(
+                            reusable_resultsdir / dirname,
+                            resultsdir / dirname,
+                            reusable_resultsdir,
+                            resultsdir,
+                        )
+            tracker.mark_translation_finished()
+
+            reused_res = translation_flags.dedup.reused_results(resultsdir)
+            mb_mut_res = tracker.mb_mut_translation_results()
+            if reused_res and mb_mut_res:
+                mb_mut_res.c2rust_baseline = reused_res.c2rust_baseline
+                mb_mut_res.tenjin_initial = reused_res.tenjin_initial
+                mb_mut_res.tenjin_final = reused_res.tenjin_final
+            return
+
     click.echo("Running upstream c2rust translation...")
     # First run the upstream c2rust tool to get a baseline translation.
     upstream_c2rust_ok = run_upstream_c2rust(tracker, c2rust_transpile_flags, compdb, output)
@@ -374,6 +415,7 @@ def do_translate_with_tracker(
                 resultsdir,
                 translation_flags.cratename,
                 tracker,
+                jobs=translation_flags.jobs,
             )
         finally:
             tracker.mark_translation_finished()
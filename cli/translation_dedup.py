@@ -0,0 +1,149 @@
+"""Sharing of translation results between configurations of one codebase.
+
+When translating several configurations (see `translation_multi_config`), some
+configurations prepare to byte-identical codebases, e.g. when a CMake variable
+only affects targets that aren't translated. The translation proper (c2rust and
+the improvement passes) then does the same work twice. Translations that share
+a `TranslationDedup` identify their prepared codebase by content hash, and only
+the first translation with a given hash does that work; the others wait for it
+and copy its results, along with its static measurements of them.
+
+Sharing is all or nothing: configurations whose prepared codebases differ in
+even one TU each run every preparation pass and the whole translation. Reusing
+work TU by TU (preparation steps, or c2rust output) is not implemented.
+"""
+
+import dataclasses
+import hashlib
+import os
+import re
+import shutil
+import threading
+import time
+from pathlib import Path
+
+import ingest
+
+RESULTSDIR_PLACEHOLDER = b"<xj-resultsdir>"
+
+
+def prepared_codebase_digest(codebase: Path, resultsdir: Path, extra: list[str]) -> str:
+    """Hashes the contents of `codebase` (normally within `resultsdir`) and `extra`,
+    treating mentions of `resultsdir` as equivalent across translations."""
+    resultsdir_bytes = resultsdir.as_posix().encode("utf-8")
+    h = hashlib.sha256()
+    for s in extra:
+        h.update(s.replace(resultsdir.as_posix(), RESULTSDIR_PLACEHOLDER.decode()).encode("utf-8"))
+        h.update(b"\0")
+    for dirpath, dirnames, filenames in os.walk(codebase):
+        dirnames.sort()
+        for name in sorted(filenames):
+            path = Path(dirpath) / name
+            h.update(path.relative_to(codebase).as_posix().encode("utf-8"))
+            h.update(b"\0")
+            if path.is_symlink():
+                h.update(os.readlink(path).encode("utf-8"))
+            else:
+                h.update(path.read_bytes().replace(resultsdir_bytes, RESULTSDIR_PLACEHOLDER))
+            h.update(b"\0")
+    return h.hexdigest()
+
+
+def _ignore_cargo_target_dirs(dirpath: str, names: list[str]) -> set[str]:
+    if "Cargo.toml" in names and "target" in names and (Path(dirpath) / "target").is_dir():
+        return {"target"}
+    return set()
+
+
+def _is_text(contents: bytes) -> bool:
+    if b"\0" in contents:
+        return False
+    try:
+        contents.decode("utf-8")
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def copy_results_with_relocation(src: Path, dst: Path, src_resultsdir: Path, dst_resultsdir: Path):
+    """Copies `src` to `dst`, rewriting mentions of `src_resultsdir` in text files.
+
+    Cargo `target` directories are not copied: they hold binary build artifacts,
+    which can't be relocated by rewriting, and which cargo rebuilds as needed.
+    Mentions must end at a path component boundary, so that e.g. `/r/A=ON2`
+    is not taken to be within `/r/A=ON`.
+    """
+    shutil.copytree(src, dst, symlinks=True, ignore=_ignore_cargo_target_dirs)
+    old = src_resultsdir.as_posix().encode("utf-8")
+    new = dst_resultsdir.as_posix().encode("utf-8")
+    mention = re.compile(re.escape(old) + rb"(?=[/\s\"'`:;,)\]}>]|\Z)")
+    for path in dst.rglob("*"):
+        if path.is_file() and not path.is_symlink():
+            contents = path.read_bytes()
+            if old in contents and _is_text(contents):
+                path.write_bytes(mention.sub(lambda _: new, contents))
+
+
+@dataclasses.dataclass
+class _Claim:
+    leader: Path
+    started_ns: int
+    done: threading.Event = dataclasses.field(default_factory=threading.Event)
+    succeeded: bool = False
+    elapsed_ms: int = 0
+    results: ingest.TranslationResults | None = None
+
+
+class TranslationDedup:
+    """Coordinates translations running concurrently (in threads) in one process."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._claims: dict[str, _Claim] = {}
+        self._reused: dict[Path, _Claim] = {}
+
+    def claim_or_wait(self, key: str, resultsdir: Path) -> Path | None:
+        """Returns None if the caller should do the translation identified by `key`
+        (and must later call `release`), or the results directory of an identical,
+        successfully completed translation."""
+        while True:
+            with self._lock:
+                claim = self._claims.get(key)
+                if claim is None:
+                    self._claims[key] = _Claim(leader=resultsdir, started_ns=time.monotonic_ns())
+                    return None
+            claim.done.wait()
+            if claim.succeeded:
+                with self._lock:
+                    self._reused[resultsdir] = claim
+                return claim.leader
+            # The leader failed (and dropped its claim); try again ourselves.
+
+    def release(self, resultsdir: Path, results: ingest.TranslationResults | None = None):
+        """Marks the translations claimed by `resultsdir` as done, successfully if
+        it produced a `final` directory. Its `results` (if any) are made available
+        to the translations that reuse it."""
+        with self._lock:
+            claimed = [(k, c) for k, c in self._claims.items() if c.leader == resultsdir]
+            for key, claim in claimed:
+                claim.succeeded = (resultsdir / "final").is_dir()
+                claim.elapsed_ms = (time.monotonic_ns() - claim.started_ns) // 1_000_000
+                claim.results = results
+                if not claim.succeeded:
+                    del self._claims[key]
+        for _key, claim in claimed:
+            claim.done.set()
+
+    def reused_by(self, resultsdir: Path) -> tuple[Path, int] | None:
+        """If `resultsdir` reused another translation's results, returns that
+        translation's results directory and how long its shared work took."""
+        with self._lock:
+            claim = self._reused.get(resultsdir)
+        return None if claim is None else (claim.leader, claim.elapsed_ms)
+
+    def reused_results(self, resultsdir: Path) -> ingest.TranslationResults | None:
+        """The results (notably static measurements) of the translation that
+        `resultsdir` reused, if it reused one and that translation recorded them."""
+        with self._lock:
+            claim = self._reused.get(resultsdir)
+        return None if claim is None else claim.results
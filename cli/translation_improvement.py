@@ -2,8 +2,15 @@ import os
 import json
 
 import time
+import dataclasses
+import functools
+import queue
 import shutil
+import subprocess
 import tempfile
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
 from typing import Callable
 from subprocess import CompletedProcess
@@ -13,6 +20,7 @@ from tenj_types import ResolvedPath
 
 import click
 
+import codebase_snapshots
 import ingest_tracking
 import hermetic
 from speculative_rewriters import (
@@ -458,8 +466,154 @@ def run_whiteout_clippy_no_effect_paths(root: Path, dir: Path) -> None:
     rewriter.erase_spans()
 
 
-def run_trivial_numeric_casts_improvement(root: Path, dir: Path) -> None:
-    """Remove trivial numeric casts, as reported by clippy."""
+type _EditRanges = tuple[tuple[int, int], ...]
+"""A set of edit numbers, as sorted, non-adjacent half-open ranges."""
+
+
+def _with_range(ranges: _EditRanges, lo: int, hi: int) -> _EditRanges:
+    merged: list[tuple[int, int]] = []
+    for r_lo, r_hi in sorted((*ranges, (lo, hi))):
+        if merged and merged[-1][1] == r_lo:
+            merged[-1] = (merged[-1][0], r_hi)
+        else:
+            merged.append((r_lo, r_hi))
+    return tuple(merged)
+
+
+def _edits_in(ranges: _EditRanges) -> frozenset[int]:
+    return frozenset(i for lo, hi in ranges for i in range(lo, hi))
+
+
+@dataclasses.dataclass(frozen=True)
+class _BisectState:
+    """A point in the halving search done by `bisect_good_edits`. Immutable, so
+    that the search can be forked to explore hypothetical probe outcomes."""
+
+    applied: _EditRanges
+    todo: tuple[tuple[int, int], ...]
+    """Ranges of edits still to try, innermost last."""
+    bad: tuple[int, ...]
+
+    @staticmethod
+    def start(num_edits: int) -> "_BisectState":
+        return _BisectState(applied=(), todo=((0, num_edits),) if num_edits else (), bad=())
+
+    def next_probe(self) -> _EditRanges | None:
+        """The set of edits to check next, or None when the search is done."""
+        if not self.todo:
+            return None
+        lo, hi = self.todo[-1]
+        return _with_range(self.applied, lo, hi)
+
+    def after(self, ok: bool) -> "_BisectState":
+        """The state after `next_probe()` was found to be `ok` or not."""
+        (lo, hi), rest = self.todo[-1], self.todo[:-1]
+        if ok:
+            return _BisectState(_with_range(self.applied, lo, hi), rest, self.bad)
+        if hi - lo == 1:
+            return _BisectState(self.applied, rest, (*self.bad, lo))
+        mid = lo + (hi - lo) // 2
+        # The first half is tried first, on top of the previously accepted edits.
+        return _BisectState(self.applied, (*rest, (mid, hi), (lo, mid)), self.bad)
+
+
+def bisect_good_edits(
+    num_edits: int, check: Callable[[frozenset[int]], bool]
+) -> tuple[list[int], frozenset[int]]:
+    """Finds a set of edits (numbered 0 to `num_edits - 1`) that can be applied together.
+
+    `check(applied)` says whether the code is acceptable with exactly the edits in
+    `applied`. Edits are tried all at once; if that fails, each half is tried in
+    turn (on top of whatever the earlier halves contributed), down to single
+    edits. Returns the rejected edits and the set of edits to apply.
+    """
+    state = _BisectState.start(num_edits)
+    while (probe := state.next_probe()) is not None:
+        state = state.after(check(_edits_in(probe)))
+    return list(state.bad), _edits_in(state.applied)
+
+
+def speculative_bisect_good_edits(
+    num_edits: int, probe: Callable[[frozenset[int]], bool], jobs: int
+) -> tuple[list[int], frozenset[int]]:
+    """Same result as `bisect_good_edits(num_edits, probe)`, but running up to
+    `jobs` probes at a time (`probe` must be safe to call from several threads).
+
+    Whenever the search is waiting on a probe, the probes it could need next,
+    under either outcome of the probes not yet finished, are started
+    speculatively. The search itself only advances on the results of exactly
+    the probes the serial search would make, so the outcome is identical.
+    """
+    known: dict[_EditRanges, bool] = {}
+
+    def upcoming_probes(state: _BisectState, limit: int) -> list[_EditRanges]:
+        """Probes the search may need soon, nearest first: a breadth-first walk
+        over the outcomes of probes whose results aren't known yet."""
+        found: list[_EditRanges] = []
+        frontier: deque[_BisectState] = deque([state])
+        visited = 0
+        while frontier and len(found) < limit and visited < 64 * limit:
+            visited += 1
+            node = frontier.popleft()
+            candidate = node.next_probe()
+            if candidate is None:
+                continue
+            if candidate in known:
+                frontier.append(node.after(known[candidate]))
+                continue
+            if candidate not in found:
+                found.append(candidate)
+            # Probes are mostly made after a failure, so explore that outcome first.
+            frontier.append(node.after(False))
+            frontier.append(node.after(True))
+        return found
+
+    state = _BisectState.start(num_edits)
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        running: dict[_EditRanges, Future[bool]] = {}
+        while (needed := state.next_probe()) is not None:
+            if needed in known:
+                state = state.after(known[needed])
+                continue
+
+            busy = sum(not f.done() for f in running.values())
+            for candidate in upcoming_probes(state, limit=busy + jobs):
+                if busy >= jobs:
+                    break
+                if candidate not in running:
+                    running[candidate] = executor.submit(probe, _edits_in(candidate))
+                    busy += 1
+
+            wait(running.values(), return_when=FIRST_COMPLETED)
+            for candidate, future in list(running.items()):
+                if future.done():
+                    known[candidate] = future.result()
+                    del running[candidate]
+
+        for future in running.values():
+            future.cancel()
+
+    return list(state.bad), _edits_in(state.applied)
+
+
+def remove_trivial_cast(content: bytes, start: int, end: int) -> bytes:
+    """Blanks out the ` as T` part of the cast spanning `content[start:end]`,
+    padding with spaces so that other spans' offsets stay valid."""
+    original_snippet = content[start:end]
+    as_index = original_snippet.find(b" as ")
+    if as_index == -1:
+        return content
+    value_part = original_snippet[:as_index]
+    padding = b" " * (len(original_snippet) - len(value_part))
+    return content[:start] + value_part + padding + content[end:]
+
+
+def run_trivial_numeric_casts_improvement(root: Path, dir: Path, jobs: int = 1) -> None:
+    """Remove trivial numeric casts, as reported by clippy.
+
+    With `jobs > 1`, candidate removals are checked concurrently in scratch
+    copies of the crate; the casts removed are the same as with `jobs == 1`.
+    """
 
     # Stats
     cargo_check_runs = 0
@@ -574,17 +728,9 @@ def run_trivial_numeric_casts_improvement(root: Path, dir: Path) -> None:
 
             def create_replacer(span_to_replace: dict):
                 def replacer(content: bytes) -> bytes:
-                    start = span_to_replace["byte_start"]
-                    end = span_to_replace["byte_end"]
-                    original_snippet = content[start:end]
-
-                    as_index = original_snippet.find(b" as ")
-                    if as_index != -1:
-                        value_part = original_snippet[:as_index]
-                        padding = b" " * (len(original_snippet) - len(value_part))
-                        new_snippet = value_part + padding
-                        return content[:start] + new_snippet + content[end:]
-                    return content
+                    return remove_trivial_cast(
+                        content, span_to_replace["byte_start"], span_to_replace["byte_end"]
+                    )
 
                 return replacer
 
@@ -601,31 +747,64 @@ def run_trivial_numeric_casts_improvement(root: Path, dir: Path) -> None:
     def span_to_tuple(span) -> tuple[str, int, int]:
         return (span["file_name"], span["byte_start"], span["byte_end"])
 
+    def check_in_place(casts: list[dict], applied: frozenset[int]) -> bool:
+        rewriters = apply_removals([casts[i] for i in sorted(applied)])
+        ok = run_check(dir)
+        revert_removals(rewriters)
+        return ok
+
+    def check_in_scratch_copies(casts: list[dict]) -> tuple[list[int], frozenset[int]]:
+        stats_lock = threading.Lock()
+        file_names = sorted({span["file_name"] for span in casts})
+        base_contents = {name: (dir / name).read_bytes() for name in file_names}
+
+        with tempfile.TemporaryDirectory(prefix=f"_{dir.name}_casts_", dir=dir.parent) as tmp:
+            # Each worker gets its own copy of the crate, and its own target directory,
+            # so cargo runs don't contend for a target-directory lock, and each keeps
+            # its own incremental state from one probe to the next. The crate's own
+            # `target` isn't copied: cargo keys incremental state by package path,
+            # so it wouldn't help, and without reflinks it would cost a full copy.
+            scratch_dirs: queue.Queue[tuple[Path, list[str], dict[str, str]]] = queue.Queue()
+            for i in range(jobs):
+                scratch = Path(tmp) / f"{i}" / dir.name
+                codebase_snapshots.snapshot_tree(dir, scratch, exclude=frozenset({"target"}))
+                cmd, env = hermetic.cargo_invocation_for_translated_code(["check"], scratch)
+                env["CARGO_TARGET_DIR"] = str(Path(tmp) / f"{i}" / "target")
+                scratch_dirs.put((scratch, cmd, env))
+
+            def probe(applied: frozenset[int]) -> bool:
+                nonlocal cargo_check_runs, cargo_check_failures
+                scratch, cmd, env = scratch_dirs.get()
+                try:
+                    for name in file_names:
+                        content = base_contents[name]
+                        for i in applied:
+                            if casts[i]["file_name"] == name:
+                                content = remove_trivial_cast(
+                                    content, casts[i]["byte_start"], casts[i]["byte_end"]
+                                )
+                        (scratch / name).write_bytes(content)
+                    cp = subprocess.run(cmd, cwd=scratch, env=env, check=False, capture_output=True)
+                finally:
+                    scratch_dirs.put((scratch, cmd, env))
+                with stats_lock:
+                    cargo_check_runs += 1
+                    if cp.returncode != 0:
+                        cargo_check_failures += 1
+                return cp.returncode == 0
+
+            return speculative_bisect_good_edits(len(casts), probe, jobs)
+
     def find_all_bad_and_apply_good(casts: list[dict]) -> list[dict]:
         if not casts:
             return []
 
-        rewriters = apply_removals(casts)
-        if run_check(dir):
-            # All good, leave applied.
-            return []
-
-        revert_removals(rewriters)
-
-        if len(casts) == 1:
-            return casts
-
-        mid = len(casts) // 2
-        h1 = casts[:mid]
-        h2 = casts[mid:]
-
-        bad1 = find_all_bad_and_apply_good(h1)
-        # Good ones from h1 are now applied.
-
-        bad2 = find_all_bad_and_apply_good(h2)
-        # Good ones from h2 are now applied.
-
-        return bad1 + bad2
+        if jobs > 1 and len(casts) > 1:
+            bad, applied = check_in_scratch_copies(casts)
+        else:
+            bad, applied = bisect_good_edits(len(casts), functools.partial(check_in_place, casts))
+        apply_removals([casts[i] for i in sorted(applied)])
+        return [casts[i] for i in bad]
 
     removed_count = 0
     known_failing_spans: set[tuple[str, int, int]] = set()
@@ -661,7 +840,12 @@ def elapsed_ms_of_ns(start_ns: int, end_ns: int) -> float:
 
 
 def run_improvement_passes(
-    root: Path, output: Path, resultsdir: Path, cratename: str, tracker: ingest_tracking.TimingRepo
+    root: Path,
+    output: Path,
+    resultsdir: Path,
+    cratename: str,
+    tracker: ingest_tracking.TimingRepo,
+    jobs: int = 1,
 ):
     def run_cargo_fmt(_root: Path, dir: Path) -> CompletedProcess:
         cp1 = hermetic.run_cargo_in(
@@ -731,13 +915,26 @@ def run_improvement_passes(
         # Numeric cast removal should come before `clippy fix` because the latter
         # can collapse literal casts into suffixed literals, which won't be counted
         # as fixable.
-        ("trivial-numeric-casts", run_trivial_numeric_casts_improvement),
+        (
+            "trivial-numeric-casts",
+            lambda root, dir: run_trivial_numeric_casts_improvement(root, dir, jobs),
+        ),
         ("clippy-fix", run_cargo_clippy_fix),
         ("clippy-whiteout-no-effect-paths", run_whiteout_clippy_no_effect_paths),
         ("trim-allows", run_trim_allows),
         ("fmt", run_cargo_fmt),
     ]
 
+    # XJ_IMPROVE_WARM_CARGO=1 runs the post-pass `cargo check`s in one mirror
+    # directory with a persistent target dir, rather than from scratch in each
+    # pass directory.
+    warm_check_dir: Path | None = None
+    if os.environ.get("XJ_IMPROVE_WARM_CARGO", "0") == "1":
+        warm_check_dir = resultsdir / "_improvement_cargo_check"
+        if warm_check_dir.exists():
+            shutil.rmtree(warm_check_dir)
+
+    cleanup_ms_total = 0
     prev = output
     for counter, (tag, func) in enumerate(improvement_passes, start=1):
         newdir = resultsdir / f"{counter:02d}_{tag}"
@@ -759,8 +956,22 @@ def run_improvement_passes(
             # The output of synsub is assumed to be type-correct but not necessarily
             # borrowck-correct, so we only run `cargo check` on passes after the first.
             if counter > 1:
-                # Use explicit toolchain for checks because c2rust may use extern_types which is unstable.
-                quiet_cargo(["check"], cwd=newdir)
+                if warm_check_dir is not None:
+                    # Check a stable mirror of `newdir`, so that its dependencies and
+                    # incremental state stay valid from one pass to the next.
+                    mirror = warm_check_dir / "crate"
+                    codebase_snapshots.sync_tree(newdir, mirror, exclude=frozenset({"target"}))
+                    quiet_cargo(
+                        ["check"],
+                        cwd=mirror,
+                        env_ext={
+                            "CARGO_TARGET_DIR": str(warm_check_dir / "target"),
+                            "CARGO_INCREMENTAL": "1",
+                        },
+                    )
+                else:
+                    # Use explicit toolchain for checks because c2rust may use extern_types which is unstable.
+                    quiet_cargo(["check"], cwd=newdir)
                 # Clean up the target directory so the next pass starts fresh.
                 quiet_cargo(
                     [
@@ -778,6 +989,7 @@ def run_improvement_passes(
 
             core_ms = round(elapsed_ms_of_ns(start_ns, mid_ns))
             cleanup_ms = round(elapsed_ms_of_ns(mid_ns, end_ns))
+            cleanup_ms_total += cleanup_ms
 
             print(
                 "Improvement pass",
@@ -793,3 +1005,8 @@ def run_improvement_passes(
             print()
             print()
             prev = newdir
+
+    print(
+        f"TENJIN: Improvement passes spent {cleanup_ms_total} ms in post-pass cargo check and cleanup"
+        f" ({'warm shared' if warm_check_dir is not None else 'per-pass'} target directory)."
+    )
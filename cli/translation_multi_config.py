@@ -4,6 +4,7 @@ from dataclasses_json import dataclass_json
 import glob
 import json
 import shutil
+import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from itertools import product
 from pathlib import Path
@@ -15,6 +16,7 @@ import toml
 import hermetic
 import translation
 from tenj_types import UserFacingError
+from translation_dedup import TranslationDedup
 
 """
 This module implements configurability for translated rust codebases, i.e.
@@ -453,12 +455,13 @@ def translate_one_combo(
     translation_flags: translation.TranslationFlags,
     guidance_str: str,
     combo: dict,
+    dedup: TranslationDedup | None = None,
 ) -> tuple[str, bool, str]:
     name = combo_dirname(combo)
     combo_resultsdir = translation_flags.resultsdir / name
     combo_defines = [f"{k}={cmake_value(v)}" for k, v in combo.items()]
     all_defines = list(translation_flags.cmake_defines) + combo_defines
-    combo_flags = translation_flags.for_combo(combo_resultsdir, all_defines)
+    combo_flags = translation_flags.for_combo(combo_resultsdir, all_defines, dedup)
     try:
         translation.do_translate(
             combo_flags,
@@ -475,25 +478,40 @@ def run_all_combos(
     jobs: int,
     combos: list[dict],
 ) -> list[tuple[str, bool, str]]:
+    # Combos whose prepared codebases are identical share one translation.
+    dedup = TranslationDedup()
+    start_ns = time.monotonic_ns()
     results: list[tuple[str, bool, str]] = []
+    reused: list[tuple[str, int]] = []
+
+    def timed_translate_one_combo(combo: dict) -> tuple[tuple[str, bool, str], int]:
+        combo_start_ns = time.monotonic_ns()
+        result = translate_one_combo(translation_flags, guidance_str, combo, dedup)
+        return result, (time.monotonic_ns() - combo_start_ns) // 1_000_000
+
     with ThreadPoolExecutor(max_workers=jobs) as executor:
-        futures = {
-            executor.submit(
-                translate_one_combo,
-                translation_flags,
-                guidance_str,
-                combo,
-            ): combo
-            for combo in combos
-        }
+        futures = {executor.submit(timed_translate_one_combo, combo): combo for combo in combos}
         for future in as_completed(futures):
-            name, ok, err = future.result()
+            (name, ok, err), elapsed_ms = future.result()
             results.append((name, ok, err))
             status = "OK" if ok else "FAILED"
-            click.echo(f"  [{status}] {name}")
+            note = f"{elapsed_ms / 1000:.1f} s"
+            reused_from = dedup.reused_by((translation_flags.resultsdir / name).resolve())
+            if ok and reused_from is not None:
+                leader, saved_ms = reused_from
+                reused.append((name, saved_ms))
+                note += f"; reused translation of {leader.name}, saving ~{saved_ms / 1000:.1f} s"
+            click.echo(f"  [{status}] {name} ({note})")
             if not ok and err:
                 for line in err.splitlines()[:10]:
                     click.echo(f"    {line}", err=True)
+
+    total_ms = (time.monotonic_ns() - start_ns) // 1_000_000
+    saved_ms = sum(ms for _name, ms in reused)
+    click.echo(
+        f"Translated {len(combos)} combos in {total_ms / 1000:.1f} s;"
+        f" {len(reused)} reused another combo's translation, saving ~{saved_ms / 1000:.1f} s."
+    )
     return results
 
 
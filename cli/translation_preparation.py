@@ -3,6 +3,7 @@ import platform
 import re
 import json
 import shutil
+import sys
 import time
 from pathlib import Path
 from typing import Callable
@@ -11,24 +12,29 @@ import hashlib
 from collections import defaultdict
 import dataclasses
 from enum import Enum
+import functools
 
-from clang.cindex import Cursor, CursorKind  # type: ignore
+from clang.cindex import Cursor, CursorKind, TranslationUnit  # type: ignore
 from cmake_file_api import CMakeProject
 import click
 
 from codehawk import CodehawkSummary
 import compilation_database
 import batching_rewriter
+import codebase_snapshots
 import c_refact
 import c_refact_decl_splitter
 import c_refact_knr
 import c_refact_tag_hoister
 import c_refact_type_mod_replicator
+import cclyzer_cache
 from c_refact_identify_mains import translation_unit_has_main
 import cindex_helpers
+import decl_index
 import hermetic
 import repo_root
 import ingest_tracking
+import intercept_exec
 import llvm_bitcode_linking
 import targets_from_intercept
 from targets import BuildInfo, TargetType
@@ -57,7 +63,7 @@ def run_modifying_subprocess_or_restore_prev(
         assert prev.is_dir(), f"Expected previous preparation output to be a directory: {prev}"
         if current_codebase.exists():
             shutil.rmtree(current_codebase)
-        shutil.copytree(prev, current_codebase)
+        codebase_snapshots.snapshot_tree(prev, current_codebase)
 
     try:
         cp = run_subprocess()
@@ -214,6 +220,7 @@ def compute_build_info_in(
             check=True,
             env_ext={
                 "BUILD_COMMANDS_DIRECTORY": str(buildcmds),
+                **intercept_exec.fast_path_env_ext(),
             },
             # capture_output=True,
         )
@@ -281,6 +288,7 @@ def compute_build_info_in(
         env_ext={
             "BUILD_COMMANDS_DIRECTORY": str(buildcmds),
             "pre-Tenjin PATH prefix": [str(cc_ld_intercept_dir)],
+            **intercept_exec.fast_path_env_ext(),
         },
     )
     click.secho(f"))) `{buildcmd}` finished ", nl=False, fg="cyan", bold=True)
@@ -424,10 +432,13 @@ def copy_codebase(pristine: Path, newdir: Path):
 def copy_codebase_dir(
     src: Path,
     dst: Path,
-):
-    """Copy the original codebase (directory) to a new directory."""
+) -> codebase_snapshots.SnapshotStats:
+    """Copy the original codebase (directory) to a new directory.
+
+    File contents are shared with `src` via reflinks where possible;
+    see `codebase_snapshots.snapshot_tree`."""
     assert src.is_dir()
-    shutil.copytree(src, dst)
+    stats = codebase_snapshots.snapshot_tree(src, dst)
 
     # Remove stale compile_commands.json if present; they should be
     # regenerated in the new location as needed.
@@ -435,6 +446,8 @@ def copy_codebase_dir(
     if compdb_path.exists():
         compdb_path.unlink()
 
+    return stats
+
 
 type QUSS = c_refact_type_mod_replicator.QuasiUniformSymbolSpecifier
 type QUSS_is_defn = bool
@@ -473,11 +486,68 @@ def function_signature_span_end(cursor: Cursor) -> int:
     return cursor_end_offset
 
 
+def decl_facts_of_tu(tu: TranslationUnit, current_codebase: Path) -> decl_index.TUDeclFacts:
+    """The facts about `tu`'s top-level declarations that `collect_decls_by_rel_tu` needs,
+    in a form that can be returned from a worker process and stored in the `decl_index`."""
+
+    def rel_or_abs(p: FilePathStr) -> FilePathStr:
+        if Path(p).is_relative_to(current_codebase):
+            return Path(p).relative_to(current_codebase).as_posix()
+        return p
+
+    decls: list[decl_index.DeclFact] = []
+    macro_inst_ranges: dict[tuple[int, FilePathStr], int] = {}
+    for cursor in tu.cursor.get_children():
+        if cursor.kind == CursorKind.MACRO_INSTANTIATION:
+            inst_loc = (cursor.extent.start.offset, cursor.location.file.name)
+            macro_inst_ranges[inst_loc] = cursor.extent.end.offset
+            continue
+
+        # When we run this pass before expanding the preprocessor,
+        # cursor.location can reflect header file locations.
+        if not (cursor.kind.is_declaration() and cursor.location.file):
+            continue
+        file_name = cursor.location.file.name
+        if not Path(file_name).is_relative_to(current_codebase):
+            assert not Path(file_name).is_relative_to(current_codebase.parent), (
+                f"Unexpected path: {file_name} not relative to {current_codebase=}"
+            )
+            continue
+
+        is_fn_defn = cursor.kind == CursorKind.FUNCTION_DECL and cursor.is_definition()
+        # Include macro instantiations adjacent to the end of the definition.
+        # This is intended to handle cases like the argument list of a function
+        # declaration being wrapped in a macro, as seen in `zlib.h`.
+        # It will break on code which hides declaration separators inside macro expansions.
+        cursor_end_offset = cursor.extent.end.offset
+        macro_adjusted_end = macro_inst_ranges.get(
+            (cursor_end_offset, file_name), cursor_end_offset
+        )
+        decls.append(
+            decl_index.DeclFact(
+                kind=cursor.kind.name,
+                spelling=cursor.spelling,
+                quss=c_refact_type_mod_replicator.quss(cursor, None),
+                rel_file=rel_or_abs(file_name),
+                start=cursor.extent.start.offset,
+                end=cursor_end_offset,
+                macro_adjusted_end=macro_adjusted_end,
+                signature_end=function_signature_span_end(cursor) if is_fn_defn else None,
+                is_definition=cursor.is_definition(),
+                linkage=cursor.linkage.name,
+            )
+        )
+
+    deps = sorted({rel_or_abs(inc.include.name) for inc in tu.get_includes()})
+    return decl_index.TUDeclFacts(decls=decls, deps=deps)
+
+
 def collect_decls_by_rel_tu(
     current_codebase: Path,
     compdb: compilation_database.CompileCommands,
     restricted_to_files: set[FilePathStr] | None = None,
     fn_def_handling: FnDefHandling = FnDefHandling.EXCLUDE,
+    jobs: int = 1,
 ) -> dict[
     RelativeFilePathStr,
     dict[QUSS, list[tuple[RelativeFilePathStr, int, int, FileContentsStr, QUSS_is_defn]]],
@@ -489,16 +559,9 @@ def collect_decls_by_rel_tu(
     so as to e.g. only collect declarations from (a subset of) headers.
     The caller may also specify whether functions should be omitted,
     or included with or without their bodies.
-    """
-
-    def path_of_interest(p: FilePathStr) -> bool:
-        if not Path(p).is_relative_to(current_codebase):
-            assert not Path(p).is_relative_to(current_codebase.parent), (
-                f"Unexpected path: {p} not relative to {current_codebase=}"
-            )
-            return False
-        return restricted_to_files is None or p in restricted_to_files
 
+    TUs are only parsed if the `decl_index` doesn't already know their declarations.
+    """
     header_contents = CachingFileContents()
 
     decls_by_rel_tu: dict[
@@ -509,67 +572,40 @@ def collect_decls_by_rel_tu(
     # Note that the two FilePathStrs here can be different,
     # e.g. the declaration can be in a header file included by the TU file.
 
-    index = cindex_helpers.create_xj_clang_index()
-    tus = c_refact.parse_project(index, compdb)
-    for tu_path, tu in tus.items():
+    facts_by_tu = decl_index.collect_tu_decl_facts(
+        current_codebase,
+        compdb,
+        functools.partial(decl_facts_of_tu, current_codebase=current_codebase),
+        jobs,
+    )
+    for tu_path, facts in facts_by_tu.items():
         assert Path(tu_path).is_relative_to(current_codebase), (
             f"Unexpected TU path: {tu_path} not relative to {current_codebase=}\n{compdb=}"
         )
         rel_tu_path = Path(tu_path).relative_to(current_codebase).as_posix()
-        macro_inst_ranges: dict[tuple[int, FilePathStr], int] = {}
-        for cursor in tu.cursor.get_children():
-            if cursor.kind == CursorKind.MACRO_INSTANTIATION:
-                inst_loc = (cursor.extent.start.offset, cursor.location.file.name)
-                macro_inst_ranges[inst_loc] = cursor.extent.end.offset
+        for decl in facts.decls:
+            file_path = (current_codebase / decl.rel_file).as_posix()
+            if restricted_to_files is not None and file_path not in restricted_to_files:
                 continue
 
-            # print(
-            #     "PPRC: Visiting cursor:",
-            #     cursor.kind,
-            #     cursor.spelling,
-            #     "is_definition=",
-            #     cursor.is_definition(),
-            #     fn_def_handling,
-            # )
-
-            # When we run this pass before expanding the preprocessor,
-            # cursor.location can reflect header file locations.
-            if (
-                cursor.kind.is_declaration()
-                and cursor.location.file
-                and path_of_interest(cursor.location.file.name)
-            ):
-                q = c_refact_type_mod_replicator.quss(cursor, None)
-                # print("Recording declaration:", cursor.spelling)
-                # print("   Kind:", cursor.kind)
-                # print("   QUSS:", q)
-                # print("   From location:", cursor.location.file.name)
-                # print("   found in TU:", tu_path)
-                cursor_end_offset = cursor.extent.end.offset
-                if cursor.kind == CursorKind.FUNCTION_DECL and cursor.is_definition():
-                    if fn_def_handling == FnDefHandling.EXCLUDE:
-                        continue
-                    if fn_def_handling == FnDefHandling.INCLUDE_DECL_ONLY:
-                        cursor_end_offset = function_signature_span_end(cursor)
-                else:
-                    # Include macro instantiations adjacent to the end of the definition.
-                    # This is intended to handle cases like the argument list of a function
-                    # declaration being wrapped in a macro, as seen in `zlib.h`.
-                    # It will break on code which hides declaration separators inside macro expansions.
-                    cursor_end_loc = (cursor_end_offset, cursor.location.file.name)
-                    if cursor_end_loc in macro_inst_ranges:
-                        cursor_end_offset = macro_inst_ranges[cursor_end_loc]
-
-                relative = Path(cursor.location.file.name).relative_to(current_codebase)
-                decls_by_rel_tu.setdefault(rel_tu_path, {}).setdefault(q, []).append((
-                    relative.as_posix(),
-                    cursor.extent.start.offset,
-                    cursor_end_offset,
-                    header_contents.get_bytes(cursor.location.file.name)[
-                        cursor.extent.start.offset : cursor_end_offset
-                    ].decode("utf-8"),
-                    cursor.is_definition(),
-                ))
+            cursor_end_offset = decl.macro_adjusted_end
+            if decl.kind == CursorKind.FUNCTION_DECL.name and decl.is_definition:
+                if fn_def_handling == FnDefHandling.EXCLUDE:
+                    continue
+                cursor_end_offset = decl.end
+                if fn_def_handling == FnDefHandling.INCLUDE_DECL_ONLY:
+                    assert decl.signature_end is not None
+                    cursor_end_offset = decl.signature_end
+
+            decls_by_rel_tu.setdefault(rel_tu_path, {}).setdefault(decl.quss, []).append((
+                decl.rel_file,
+                decl.start,
+                cursor_end_offset,
+                header_contents.get_bytes(file_path)[decl.start : cursor_end_offset].decode(
+                    "utf-8"
+                ),
+                decl.is_definition,
+            ))
     return decls_by_rel_tu
 
 
@@ -724,6 +760,86 @@ def expand_overlapping_decl_header_entries(
     return expanded_entries
 
 
+def coverage_replay_stage(output: str) -> int:
+    """Object files are built first (0), then archives and shared libraries (1),
+    then everything else, which is assumed to be executables (2)."""
+    if output.endswith(".o"):
+        return 0
+    if output.endswith(".a") or targets_from_intercept.shared_object_basename(output):
+        return 1
+    return 2
+
+
+def coverage_replay_batches(
+    commands: list[compilation_database.CompileCommand],
+) -> list[list[compilation_database.CompileCommand]]:
+    """Groups the commands of a (profiled) build into batches whose commands can
+    run concurrently, such that running the batches in order respects dependencies.
+
+    Batches follow `coverage_replay_stage`. Archives and shared libraries can depend
+    on each other in ways that their arguments don't spell out (`-L. -lfoo`, response
+    files), so they run one at a time, in `commands` order. Among object files and
+    among executables, a command that names another command's output among its
+    arguments goes in a later batch, and commands that write the same output run in
+    `commands` order. As in the original build, only the first command for each
+    executable is replayed. Commands without an output are skipped.
+    Each batch keeps `commands` order.
+    """
+
+    def abs_of(cmd: compilation_database.CompileCommand, path: str) -> str:
+        return os.path.normpath(os.path.join(cmd.directory, path))
+
+    to_replay: list[compilation_database.CompileCommand] = []
+    executable_outputs: set[str] = set()
+    for cmd in commands:
+        if cmd.output is None:
+            continue
+        if coverage_replay_stage(cmd.output) == 2:
+            if cmd.output in executable_outputs:
+                continue
+            executable_outputs.add(cmd.output)
+        to_replay.append(cmd)
+
+    producers_of: defaultdict[str, list[compilation_database.CompileCommand]] = defaultdict(list)
+    for cmd in to_replay:
+        assert cmd.output is not None
+        producers_of[abs_of(cmd, cmd.output)].append(cmd)
+
+    level_of: dict[int, tuple[int, int]] = {}
+    libraries = [cmd for cmd in to_replay if cmd.output and coverage_replay_stage(cmd.output) == 1]
+    for position, cmd in enumerate(libraries):
+        level_of[id(cmd)] = (1, position)
+
+    def level(cmd: compilation_database.CompileCommand) -> tuple[int, int]:
+        if id(cmd) not in level_of:
+            assert cmd.output is not None
+            stage = coverage_replay_stage(cmd.output)
+            level_of[id(cmd)] = (stage, 0)  # Guards against cyclic references.
+            output = abs_of(cmd, cmd.output)
+            depth = 0
+            for earlier_writer in producers_of[output]:
+                if earlier_writer is cmd:
+                    break
+                depth = max(depth, level(earlier_writer)[1] + 1)
+            for arg in cmd.arguments or []:
+                path = abs_of(cmd, arg)
+                if path == output:
+                    continue  # E.g. `ar rcs libfoo.a ...`; ordered with its earlier writers.
+                for producer in producers_of.get(path, []):
+                    producer_stage, producer_depth = level(producer)
+                    if producer_stage == stage:
+                        depth = max(depth, producer_depth + 1)
+            level_of[id(cmd)] = (stage, depth)
+        return level_of[id(cmd)]
+
+    batches: defaultdict[tuple[int, int], list[compilation_database.CompileCommand]] = defaultdict(
+        list
+    )
+    for cmd in to_replay:
+        batches[level(cmd)].append(cmd)
+    return [batches[key] for key in sorted(batches)]
+
+
 @dataclasses.dataclass
 class PrepPassResultStore:
     items_defined_by_headers: dict[
@@ -816,42 +932,27 @@ def run_preparation_passes(
 
         cmd_for_output: dict[str, compilation_database.CompileCommand] = {}
 
-        def runcmd(cmd: compilation_database.CompileCommand):
-            assert cmd.arguments
-            # Each command is replayed from the directory it was originally
-            # captured in. Unlike pass 01 (which invokes the user's build system
-            # and can be pointed at the original input codebase), these are
-            # individual captured compile/link commands that embed build-directory
-            # -relative paths (e.g. `-MF foo.p/bar.o.d`, `-I builddir/...`), so they
-            # can only be replayed from the build directory.
-            hermetic.run(
-                cmd.arguments,
-                cwd=cmd.directory,
-                check=True,
-            )
-            assert cmd.output is not None
-            cmd_for_output[cmd.output] = cmd
-
-        # First, build all object files
-        for cmd in profile_compdb.commands:
-            if cmd.output is not None and cmd.output.endswith(".o"):
-                runcmd(cmd)
-
-        # Then, all shared libraries
-        for cmd in profile_compdb.commands:
-            if cmd.output is not None and (
-                targets_from_intercept.shared_object_basename(cmd.output) is not None
-            ):
-                runcmd(cmd)
-
-        # Then all remaining commands, which are assumed to be executables
-        for cmd in profile_compdb.commands:
-            if cmd.output is not None and cmd.output not in cmd_for_output:
-                print(f"Running command for executable output: {cmd.output}")
-                print(f"  Command arguments: {cmd.arguments}")
-                runcmd(cmd)
-
-        # TODO: run the above steps in parallel batches
+        # Each command is replayed from the directory it was originally
+        # captured in. Unlike pass 01 (which invokes the user's build system
+        # and can be pointed at the original input codebase), these are
+        # individual captured compile/link commands that embed build-directory
+        # -relative paths (e.g. `-MF foo.p/bar.o.d`, `-I builddir/...`), so they
+        # can only be replayed from the build directory.
+        for batch in coverage_replay_batches(profile_compdb.commands):
+            specs: list[tuple[hermetic.RunSpec, Path | str]] = []
+            for cmd in batch:
+                assert cmd.arguments
+                specs.append((cmd.arguments, cmd.directory))
+            cps = hermetic.run_many(specs, translation_flags.jobs)
+            for cmd, cp in zip(batch, cps):
+                assert cmd.output is not None
+                if coverage_replay_stage(cmd.output) == 2:
+                    print(f"Running command for executable output: {cmd.output}")
+                    print(f"  Command arguments: {cmd.arguments}")
+                sys.stdout.write(cp.stdout.decode("utf-8", errors="replace"))
+                sys.stderr.write(cp.stderr.decode("utf-8", errors="replace"))
+                cp.check_returncode()
+                cmd_for_output[cmd.output] = cmd
 
         built_cov = Path(current_codebase.parent / "_built_cov")
         built_cov.mkdir(exist_ok=True)
@@ -1006,27 +1107,6 @@ def run_preparation_passes(
                 "TENJIN: NOTE: Skipping localization of mutable globals for multi-target codebase."
             )
 
-    def should_use_cclyzer_cache():
-        # Don't use cached results during parallel tests.
-        return "PYTEST_XDIST_WORKER" not in os.environ
-
-    def get_cached_cclyzer_results(
-        cache_signature: list[str], xj_cclyzer_results_cache_path: Path
-    ) -> dict | None:
-        if xj_cclyzer_results_cache_path.exists():
-            cache_data = json.load(open(xj_cclyzer_results_cache_path, "r", encoding="utf-8"))
-            print("cached  signature:", cache_data["signature"])
-            print("current signature:", cache_signature)
-            if cache_data["signature"] == cache_signature:
-                return cache_data["contents"]
-            if cache_data["signature"][0] == cache_signature[0]:
-                print(
-                    "Bitcode matches cached cclyzer++ results, but flags differ; recomputing analysis..."
-                )
-            else:
-                print("Bitcode differs from cached cclyzer++ results; recomputing analysis...")
-        return None
-
     def run_cc2json_or_cached(bitcode_module_path: Path, current_codebase: Path) -> None:
         """Postcondition: produces `xj-cclyzer.json` in `current_codebase`, containing
         the results of cclyzer++ analysis on the bitcode module.
@@ -1056,15 +1136,17 @@ def run_preparation_passes(
         bitcode_hash = hashlib.sha256(bitcode_module_path.read_bytes()).hexdigest()
         cache_signature = [bitcode_hash, WANT["10j-more-deps"], *cache_relevant_cc2json_flags]
 
-        xj_cclyzer_results_cache_path = repo_root.localdir() / "xj-cclyzer-cache.json"
-        if should_use_cclyzer_cache():
-            cached_results = get_cached_cclyzer_results(
-                cache_signature, xj_cclyzer_results_cache_path
-            )
+        cache = (
+            cclyzer_cache.open_cclyzer_cache() if cclyzer_cache.should_use_cclyzer_cache() else None
+        )
+        if cache is not None:
+            print("cclyzer++ cache signature:", cache_signature)
+            cached_results = cache.lookup(cache_signature)
             if cached_results is not None:
                 print("Reusing cached cclyzer++ analysis results...")
                 json.dump(cached_results, open(json_out_path, "w", encoding="utf-8"), indent=2)
                 return
+            print("No cached cclyzer++ results for this bitcode and these flags.")
 
         print("Running cclyzer++ analysis, this can take a while for larger programs...")
         hermetic.run_command_with_progress(
@@ -1080,13 +1162,9 @@ def run_preparation_passes(
             env_ext={"XJ_USE_LLVM14": "1"},
         )
 
-        if should_use_cclyzer_cache():
+        if cache is not None and json_out_path.exists():
             contents = json.load(open(json_out_path, "r", encoding="utf-8"))
-            json.dump(
-                {"signature": cache_signature, "contents": contents},
-                open(xj_cclyzer_results_cache_path, "w", encoding="utf-8"),
-                indent=2,
-            )
+            cache.store(cache_signature, contents)
 
     def prep_run_cclzyerpp_analysis(prev: Path, current_codebase: Path, store: PrepPassResultStore):
         # For now, we restrict analysis to single-target projects,
@@ -1133,8 +1211,8 @@ def run_preparation_passes(
             all_build_targets[0].key, current_codebase
         )
 
-        all_pgs_cursors = c_refact.compute_globals_and_statics_for_project(
-            compdb, statics_only=True
+        all_pgs = c_refact.compute_named_globals_and_statics_for_project(
+            compdb, statics_only=True, jobs=translation_flags.jobs
         )
         # Sharing the same name/spelling is orthogonal to whether two cursors
         # refer to the same entity. Two identically-named statics in different
@@ -1148,7 +1226,6 @@ def run_preparation_passes(
         # So we map USRs to unique names, and track which USRs we've seen,
         # skipping any duplicates.
 
-        all_pgs = [c_refact.mk_NamedDeclInfo(c) for c in all_pgs_cursors]
         current_codebase_dir = current_codebase.as_posix()
         for g_s in all_pgs:
             assert g_s.file_path is not None, f"Expected file_path for global/static: {g_s}"
@@ -1272,35 +1349,18 @@ def run_preparation_passes(
             all_build_targets[0].key, current_codebase
         )
 
-        all_pgs_cursors = c_refact.compute_globals_and_statics_for_project(
-            compdb, statics_only=True
-        )
+        # Static functions declared `inline`; uniquification gave each a `_xjtr_N` suffix.
+        all_pgs_static_inline_funcs = [
+            info
+            for infos in c_refact.map_project_tus(
+                compdb, c_refact.named_static_inline_fns_of_tu, translation_flags.jobs
+            ).values()
+            for info in infos
+        ]
 
         def is_unique_name(name: tenj_types.CIdentifier) -> bool:
             return "_xjtr_" in name and name[-1].isdigit()
 
-        def is_static_inline_function(cursor: Cursor) -> bool:
-            """Note that all cursors returned by `compute_globals_and_statics_for_project`
-            are either static or global, so we don't need to check for static-ness separately."""
-            if cursor.kind != CursorKind.FUNCTION_DECL:
-                return False
-            for token in cursor.get_tokens():
-                if token.spelling == cursor.spelling:
-                    break  # didn't see `inline` before the function name.
-                if token.spelling in (
-                    "inline",
-                    "__inline",
-                    "__inline__",
-                    "__always_inline__",
-                    "always_inline",
-                ):
-                    return True
-            return False
-
-        all_pgs_static_inline_funcs = [
-            c_refact.mk_NamedDeclInfo(c) for c in all_pgs_cursors if is_static_inline_function(c)
-        ]
-
         for g_s in all_pgs_static_inline_funcs:
             assert is_unique_name(g_s.spelling), (
                 f"Expected unique name for static inline function: {g_s.spelling}"
@@ -1857,11 +1917,14 @@ def run_preparation_passes(
                 compdb,
                 restricted_to_files=local_header_paths,
                 fn_def_handling=FnDefHandling.INCLUDE_BODY,
+                jobs=translation_flags.jobs,
             )
         )
 
         # Miscellaneous tasks over, onwards with preprocessor expansion!
-        c_refact.preprocess_build(store.build_info, all_build_targets[0], current_codebase)
+        c_refact.preprocess_build(
+            store.build_info, all_build_targets[0], current_codebase, jobs=translation_flags.jobs
+        )
         # build_info now marked to use preprocessed files, so re-generate compdb
         new_compdb: compilation_database.CompileCommands = (
             store.build_info.compdb_for_target_within(all_build_targets[0].key, current_codebase)
@@ -1874,6 +1937,7 @@ def run_preparation_passes(
             current_codebase,
             new_compdb,
             fn_def_handling=FnDefHandling.INCLUDE_BODY,
+            jobs=translation_flags.jobs,
         )
         print(
             f"Collected declarations after preprocessing: {len(store.items_defined_after_pp)} TUs"
@@ -2214,6 +2278,7 @@ def run_preparation_passes(
             all_build_targets[0],
             current_codebase,
             consolidation_data_by_rel_tu=store.consolidation_data_by_rel_tu,
+            jobs=translation_flags.jobs,
         )
         # build_info now marked to use refolded files, for future steps
 
@@ -2269,15 +2334,17 @@ def run_preparation_passes(
         newdir = resultsdir_abs / f"c_{counter:02d}_{tag}"
         with tracker.tracking(f"preparation_pass_{counter:02d}_{tag}", newdir) as step:
             start_ns = time.perf_counter_ns()
+            snapshot_note = ""
             if counter > 0:
-                copy_codebase_dir(prev, newdir)
+                snapshot_stats = copy_codebase_dir(prev, newdir)
+                snapshot_note = f"; snapshot: {snapshot_stats.describe()}"
             cp_or_None: CompletedProcess | None = func(prev, newdir, store)
             if cp_or_None is not None:
                 step.update_sub(cp_or_None)
             end_ns = time.perf_counter_ns()
 
             elapsed_ms = round(elapsed_ms_of_ns(start_ns, end_ns))
-            print(f"Preparation pass {counter} ({tag}) took {elapsed_ms} ms")
+            print(f"Preparation pass {counter} ({tag}) took {elapsed_ms} ms{snapshot_note}")
 
             prev = newdir
 
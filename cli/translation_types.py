@@ -2,6 +2,7 @@ from dataclasses import dataclass
 from pathlib import Path
 
 from tenj_types import ResolvedPath
+from translation_dedup import TranslationDedup
 
 
 @dataclass
@@ -14,6 +15,10 @@ class TranslationFlags:
     do_not_refactor_headers_within: list[ResolvedPath]
     prebuildcmd: str | None
     buildcmd: str | None
+    jobs: int = 1
+    """Bound on parallel per-TU work (parsing, preprocessing, ...) within one translation."""
+    dedup: TranslationDedup | None = None
+    """Shared with concurrent translations of other configurations of the same codebase."""
 
     @classmethod
     def simple(
@@ -36,7 +41,12 @@ class TranslationFlags:
             buildcmd=buildcmd,
         )
 
-    def for_combo(self, resultsdir: Path, cmake_defines: list[str]) -> "TranslationFlags":
+    def for_combo(
+        self,
+        resultsdir: Path,
+        cmake_defines: list[str],
+        dedup: TranslationDedup | None = None,
+    ) -> "TranslationFlags":
         return TranslationFlags(
             root=self.root,
             codebase=self.codebase,
@@ -46,4 +56,7 @@ class TranslationFlags:
             do_not_refactor_headers_within=self.do_not_refactor_headers_within,
             prebuildcmd=self.prebuildcmd,
             buildcmd=self.buildcmd,
+            # Combos are themselves translated `jobs` at a time.
+            jobs=1,
+            dedup=dedup,
         )
@@ -1,6 +1,9 @@
 from pathlib import Path
 import re
+import threading
+import time
 
+import pytest
 from clang.cindex import CursorKind  # type: ignore
 
 import c_refact
@@ -73,6 +76,42 @@ def build_info_for_single_source(codebase: Path, source: Path) -> targets.BuildI
     return build_info
 
 
+def test_named_globals_and_statics_are_identical_with_parallel_parsing(tmp_codebase):
+    tmp_codebase.mkdir()
+    sources = []
+    for i in range(4):
+        source = tmp_codebase / f"tu{i}.c"
+        source.write_text(
+            f"int global{i};\n"
+            f"static int file_static{i} = {i};\n"
+            f"static inline int helper{i}(void) {{ return file_static{i}; }}\n"
+            f"int fn{i}(void) {{ static int counter; return counter++ + helper{i}(); }}\n",
+            encoding="utf-8",
+        )
+        sources.append(source)
+    write_compile_commands_for_sources(tmp_codebase, sources)
+    compdb = compilation_database.CompileCommands.from_json_file(
+        tmp_codebase / "compile_commands.json"
+    )
+
+    serial = c_refact.compute_named_globals_and_statics_for_project(compdb, jobs=1)
+    parallel = c_refact.compute_named_globals_and_statics_for_project(compdb, jobs=3)
+
+    assert serial == parallel
+    assert {info.spelling for info in serial} == {
+        name
+        for i in range(4)
+        for name in (f"global{i}", f"file_static{i}", f"helper{i}", "counter")
+    }
+
+    static_inline_fns = c_refact.map_project_tus(
+        compdb, c_refact.named_static_inline_fns_of_tu, jobs=2
+    )
+    assert sorted(info.spelling for infos in static_inline_fns.values() for info in infos) == [
+        f"helper{i}" for i in range(4)
+    ]
+
+
 def test_cursor_extent_contains_typedef_embedded_struct_definition(tmp_codebase):
     tmp_codebase.mkdir()
     sample_c = tmp_codebase / "sample.c"
@@ -720,3 +759,26 @@ def test_localize_mutable_globals_phase1_skips_direct_calls_to_nontissue_functio
     assert "target(((struct XjGlobals*)0), x)" not in rewritten
     assert "target(((struct XjGlobals*)0), 1)" not in rewritten
     assert "((target)(((struct XjGlobals*)0), 1))" not in rewritten
+
+
+def test_map_per_tu_concurrently_preserves_order_and_reports_earliest_failure():
+    seen_threads: set[int] = set()
+
+    def slow_identity(n: int) -> int:
+        seen_threads.add(threading.get_ident())
+        # Later items finish first, so ordering can't come from completion order.
+        time.sleep(0.01 * (5 - n))
+        return n
+
+    assert c_refact.map_per_tu_concurrently(list(range(5)), slow_identity, jobs=4) == list(range(5))
+    assert len(seen_threads) > 1
+
+    def fail_on_odd(n: int) -> int:
+        time.sleep(0.01 * (5 - n))
+        if n % 2:
+            raise ValueError(n)
+        return n
+
+    for jobs in (1, 4):
+        with pytest.raises(ValueError, match=r"^1$"):
+            c_refact.map_per_tu_concurrently(list(range(5)), fail_on_odd, jobs=jobs)
@@ -0,0 +1,77 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import cclyzer_cache
+
+
+def signature(bitcode: str, *flags: str) -> list[str]:
+    return [bitcode, "more-deps-v1", "--datalog-analysis=unification", *flags]
+
+
+def test_cache_keeps_results_for_several_projects_and_flags(tmp_path: Path):
+    cache = cclyzer_cache.CclyzerCache(tmp_path / "cache", max_bytes=1024 * 1024)
+    cache.store(signature("lua"), {"project": "lua"})
+    cache.store(signature("lua", "--internalize-globals"), {"project": "lua", "internalized": True})
+    cache.store(signature("zlib"), {"project": "zlib"})
+
+    assert cache.lookup(signature("lua")) == {"project": "lua"}
+    assert cache.lookup(signature("lua", "--internalize-globals")) == {
+        "project": "lua",
+        "internalized": True,
+    }
+    assert cache.lookup(signature("zlib")) == {"project": "zlib"}
+    assert cache.lookup(signature("sqlite")) is None
+
+
+def test_cache_evicts_least_recently_used_entries(tmp_path: Path):
+    # Incompressible-ish payloads, so that each entry is a predictable size.
+    payload = {"blob": os.urandom(4096).hex()}
+    cache = cclyzer_cache.CclyzerCache(tmp_path / "cache", max_bytes=1024 * 1024)
+    for name in ("a", "b", "c"):
+        cache.store(signature(name), payload)
+    entry_size = max(st.st_size for _path, st in cache.entries())
+
+    # Make "a" the most recently used, then "c", leaving "b" least recently used.
+    for offset, name in enumerate(("b", "c", "a")):
+        os.utime(cache._entry_path(signature(name)), (1000 + offset, 1000 + offset))
+
+    cache.max_bytes = 2 * entry_size
+    cache.evict_to_fit()
+    assert cache.lookup(signature("b")) is None
+    assert cache.lookup(signature("a")) == payload
+    assert cache.lookup(signature("c")) == payload
+
+
+def test_cache_imports_legacy_single_entry_file(tmp_path: Path):
+    legacy = tmp_path / "xj-cclyzer-cache.json"
+    legacy.write_text(
+        json.dumps({"signature": signature("lua"), "contents": {"project": "lua"}}),
+        encoding="utf-8",
+    )
+    cache = cclyzer_cache.CclyzerCache(tmp_path / "cache", max_bytes=1024 * 1024)
+    cache.import_legacy_cache_file(legacy)
+
+    assert not legacy.exists()
+    assert cache.lookup(signature("lua")) == {"project": "lua"}
+
+
+def store_and_read_back(root: Path, worker: int) -> bool:
+    cache = cclyzer_cache.CclyzerCache(root, max_bytes=64 * 1024)
+    contents = {"worker": worker, "blob": "x" * 10_000}
+    ok = True
+    for i in range(20):
+        cache.store(signature(f"shared-{i % 4}"), contents)
+        found = cache.lookup(signature(f"shared-{i % 4}"))
+        # Another worker may have evicted or replaced the entry; it must never be torn.
+        ok = ok and (found is None or found["blob"] == contents["blob"])
+    return ok
+
+
+def test_cache_tolerates_concurrent_writers(tmp_path: Path):
+    root = tmp_path / "cache"
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(store_and_read_back, [root] * 4, range(4)))
+    assert all(results)
+    assert not list(root.glob("*/*.tmp"))
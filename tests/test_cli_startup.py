@@ -0,0 +1,83 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import covset as ccs
+import repo_root
+
+# Modules which only some commands need, and which between them account for
+# most of what eagerly importing every command's dependencies used to cost.
+HEAVY_MODULES = [
+    "translation",
+    "translation_preparation",
+    "translation_multi_config",
+    "requests",
+    "provisioning",
+    "hermetic",
+    "covset",
+]
+
+
+def cli_dir() -> Path:
+    return repo_root.find_repo_root_dir_Path() / "cli"
+
+
+def importtime(args: list[str]) -> dict[str, int]:
+    """Runs Python with `-X importtime` in the `cli` directory and returns the
+    cumulative import time, in microseconds, of each module imported."""
+    cp = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=cli_dir(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative_us: dict[str, int] = {}
+    for line in cp.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or line.endswith("imported package"):
+            continue
+        _self_us, cumulative, name = line.removeprefix("import time:").split("|")
+        cumulative_us[name.strip()] = int(cumulative)
+    return cumulative_us
+
+
+def best_importtime_us(modules: list[str], tries: int = 3) -> int:
+    """Returns the smallest total cumulative time, over a few fresh interpreters,
+    of importing `modules` one after another."""
+    code = "; ".join(f"import {m}" for m in modules)
+    return min(sum(importtime(["-c", code]).get(m, 0) for m in modules) for _ in range(tries))
+
+
+@pytest.mark.parametrize(
+    "command",
+    [
+        ["true"],
+        ["--help"],
+        ["run-c", "--help"],
+        ["covset-eval", "--help"],
+        ["translate", "--help"],
+        ["upload-results", "--help"],
+    ],
+)
+def test_light_commands_import_no_heavy_modules(command: list[str]):
+    imported = importtime(["main.py", *command])
+    assert [m for m in HEAVY_MODULES if m in imported] == []
+
+
+def test_covset_eval_imports_only_what_it_needs(tmp_path: Path):
+    path = tmp_path / "empty.json"
+    ccs.CovSet({"files": {}, "configs": []}).save(str(path))
+    imported = importtime(["main.py", "covset-eval", str(path)])
+    assert "covset" in imported
+    assert [m for m in HEAVY_MODULES if m != "covset" and m in imported] == []
+
+
+def test_importing_main_costs_a_fraction_of_its_heaviest_dependencies():
+    # Compared in the same environment, rather than against a fixed budget,
+    # so that the bound holds on slow and busy machines alike.
+    main_us = best_importtime_us(["main"])
+    heavy_us = best_importtime_us(["translation", "requests"])
+    assert main_us < heavy_us / 3, f"import main: {main_us} us; eager dependencies: {heavy_us} us"
@@ -0,0 +1,101 @@
+import os
+from pathlib import Path
+
+import pytest
+
+import codebase_snapshots
+
+
+def mk_tree(root: Path) -> dict[str, bytes]:
+    contents = {
+        "a.c": b"int a(void) { return 1; }\n",
+        "inc/a.h": b"int a(void);\n",
+        "empty.txt": b"",
+        "big.bin": bytes(range(256)) * 4096,
+    }
+    for rel, data in contents.items():
+        (root / rel).parent.mkdir(parents=True, exist_ok=True)
+        (root / rel).write_bytes(data)
+    return contents
+
+
+@pytest.mark.parametrize("mode", ["reflink", "copy"])
+def test_snapshot_tree_copies_contents_and_accounts_for_bytes(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, mode: str
+):
+    monkeypatch.setenv("XJ_SNAPSHOT_MODE", mode)
+    src = tmp_path / "src"
+    dst = tmp_path / "dst"
+    contents = mk_tree(src)
+
+    stats = codebase_snapshots.snapshot_tree(src, dst)
+
+    for rel, data in contents.items():
+        assert (dst / rel).read_bytes() == data
+    assert stats.files == len(contents)
+    assert stats.bytes_cloned + stats.bytes_written == sum(len(d) for d in contents.values())
+    if mode == "copy":
+        assert stats.bytes_cloned == 0
+
+
+def test_snapshot_is_independent_of_source(tmp_path: Path):
+    src = tmp_path / "src"
+    dst = tmp_path / "dst"
+    contents = mk_tree(src)
+
+    codebase_snapshots.snapshot_tree(src, dst)
+    # Passes rewrite files in place; that must never leak into earlier snapshots.
+    with open(dst / "a.c", "r+b") as f:
+        f.write(b"XXX")
+
+    assert (src / "a.c").read_bytes() == contents["a.c"]
+
+
+def test_snapshot_tree_skips_excluded_top_level_entries(tmp_path: Path):
+    src = tmp_path / "src"
+    dst = tmp_path / "dst"
+    contents = mk_tree(src)
+    (src / "target" / "debug").mkdir(parents=True)
+    (src / "target" / "debug" / "junk").write_bytes(b"build output")
+    (src / "inc" / "target").write_bytes(b"not at top level")
+
+    stats = codebase_snapshots.snapshot_tree(src, dst, exclude=frozenset({"target"}))
+
+    assert not (dst / "target").exists()
+    assert (dst / "inc" / "target").read_bytes() == b"not at top level"
+    assert stats.files == len(contents) + 1
+
+
+def test_sync_tree_rewrites_only_changed_files(tmp_path: Path):
+    src = tmp_path / "src"
+    dst = tmp_path / "dst"
+    mk_tree(src)
+    (src / "target").mkdir()
+    (src / "target" / "junk").write_bytes(b"build output")
+
+    assert codebase_snapshots.sync_tree(src, dst, exclude=frozenset({"target"})) == 4
+    assert not (dst / "target").exists()
+    (dst / "target").mkdir()
+    (dst / "target" / "kept").write_bytes(b"mirror build output")
+
+    old = 1_000_000_000
+    for p in dst.rglob("*"):
+        if p.is_file():
+            os.utime(p, (old, old))
+    (src / "a.c").write_bytes(b"int a(void) { return 2; }\n")
+    (src / "inc" / "a.h").unlink()
+    (src / "new.c").write_bytes(b"")
+
+    assert codebase_snapshots.sync_tree(src, dst, exclude=frozenset({"target"})) == 3
+    assert (dst / "a.c").read_bytes() == b"int a(void) { return 2; }\n"
+    assert not (dst / "inc" / "a.h").exists()
+    assert (dst / "new.c").exists()
+    assert (dst / "big.bin").stat().st_mtime == old
+    assert (dst / "target" / "kept").exists()
+
+    # A file restored to an older version, with an older mtime, still looks new.
+    older = old - 1_000_000
+    (src / "a.c").write_bytes(b"int a(void) { return 1; }\n")
+    os.utime(src / "a.c", (older, older))
+    assert codebase_snapshots.sync_tree(src, dst, exclude=frozenset({"target"})) == 1
+    assert (dst / "a.c").stat().st_mtime > old
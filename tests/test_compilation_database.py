@@ -0,0 +1,36 @@
+from pathlib import Path
+
+import compilation_database
+
+
+def test_get_commands_for_path_resolves_relative_files_and_keeps_order():
+    def cmd(directory: str, file: str, output: str) -> compilation_database.CompileCommand:
+        return compilation_database.CompileCommand(
+            directory=directory, file=file, arguments=["cc", "-c", file], output=output
+        )
+
+    first = cmd("/build", "src/a.c", "a1.o")
+    other = cmd("/build", "src/b.c", "b.o")
+    second = cmd("/elsewhere", "/build/src/a.c", "a2.o")
+    third = cmd("/build/src", "a.c", "a3.o")
+    compdb = compilation_database.CompileCommands([first, other, second, third])
+
+    assert compdb.get_commands_for_path(Path("/build/src/a.c")) == [first, second, third]
+    assert compdb.get_commands_for_path(Path("/build/src/b.c")) == [other]
+    assert compdb.get_commands_for_path(Path("/build/src/c.c")) == []
+
+    added = cmd("/build", "src/c.c", "c.o")
+    compdb.commands.append(added)
+    compdb.invalidate_path_index()
+    assert compdb.get_commands_for_path(Path("/build/src/c.c")) == [added]
+
+    replacement = cmd("/build", "src/d.c", "d.o")
+    compdb.commands[-1] = replacement
+    compdb.invalidate_path_index()
+    assert compdb.get_commands_for_path(Path("/build/src/c.c")) == []
+    assert compdb.get_commands_for_path(Path("/build/src/d.c")) == [replacement]
+
+    # Assigning a new list of the same length also invalidates the index.
+    compdb.commands = [other, first, second, third, added]
+    assert compdb.get_commands_for_path(Path("/build/src/c.c")) == [added]
+    assert compdb.get_commands_for_path(Path("/build/src/d.c")) == []
@@ -0,0 +1,361 @@
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+import covset as ccs
+
+
+def mk_covset(num_files: int, seed: int, compression: ccs.CompressionType = "zstd") -> ccs.CovSet:
+    rng = random.Random(seed)
+    files: ccs.FilesDict = {}
+    for i in range(num_files):
+        coverable = rng.getrandbits(rng.randrange(1, 2000))
+        info = {
+            "filepath": {"utf8": f"src/file{i}.c", "hex": None},
+            "expandedhash": None,
+            "config-inputs": 0,
+            "encodedcoverage": ccs.encode_bitmap(coverable & rng.getrandbits(2000), compression),
+            "encodedcoverable": ccs.encode_bitmap(coverable, compression),
+            "misc": {"seed": seed} if i % 3 == 0 else None,
+        }
+        files[f"{i:064x}"] = info  # type: ignore[assignment]
+    return ccs.CovSet({"files": files, "configs": [[], ["-DNDEBUG"]]})
+
+
+@pytest.mark.parametrize("compression", ["identity", "zlib", "zstd"])
+def test_binary_covset_round_trips_to_identical_json(tmp_path: Path, compression):
+    original = mk_covset(50, seed=1, compression=compression)
+    # Older covsets may lack the coverable bitmap.
+    del next(iter(original.files.values()))["encodedcoverable"]  # type: ignore[misc]
+    json_path = tmp_path / "a.json"
+    original.save(str(json_path))
+
+    bin_path = tmp_path / f"a{ccs.BINARY_SUFFIX}"
+    ccs.CovSet.load(str(json_path)).save(str(bin_path))
+    assert bin_path.read_bytes().startswith(ccs.BINARY_MAGIC)
+    assert bin_path.stat().st_size < json_path.stat().st_size
+
+    back_path = tmp_path / "b.json"
+    ccs.CovSet.load(str(bin_path)).save(str(back_path))
+    assert json.loads(back_path.read_text()) == json.loads(json_path.read_text())
+    assert back_path.read_text() == json_path.read_text()
+
+
+def test_binary_covset_bitmaps_are_decoded_lazily(tmp_path: Path):
+    original = mk_covset(10, seed=2)
+    bin_path = tmp_path / f"a{ccs.BINARY_SUFFIX}"
+    original.save(str(bin_path))
+
+    loaded = ccs.CovSet.load(str(bin_path))
+    for fhash, info in loaded.files.items():
+        encoded = info["encodedcoverage"]
+        assert "b64" not in encoded and isinstance(encoded.get("raw"), memoryview)
+        assert ccs.decode_bitmap(encoded) == ccs.decode_bitmap(
+            original.files[fhash]["encodedcoverage"]
+        )
+
+
+@pytest.mark.parametrize("op", ["union", "intersection", "difference", "symmetric_diff"])
+def test_set_operations_agree_across_formats(tmp_path: Path, op):
+    a, b = mk_covset(30, seed=3), mk_covset(40, seed=4)
+    # Make the sets overlap partially.
+    b.files = {k: v for i, (k, v) in enumerate(b.files.items()) if i % 4 != 0}
+    for name, cs in (("a", a), ("b", b)):
+        cs.save(str(tmp_path / f"{name}.json"))
+        cs.save(str(tmp_path / f"{name}{ccs.BINARY_SUFFIX}"))
+
+    def evaluate(suffix: str) -> ccs.CovSetDict:
+        out = tmp_path / f"out-{op}{suffix}"
+        ccs.do_eval(str(out), f"({op} a{suffix} b{suffix})", "zstd")
+        return ccs.CovSet.load(str(out)).to_json_dict()
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(tmp_path)
+        assert evaluate(ccs.BINARY_SUFFIX) == evaluate(".json")
+
+
+def test_binary_covset_can_be_overwritten_while_loaded(tmp_path: Path):
+    path = tmp_path / f"a{ccs.BINARY_SUFFIX}"
+    mk_covset(5, seed=4).save(str(path))
+    loaded = ccs.CovSet.load(str(path))
+    expected = loaded.to_json_dict()
+
+    mk_covset(7, seed=5).save(str(path))
+    assert loaded.to_json_dict() == expected
+    assert len(ccs.CovSet.load(str(path)).files) == 7
+
+
+def test_corrupt_binary_covset_is_reported(tmp_path: Path):
+    path = tmp_path / f"a{ccs.BINARY_SUFFIX}"
+    mk_covset(5, seed=6).save(str(path))
+    path.write_bytes(path.read_bytes()[:40])
+    with pytest.raises(ValueError, match="Corrupt binary covset"):
+        ccs.CovSet.load(str(path))
+
+
+def mk_overlapping_covsets(num_sets: int, seed: int) -> list[ccs.CovSet]:
+    """Covsets over overlapping subsets of a shared pool of files, each with its own
+    configs, and with some (consistent) expanded hashes."""
+    rng = random.Random(seed)
+    all_configs = [[f"-DOPT{i}"] for i in range(6)]
+    sets = []
+    for _ in range(num_sets):
+        configs = rng.sample(all_configs, 3)
+        files: ccs.FilesDict = {}
+        for i in rng.sample(range(60), 40):
+            info = {
+                "filepath": {"utf8": f"src/file{i}.c", "hex": None},
+                "expandedhash": f"{i:08x}" if rng.random() < 0.5 else None,
+                "config-inputs": rng.randrange(len(configs)),
+                "encodedcoverage": ccs.encode_bitmap(
+                    rng.getrandbits(300) | rng.getrandbits(300), rng.choice(["zlib", "identity"])
+                ),
+                "encodedcoverable": ccs.encode_bitmap(rng.getrandbits(300), "zlib"),
+                "misc": None,
+            }
+            files[f"{i:064x}"] = info  # type: ignore[assignment]
+        sets.append(ccs.CovSet({"files": files, "configs": configs}))
+    return sets
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("op", ["union", "intersection"])
+def test_nary_set_operation_matches_binary_fold(tmp_path: Path, op, seed: int):
+    sets = mk_overlapping_covsets(7, seed)
+    for i, cs in enumerate(sets):
+        cs.save(str(tmp_path / f"{i}.json"))
+
+    folded = ccs.CovSet.load(str(tmp_path / "0.json"))
+    for i in range(1, len(sets)):
+        folded = ccs.set_operation(
+            op, folded, ccs.CovSet.load(str(tmp_path / f"{i}.json")), "error", "zstd"
+        )
+
+    nested = "0.json"
+    for i in range(1, len(sets)):
+        nested = f"({op} {nested} {i}.json)"
+    variadic = f"({op} " + " ".join(f"{i}.json" for i in range(len(sets))) + ")"
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(tmp_path)
+        for expression in (nested, variadic):
+            result = ccs.evaluate_exp(ccs.parse_sexp(expression), "error", "zstd")
+            assert result.to_json_dict() == folded.to_json_dict()
+
+
+def test_nary_set_operation_reports_expanded_hash_mismatches_like_fold():
+    a, b, c = mk_overlapping_covsets(3, seed=9)
+    fhash = next(iter(a.files.keys() & b.files.keys() & c.files.keys()))
+    a.files[fhash]["expandedhash"] = "aaaa"
+    b.files[fhash]["expandedhash"] = None
+    c.files[fhash]["expandedhash"] = "cccc"
+
+    for op in ("union", "intersection"):
+        with pytest.raises(ValueError, match="Expanded hash mismatch"):
+            ccs.nary_set_operation(op, [a, b, c], "error", "zstd")
+        # The folded result keeps the first set's (absent) hash, so nothing mismatches.
+        a.files[fhash]["expandedhash"] = None
+        ccs.nary_set_operation(op, [a, b, c], "error", "zstd")
+        a.files[fhash]["expandedhash"] = "aaaa"
+
+
+@pytest.mark.slow
+def test_benchmark_nary_union(tmp_path: Path, request: pytest.FixtureRequest):
+    """Reports the cost of a union over many covsets, evaluated as nested binary
+    unions versus in one pass."""
+    sets = mk_overlapping_covsets(60, seed=10)
+    for cs in sets:
+        for info in cs.files.values():
+            info["encodedcoverage"] = ccs.encode_bitmap(random.getrandbits(100_000), "zstd")
+
+    start_ns = time.perf_counter_ns()
+    folded = sets[0]
+    for cs in sets[1:]:
+        folded = ccs.set_operation("union", folded, cs, "error", "zstd")
+    folded_ms = (time.perf_counter_ns() - start_ns) / 1_000_000.0
+
+    start_ns = time.perf_counter_ns()
+    result = ccs.nary_set_operation("union", sets, "error", "zstd")
+    nary_ms = (time.perf_counter_ns() - start_ns) / 1_000_000.0
+
+    assert result.to_json_dict() == folded.to_json_dict()
+    summary = (
+        f"union of {len(sets)} covsets: {folded_ms:.1f} ms as binary fold,"
+        f" {nary_ms:.1f} ms in one pass"
+    )
+    print(summary)
+    request.node.summary_html = summary
+
+
+def reference_merge_configs(configs1: ccs.ConfigsArray, configs2: ccs.ConfigsArray):
+    """The original formulation, which looks up each config's position by list search."""
+    conf1_tuples = [tuple(c) for c in configs1]
+    conf2_tuples = [tuple(c) for c in configs2]
+    new_configs_tuples = sorted(list(set(conf1_tuples) | set(conf2_tuples)))
+    map1 = {i: new_configs_tuples.index(conf) for i, conf in enumerate(conf1_tuples)}
+    map2 = {i: new_configs_tuples.index(conf) for i, conf in enumerate(conf2_tuples)}
+    return [list(c) for c in new_configs_tuples], map1, map2
+
+
+def mk_configs(num_configs: int, seed: int) -> ccs.ConfigsArray:
+    rng = random.Random(seed)
+    return [
+        [f"-DTEST_{rng.randrange(num_configs * 2)}", "-O2"][: rng.randrange(1, 3)]
+        for _ in range(num_configs)
+    ]
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_merge_configs_matches_reference(seed: int):
+    configs1, configs2 = mk_configs(200, seed), mk_configs(300, seed + 100)
+    assert ccs._merge_configs(configs1, configs2) == reference_merge_configs(configs1, configs2)
+    assert ccs._merge_configs([], configs2) == reference_merge_configs([], configs2)
+
+
+@pytest.mark.slow
+def test_benchmark_merge_configs(request: pytest.FixtureRequest):
+    """Reports the cost of merging the configs of covsets with thousands of configs."""
+    configs1, configs2 = mk_configs(5000, seed=1), mk_configs(5000, seed=2)
+
+    start_ns = time.perf_counter_ns()
+    expected = reference_merge_configs(configs1, configs2)
+    reference_ms = (time.perf_counter_ns() - start_ns) / 1_000_000.0
+
+    start_ns = time.perf_counter_ns()
+    merged = ccs._merge_configs(configs1, configs2)
+    interned_ms = (time.perf_counter_ns() - start_ns) / 1_000_000.0
+
+    assert merged == expected
+    summary = (
+        f"merging 2 x 5000 configs: {reference_ms:.1f} ms with list search,"
+        f" {interned_ms:.1f} ms interned"
+    )
+    print(summary)
+    request.node.summary_html = summary
+
+
+@pytest.mark.parametrize(
+    "expression, expected",
+    [
+        ("a.json", "a.json"),
+        # A bare path is one atom, even with spaces in it.
+        (" my cov.json\n", "my cov.json"),
+        ('  "my covsets/a (1).json" ', "my covsets/a (1).json"),
+        ("(negate a.json)", ["negate", "a.json"]),
+        ("(union\n  a.json\t(negate b.json) )", ["union", "a.json", ["negate", "b.json"]]),
+        ('(union "a b.json" c.json)', ["union", "a b.json", "c.json"]),
+        ("(show ())", ["show", []]),
+    ],
+)
+def test_parse_sexp(expression: str, expected):
+    assert ccs.parse_sexp(expression) == expected
+
+
+@pytest.mark.parametrize(
+    "expression", ["", "(union a.json b.json", "(negate a.json))", "(negate a.json) b.json"]
+)
+def test_parse_sexp_rejects_malformed_expressions(expression: str):
+    with pytest.raises(ValueError):
+        ccs.parse_sexp(expression)
+
+
+def test_parse_sexp_handles_huge_machine_generated_expressions():
+    operands = [f"tests/covset-{i}.json" for i in range(50_000)]
+    assert ccs.parse_sexp("(union " + " ".join(operands) + ")") == ["union", *operands]
+
+    depth = 20 * sys.getrecursionlimit()
+    nested = "(union " * depth + "a.json" + "".join(f" {i}.json)" for i in range(depth))
+    parsed = ccs.parse_sexp(nested)
+    for i in reversed(range(depth)):
+        assert isinstance(parsed, list) and parsed[0] == "union" and parsed[2] == f"{i}.json"
+        parsed = parsed[1]
+    assert parsed == "a.json"
+
+
+def test_evaluate_deeply_nested_union(tmp_path: Path):
+    sets = mk_overlapping_covsets(3, seed=11)
+    for i, cs in enumerate(sets):
+        cs.save(str(tmp_path / f"{i}.json"))
+    depth = 2 * sys.getrecursionlimit()
+    nested = "(union " * depth + "0.json" + "".join(f" {1 + i % 2}.json)" for i in range(depth))
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(tmp_path)
+        result = ccs.evaluate_exp(ccs.parse_sexp(nested), "error", "zstd")
+        expected = ccs.evaluate_exp(ccs.parse_sexp("(union 0.json 1.json 2.json)"), "error", "zstd")
+    # Repeated operands may change how bitmaps are encoded, but not their contents.
+    assert result.files.keys() == expected.files.keys()
+    for fhash, info in result.files.items():
+        assert ccs.decode_bitmap(info["encodedcoverage"]) == ccs.decode_bitmap(
+            expected.files[fhash]["encodedcoverage"]
+        )
+
+
+def covset_of_lines(lines_per_file: dict[str, set[int]]) -> ccs.CovSet:
+    files = {
+        fhash: {
+            "filepath": {"utf8": fhash, "hex": None},
+            "expandedhash": None,
+            "encodedcoverage": ccs.encode_bitmap(sum(1 << n for n in lines), "zlib"),
+            "encodedcoverable": ccs.encode_bitmap(0, "zlib"),
+            "misc": None,
+        }
+        for fhash, lines in lines_per_file.items()
+    }
+    return ccs.CovSet({"files": files, "configs": [[]]})  # type: ignore[typeddict-item]
+
+
+def test_minimize_covsets_picks_greedily():
+    covsets = [
+        covset_of_lines({"a": {1, 2, 3}}),
+        covset_of_lines({"a": {1, 2, 3, 4, 5, 6}}),
+        covset_of_lines({"a": {4}, "b": {1}}),
+        covset_of_lines({"a": {4, 5, 6, 7}}),
+        covset_of_lines({"b": {1}}),
+        covset_of_lines({}),
+    ]
+    assert ccs.minimize_covsets(covsets) == [(1, 6), (2, 1), (3, 1)]
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_minimize_covsets_preserves_combined_coverage(seed: int):
+    rng = random.Random(seed)
+    covsets = [
+        covset_of_lines({
+            f: set(rng.sample(range(200), rng.randrange(20)))
+            for f in rng.sample(["a", "b", "c", "d"], 2)
+        })
+        for _ in range(100)
+    ]
+    picked = ccs.minimize_covsets(covsets)
+
+    def union(indices) -> dict[str, int]:
+        combined: dict[str, int] = {}
+        for i in indices:
+            for fhash, info in covsets[i].files.items():
+                combined[fhash] = combined.get(fhash, 0) | ccs.decode_bitmap(
+                    info["encodedcoverage"]
+                )
+        return combined
+
+    assert union(i for i, _ in picked) == union(range(len(covsets)))
+    assert sum(n for _, n in picked) == sum(b.bit_count() for b in union(range(100)).values())
+    # Each pick covers at most as many new lines as the previous one.
+    assert [n for _, n in picked] == sorted((n for _, n in picked), reverse=True)
+    assert len(picked) < len(covsets)
+
+
+def test_do_minimize_reports_and_writes_selection(tmp_path: Path, capsys):
+    paths = []
+    for i, lines in enumerate([{1}, {1, 2}, {3}]):
+        path = tmp_path / f"line-{i}{ccs.BINARY_SUFFIX if i else '.json'}"
+        covset_of_lines({"a": lines}).save(str(path))
+        paths.append(str(path))
+
+    ccs.do_minimize(paths, str(tmp_path / "selected.txt"))
+
+    assert (tmp_path / "selected.txt").read_text() == f"{paths[1]}\n{paths[2]}\n"
+    assert "Selected 2 of 3 covsets, covering 3 lines." in capsys.readouterr().out
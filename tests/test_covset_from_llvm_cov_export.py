@@ -1,6 +1,11 @@
 import hashlib
+import io
+import json
+import tracemalloc
 from pathlib import Path
 
+import pytest
+
 import covset as ccs
 import main
 
@@ -152,3 +157,199 @@ def test_covset_gen_arg_parsing_5():
         "rust": True,
         "extra_args": [],
     }
+
+
+def mk_synthetic_export(codebase: Path, num_files: int, lines_per_file: int) -> dict:
+    files = []
+    for i in range(num_files):
+        name = f"src/file{i}.c"
+        (codebase / name).parent.mkdir(parents=True, exist_ok=True)
+        (codebase / name).write_text(f"// {i}\n" + "int x;\n" * lines_per_file, encoding="utf-8")
+        segments = [
+            [line, 1, (line * i) % 3, line % 5 != 0, True, False]
+            for line in range(1, lines_per_file + 1)
+        ]
+        files.append({
+            "filename": name,
+            "segments": segments,
+            "summary": {"lines": {"count": lines_per_file}},
+        })
+    return {
+        "data": [
+            {"files": files, "functions": [{"name": "f", "regions": [[1, 1, 2, 2, 0]]}]},
+        ],
+        "type": "llvm.coverage.json.export",
+        "version": "2.0.1",
+    }
+
+
+@pytest.mark.parametrize("chunk_size", [7, 1 << 20])
+def test_streamed_llvm_cov_export_matches_parsed(tmp_path: Path, monkeypatch, chunk_size: int):
+    codebase = tmp_path / "codebase"
+    llvm_json = mk_synthetic_export(codebase, 5, 40)
+    # Keys in another order, and unrelated values of every JSON type, are tolerated.
+    streamed_json = {
+        "type": "llvm.coverage.json.export",
+        "extra": [1.5e3, None, True, {"a": 'x"y\\z'}],
+        "data": [7, {"functions": [], "totals": {}, "files": llvm_json["data"][0]["files"]}],
+        "version": 12345,
+    }
+    monkeypatch.setattr(ccs._JsonStreamReader, "_CHUNK_SIZE", chunk_size)
+
+    expected = ccs.llvm_profdata_to_CovSetDict(llvm_json, codebase_path=codebase)
+    streamed = ccs.llvm_cov_export_stream_to_CovSetDict(
+        io.StringIO(json.dumps(streamed_json, indent=1)), codebase_path=codebase
+    )
+    assert streamed == expected
+    assert len(streamed["files"]) == 5
+
+
+def test_streamed_llvm_cov_export_rejects_missing_data(tmp_path: Path):
+    with pytest.raises(TypeError, match="'data'"):
+        ccs.llvm_cov_export_stream_to_CovSetDict(io.StringIO('{"type": 1}'), codebase_path=tmp_path)
+
+
+@pytest.mark.slow
+def test_benchmark_llvm_cov_export_peak_memory(tmp_path: Path, request: pytest.FixtureRequest):
+    """Reports peak Python memory use converting a large synthetic export,
+    parsed whole versus streamed."""
+    codebase = tmp_path / "codebase"
+    export_path = tmp_path / "export.json"
+    export_path.write_text(json.dumps(mk_synthetic_export(codebase, 200, 1000)), encoding="utf-8")
+    export_mb = export_path.stat().st_size / (1024 * 1024)
+
+    def peak_mb(convert) -> tuple[float, ccs.CovSetDict]:
+        tracemalloc.start()
+        try:
+            result = convert()
+            return tracemalloc.get_traced_memory()[1] / (1024 * 1024), result
+        finally:
+            tracemalloc.stop()
+
+    def parsed_whole():
+        with open(export_path, "r", encoding="utf-8") as f:
+            return ccs.llvm_profdata_to_CovSetDict(json.load(f), codebase_path=codebase)
+
+    def streamed():
+        with open(export_path, "r", encoding="utf-8") as f:
+            return ccs.llvm_cov_export_stream_to_CovSetDict(f, codebase_path=codebase)
+
+    whole_mb, expected = peak_mb(parsed_whole)
+    streamed_mb, result = peak_mb(streamed)
+
+    assert result == expected
+    assert streamed_mb < whole_mb / 4
+    summary = (
+        f"{export_mb:.0f} MB export: peak {whole_mb:.0f} MB parsed whole,"
+        f" {streamed_mb:.0f} MB streamed"
+    )
+    print(summary)
+    request.node.summary_html = summary
+
+
+def test_covset_gen_arg_parsing_objects_and_jobs():
+    ns, rest = main.parse_covset_gen_args([
+        "--codebase",
+        "C",
+        "--resultsdir",
+        "R",
+        "--output",
+        "O",
+        "--object",
+        "libfoo.so",
+        "--jobs",
+        "3",
+        "--object",
+        "/abs/helper",
+        "--",
+        "--object",
+    ])
+    assert ns.object == ["libfoo.so", "/abs/helper"]
+    assert ns.jobs == 3
+    assert rest == ["--object"]
+
+
+def test_coverage_objects_include_shared_libraries_once(tmp_path: Path):
+    built = tmp_path / "built"
+    built.mkdir()
+    for name in ("main", "helper", "libfoo.so.1", "libbar.so"):
+        (built / name).write_bytes(b"\x7fELF")
+        (built / name).chmod(0o755)
+    (built / "libfoo.so").symlink_to("libfoo.so.1")
+    elsewhere = tmp_path / "elsewhere.so"
+    elsewhere.write_bytes(b"\x7fELF")
+
+    objects = ccs.coverage_objects(built / "main", ["helper", str(elsewhere), "libbar.so"])
+
+    assert [(p.name, requested) for p, requested in objects] == [
+        ("main", True),
+        ("libbar.so", True),
+        ("libfoo.so", False),
+        ("helper", True),
+        ("elsewhere.so", True),
+    ]
+    assert sorted(p.name for p in ccs._binaries_within(built)) == ["helper", "main"]
+    with pytest.raises(ValueError, match="not found"):
+        ccs.coverage_objects(built / "main", ["missing"])
+
+
+def test_streamed_llvm_cov_exports_of_several_objects_are_combined(tmp_path: Path):
+    codebase = tmp_path / "codebase"
+    codebase.mkdir()
+    (codebase / "shared.h").write_text("l1\nl2\nl3\nl4\n", encoding="utf-8")
+    (codebase / "lib.c").write_text("l1\nl2\n", encoding="utf-8")
+
+    def export(*files: tuple[str, list[list]]) -> io.StringIO:
+        entries = [{"filename": name, "segments": segments} for name, segments in files]
+        return io.StringIO(json.dumps({"data": [{"files": entries}]}))
+
+    main_export = export(("shared.h", [[1, 1, 1, True], [2, 1, 0, True], [3, 1, 0, False]]))
+    lib_export = export(
+        ("shared.h", [[2, 1, 0, True], [3, 1, 4, True], [4, 1, 0, False]]),
+        ("lib.c", [[1, 1, 2, True]]),
+    )
+    result = ccs.llvm_cov_export_streams_to_CovSetDict(
+        [main_export, lib_export], codebase_path=codebase, compression="identity"
+    )
+
+    by_name = {info["filepath"]["utf8"]: info for info in result["files"].values()}
+    assert sorted(by_name) == ["lib.c", "shared.h"]
+    assert bin(ccs.decode_bitmap(by_name["shared.h"]["encodedcoverage"])) == "0b101"
+    assert bin(ccs.decode_bitmap(by_name["shared.h"]["encodedcoverable"])) == "0b111"
+
+
+def test_read_inputs_file(tmp_path: Path):
+    inputs_file = tmp_path / "inputs.txt"
+    inputs_file.write_text("a.txt --fast\n\n'with space.txt'\n", encoding="utf-8")
+    assert ccs.read_inputs_file(inputs_file) == [
+        ("line-1", ["a.txt", "--fast"]),
+        ("line-3", ["with space.txt"]),
+    ]
+
+    inputs_file.write_text("\n  \n", encoding="utf-8")
+    with pytest.raises(ValueError, match="no inputs"):
+        ccs.read_inputs_file(inputs_file)
+    with pytest.raises(ValueError, match="No inputs"):
+        ccs.generate_via(
+            None, tmp_path, tmp_path, tmp_path / "out.covset", False, False, [], inputs=[]
+        )
+
+
+def test_inputs_run_concurrently_with_distinct_profile_files(tmp_path: Path, monkeypatch, capfd):
+    # Skip provisioning, which isn't needed to run a shell script.
+    monkeypatch.setenv("CI", "true")
+    target = tmp_path / "target.sh"
+    target.write_text(
+        '#!/bin/sh\necho "ran $1"\ntouch "$(dirname "$LLVM_PROFILE_FILE")/profile-of-$1"\n'
+        'test "$1" != fail\n',
+        encoding="utf-8",
+    )
+    target.chmod(0o755)
+    inputs = [(f"line-{i}", [name]) for i, name in enumerate(["a", "fail", "c", "d"])]
+
+    cp = ccs._run_inputs(target.as_posix(), [], inputs, tmp_path, jobs=4)
+
+    assert cp.returncode != 0 and cp.stdout == b"ran fail\n"
+    assert capfd.readouterr().out == "ran a\nran fail\nran c\nran d\n"
+    for label, (name,) in inputs:
+        assert [p.name for p in (tmp_path / label).iterdir()] == [f"profile-of-{name}"]
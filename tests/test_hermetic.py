@@ -0,0 +1,108 @@
+import shutil
+import time
+
+import pytest
+
+import hermetic
+import provisioning
+import repo_root
+from constants import WANT
+
+
+@pytest.fixture
+def unverified_provisioning(monkeypatch) -> list[str]:
+    """Makes provisioning look unverified outside CI, and records (rather than
+    performs) each call to `provision_desires`."""
+    calls: list[str] = []
+
+    def fake_provision_desires(wanted: str):
+        calls.append(wanted)
+        if wanted == "all":
+            provisioning.HAVE.all_verified = True
+
+    monkeypatch.delenv("CI", raising=False)
+    monkeypatch.delenv(provisioning.PROVISIONED_ENV_VAR, raising=False)
+    monkeypatch.setattr(provisioning.HAVE, "all_verified", False)
+    monkeypatch.setattr(provisioning, "provision_desires", fake_provision_desires)
+    return calls
+
+
+def test_provisioning_is_verified_once_per_process(unverified_provisioning: list[str]):
+    for _ in range(3):
+        hermetic.common_helper_for_run(["true"])
+    assert unverified_provisioning == ["all"]
+
+
+def test_provisioning_verification_is_inherited_by_subprocesses(
+    unverified_provisioning: list[str], monkeypatch
+):
+    monkeypatch.setenv(provisioning.PROVISIONED_ENV_VAR, "stale-or-foreign-marker")
+    hermetic.common_helper_for_run(["true"])
+    assert unverified_provisioning == ["all"]
+
+    child_env = hermetic.mk_env_for(repo_root.localdir())
+    assert child_env[provisioning.PROVISIONED_ENV_VAR] == provisioning.provisioned_marker()
+
+    # As seen from a child process:
+    monkeypatch.setattr(provisioning.HAVE, "all_verified", False)
+    monkeypatch.setenv(
+        provisioning.PROVISIONED_ENV_VAR, child_env[provisioning.PROVISIONED_ENV_VAR]
+    )
+    hermetic.common_helper_for_run(["true"])
+    assert unverified_provisioning == ["all"]
+
+
+def test_mk_env_for_reflects_environment_changes(monkeypatch):
+    localdir = repo_root.localdir()
+    monkeypatch.setenv("XJ_TEST_ENV_MEMO", "1")
+    first = hermetic.mk_env_for(localdir)
+    assert first == hermetic._mk_env_for(localdir)
+    assert first["XJ_TEST_ENV_MEMO"] == "1"
+
+    first["XJ_TEST_ENV_MEMO"] = "modified by caller"
+    assert hermetic.mk_env_for(localdir)["XJ_TEST_ENV_MEMO"] == "1"
+
+    monkeypatch.setenv("XJ_TEST_ENV_MEMO", "2")
+    assert hermetic.mk_env_for(localdir)["XJ_TEST_ENV_MEMO"] == "2"
+    monkeypatch.delenv("XJ_TEST_ENV_MEMO")
+    assert "XJ_TEST_ENV_MEMO" not in hermetic.mk_env_for(localdir)
+    assert hermetic.mk_env_for(localdir, with_tenjin_deps=False) == hermetic._mk_env_for(
+        localdir, with_tenjin_deps=False
+    )
+
+
+@pytest.mark.slow
+@pytest.mark.skipif(shutil.which("rustc") is None, reason="provisioning checks require rustc")
+def test_benchmark_per_run_overhead(monkeypatch, request: pytest.FixtureRequest):
+    """Reports the bookkeeping cost of each `hermetic.run`, with provisioning
+    verified and the environment built for every run versus once."""
+    monkeypatch.delenv("CI", raising=False)
+    monkeypatch.delenv(provisioning.PROVISIONED_ENV_VAR, raising=False)
+    # Pretend that everything is already provisioned, as on a developer machine.
+    monkeypatch.setattr(provisioning.HAVE, "_have", dict(WANT))
+    localdir = repo_root.localdir()
+    runs = 2000
+
+    def time_per_run_us(overhead) -> float:
+        start_ns = time.perf_counter_ns()
+        for _ in range(runs):
+            overhead()
+        return (time.perf_counter_ns() - start_ns) / runs / 1000.0
+
+    def every_time():
+        provisioning.provision_desires("all")
+        hermetic._mk_env_for(localdir)
+
+    def once():
+        hermetic.common_helper_for_run(["true"])
+        hermetic.mk_env_for(localdir)
+
+    every_time_us = time_per_run_us(every_time)
+    once_us = time_per_run_us(once)
+
+    summary = (
+        f"per-run overhead: {every_time_us:.0f} us checking every time,"
+        f" {once_us:.0f} us checking once"
+    )
+    print(summary)
+    request.node.summary_html = summary
@@ -0,0 +1,109 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+import intercept_exec
+import repo_root
+
+
+def intercept_wrapper(name: str) -> Path:
+    return repo_root.find_repo_root_dir_Path() / "cli" / "sh" / "cc-ld-intercept" / name
+
+
+def mk_fake_tool(bindir: Path, name: str) -> Path:
+    bindir.mkdir(parents=True, exist_ok=True)
+    tool = bindir / name
+    tool.write_text("#!/bin/sh\nexit 0\n", encoding="utf-8")
+    tool.chmod(0o755)
+    return tool
+
+
+def fast_path_env(tmp_path: Path, bindir: Path) -> dict[str, str]:
+    return {
+        **os.environ,
+        **intercept_exec.fast_path_env_ext(),
+        "PATH": os.pathsep.join([
+            str(intercept_wrapper("cc").parent),
+            str(bindir),
+            os.environ["PATH"],
+        ]),
+        "BUILD_COMMANDS_DIRECTORY": str(tmp_path / "buildcmds"),
+    }
+
+
+def test_fast_path_records_intercepted_command(tmp_path: Path):
+    bindir = tmp_path / "bin"
+    fake_cc = mk_fake_tool(bindir, "cc")
+
+    subprocess.run(
+        [intercept_wrapper("cc"), "-c", "-o", "a.o", "a.c"],
+        cwd=tmp_path,
+        env=fast_path_env(tmp_path, bindir),
+        check=True,
+    )
+
+    recorded = list((tmp_path / "buildcmds").glob("*.json"))
+    assert len(recorded) == 1
+    entry = json.loads(recorded[0].read_text(encoding="utf-8"))
+    assert entry["type"] == "cc"
+    assert Path(entry["directory"]).resolve() == tmp_path.resolve()
+    assert entry["arguments"] == [fake_cc.as_posix(), "-c", "-o", "a.o", "a.c"]
+
+
+def test_fast_path_passes_through_single_flag(tmp_path: Path):
+    bindir = tmp_path / "bin"
+    mk_fake_tool(bindir, "ar")
+
+    cp = subprocess.run(
+        [intercept_wrapper("ar"), "--version"],
+        cwd=tmp_path,
+        env=fast_path_env(tmp_path, bindir),
+        check=False,
+    )
+    assert cp.returncode == 0
+    assert not (tmp_path / "buildcmds").exists()
+
+
+def test_main_rejects_missing_arguments():
+    assert intercept_exec.main(["cc"]) == 1
+
+
+@pytest.mark.slow
+def test_benchmark_intercept_overhead_vs_bare_cc(tmp_path: Path, request: pytest.FixtureRequest):
+    """Reports the per-invocation cost of an intercepted compile vs a bare one."""
+    real_cc = shutil.which("cc")
+    if real_cc is None:
+        pytest.skip("no `cc` on PATH")
+
+    src = tmp_path / "t.c"
+    src.write_text("int f(void) { return 0; }\n", encoding="utf-8")
+    bindir = tmp_path / "bin"
+    bindir.mkdir()
+    (bindir / "cc").symlink_to(real_cc)
+
+    iterations = 20
+
+    def time_per_call(cmd: list, env: dict[str, str]) -> float:
+        start_ns = time.perf_counter_ns()
+        for _ in range(iterations):
+            subprocess.run(cmd, cwd=tmp_path, env=env, check=True)
+        return (time.perf_counter_ns() - start_ns) / 1_000_000.0 / iterations
+
+    args = ["-c", "-o", "t.o", "t.c"]
+    bare_ms = time_per_call([bindir / "cc", *args], {**os.environ})
+    fast_env = fast_path_env(tmp_path, bindir)
+    fast_ms = time_per_call([intercept_wrapper("cc"), *args], fast_env)
+
+    summary = (
+        f"bare cc: {bare_ms:.1f} ms/call; "
+        f"intercepted (fast path, {Path(sys.executable).name}): {fast_ms:.1f} ms/call; "
+        f"overhead: {fast_ms - bare_ms:.1f} ms/call"
+    )
+    print(summary)
+    request.node.summary_html = summary
@@ -0,0 +1,480 @@
+import compression.zstd
+import gzip
+import hashlib
+import http.server
+import io
+import lzma
+import shutil
+import subprocess
+import tarfile
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+import provisioning
+from constants import WANT
+
+
+class ArtifactServer:
+    """A local stand-in for the release servers provisioning downloads from.
+
+    It honors `Range` requests unless `ignore_ranges` is set, and can cut a
+    response short to simulate an interrupted transfer."""
+
+    def __init__(self, artifacts: dict[str, bytes]):
+        self.artifacts = artifacts
+        self.ignore_ranges = False
+        # Path -> number of bytes to send before dropping the connection, once.
+        self.truncate_once: dict[str, int] = {}
+        # Requests, as (path, Range header or None).
+        self.requests: list[tuple[str, str | None]] = []
+        # If set, each response waits (briefly) for this many to be in flight.
+        self.rendezvous: threading.Barrier | None = None
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                server.handle(self)
+
+        self._httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self._httpd.server_port}{path}"
+
+    def handle(self, request: http.server.BaseHTTPRequestHandler):
+        range_header = request.headers.get("Range")
+        with self._lock:
+            self.requests.append((request.path, range_header))
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+        try:
+            if self.rendezvous is not None:
+                try:
+                    self.rendezvous.wait(timeout=5)
+                except threading.BrokenBarrierError:
+                    pass
+            self._respond(request, range_header)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def _respond(self, request: http.server.BaseHTTPRequestHandler, range_header: str | None):
+        data = self.artifacts.get(request.path)
+        if data is None:
+            request.send_error(404)
+            return
+
+        start = 0
+        if range_header and not self.ignore_ranges:
+            start = int(range_header.removeprefix("bytes=").removesuffix("-"))
+            if start >= len(data):
+                request.send_error(416)
+                return
+            request.send_response(206)
+            request.send_header("Content-Range", f"bytes {start}-{len(data) - 1}/{len(data)}")
+        else:
+            request.send_response(200)
+        body = data[start:]
+        request.send_header("Content-Length", str(len(body)))
+        request.end_headers()
+
+        cutoff = self.truncate_once.pop(request.path, None)
+        if cutoff is not None:
+            request.wfile.write(body[:cutoff])
+            request.wfile.flush()
+            request.close_connection = True
+            return
+        request.wfile.write(body)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def artifact_bytes(size: int, seed: int) -> bytes:
+    return hashlib.shake_256(seed.to_bytes(8)).digest(size)
+
+
+@pytest.fixture
+def no_retry_delay(monkeypatch):
+    monkeypatch.setattr(time, "sleep", lambda _seconds: None)
+
+
+def test_download_verifies_checksum_while_streaming(tmp_path: Path):
+    data = artifact_bytes(3_000_000, seed=1)
+    with ArtifactServer({"/a.tar.xz": data}) as server:
+        dest = tmp_path / "a.tar.xz"
+        provisioning.download(
+            server.url("/a.tar.xz"), dest, sha256=hashlib.sha256(data).hexdigest()
+        )
+        assert dest.read_bytes() == data
+
+        bad = tmp_path / "bad.tar.xz"
+        with pytest.raises(provisioning.ProvisioningError, match="Checksum mismatch"):
+            provisioning.download(server.url("/a.tar.xz"), bad, sha256="0" * 64)
+        assert not bad.exists()
+        assert not provisioning.partial_download_path(server.url("/a.tar.xz"), bad).exists()
+
+
+def test_download_resumes_partial_download(tmp_path: Path):
+    data = artifact_bytes(3_000_000, seed=2)
+    with ArtifactServer({"/a.tar.xz": data}) as server:
+        url = server.url("/a.tar.xz")
+        dest = tmp_path / "a.tar.xz"
+        provisioning.partial_download_path(url, dest).write_bytes(data[:1_234_567])
+
+        provisioning.download(url, dest, sha256=hashlib.sha256(data).hexdigest())
+
+        assert dest.read_bytes() == data
+        assert server.requests == [("/a.tar.xz", "bytes=1234567-")]
+        assert not provisioning.partial_download_path(url, dest).exists()
+
+
+def test_download_restarts_when_server_ignores_ranges(tmp_path: Path):
+    data = artifact_bytes(100_000, seed=3)
+    with ArtifactServer({"/a.tar.xz": data}) as server:
+        server.ignore_ranges = True
+        url = server.url("/a.tar.xz")
+        dest = tmp_path / "a.tar.xz"
+        provisioning.partial_download_path(url, dest).write_bytes(b"stale" * 1000)
+
+        provisioning.download(url, dest, sha256=hashlib.sha256(data).hexdigest())
+
+        assert dest.read_bytes() == data
+
+
+def test_download_restarts_when_partial_download_is_too_long(tmp_path: Path):
+    data = artifact_bytes(1000, seed=4)
+    with ArtifactServer({"/a.tar.xz": data}) as server:
+        url = server.url("/a.tar.xz")
+        dest = tmp_path / "a.tar.xz"
+        provisioning.partial_download_path(url, dest).write_bytes(b"x" * 5000)
+
+        provisioning.download(url, dest)
+
+        assert dest.read_bytes() == data
+        assert server.requests == [("/a.tar.xz", "bytes=5000-"), ("/a.tar.xz", None)]
+
+
+def test_download_retry_resumes_interrupted_transfer(tmp_path: Path, no_retry_delay):
+    data = artifact_bytes(2_000_000, seed=5)
+    with ArtifactServer({"/a.tar.xz": data}) as server:
+        server.truncate_once["/a.tar.xz"] = 700_000
+        dest = tmp_path / "a.tar.xz"
+
+        provisioning.download(
+            server.url("/a.tar.xz"), dest, sha256=hashlib.sha256(data).hexdigest()
+        )
+
+        assert dest.read_bytes() == data
+        assert server.requests == [("/a.tar.xz", None), ("/a.tar.xz", "bytes=700000-")]
+
+
+def test_prefetch_downloads_concurrently(tmp_path: Path):
+    artifacts = {f"/{i}.tar.xz": artifact_bytes(200_000, seed=10 + i) for i in range(3)}
+    with ArtifactServer(artifacts) as server:
+        server.rendezvous = threading.Barrier(len(artifacts))
+        wanted: list[tuple[str, str | None]] = [
+            (server.url(path), hashlib.sha256(data).hexdigest()) for path, data in artifacts.items()
+        ]
+        try:
+            provisioning.prefetch_downloads(wanted + wanted[:1], tmp_path / "downloads")
+
+            # Downloads of the same URLs wait for the prefetched copies, even repeatedly.
+            for n in range(2):
+                for path, data in artifacts.items():
+                    dest = tmp_path / f"{n}-{path.lstrip('/')}"
+                    provisioning.download(server.url(path), dest)
+                    assert dest.read_bytes() == data
+            assert server.max_in_flight == len(artifacts)
+            assert len(server.requests) == len(artifacts)
+        finally:
+            provisioning.discard_prefetched_downloads()
+        assert list((tmp_path / "downloads").iterdir()) == []
+
+
+def test_artifacts_to_provision(monkeypatch, tmp_path: Path):
+    monkeypatch.chdir(tmp_path)  # Away from any manually downloaded LLVM tarball.
+    monkeypatch.setattr(provisioning.HAVE, "_have", dict(WANT))
+    assert provisioning.artifacts_to_provision("all") == []
+
+    monkeypatch.setattr(provisioning.HAVE, "_have", {})
+    urls = [url for url, _sha256 in provisioning.artifacts_to_provision("all")]
+    assert len(urls) == len(set(urls))
+    assert provisioning.mk_llvm_url(WANT["10j-llvm"]) in urls
+    assert provisioning.mk_cmake_url(WANT["10j-cmake"]) in urls
+
+
+def populated_mirror(mirror_dir: Path, artifacts: dict[str, bytes]) -> None:
+    for url, data in artifacts.items():
+        incoming = mirror_dir.parent / "incoming"
+        incoming.write_bytes(data)
+        provisioning.add_to_artifact_mirror(mirror_dir, url, incoming)
+        incoming.unlink()
+
+
+def test_download_prefers_directory_mirror(monkeypatch, tmp_path: Path):
+    # Nothing listens on port 1, so these downloads can only come from the mirror.
+    offline = {
+        f"http://127.0.0.1:1/{i}.tar.xz": artifact_bytes(5000, seed=20 + i) for i in range(2)
+    }
+    mirror_dir = tmp_path / "mirror"
+    populated_mirror(mirror_dir, offline)
+    monkeypatch.setenv(provisioning.ARTIFACT_MIRROR_ENV_VAR, str(mirror_dir))
+
+    for url, data in offline.items():
+        dest = tmp_path / "dest.tar.xz"
+        provisioning.download(url, dest, sha256=hashlib.sha256(data).hexdigest())
+        assert dest.read_bytes() == data
+        dest.unlink()
+
+    # Identical contents are stored once.
+    populated_mirror(mirror_dir, {"http://127.0.0.1:1/copy.tar.xz": next(iter(offline.values()))})
+    assert len(list((mirror_dir / "sha256").iterdir())) == len(offline)
+
+
+def test_download_falls_back_from_unusable_mirror(monkeypatch, tmp_path: Path):
+    data = artifact_bytes(5000, seed=30)
+    with ArtifactServer({"/a.tar.xz": data, "/b.tar.xz": data}) as server:
+        mirror_dir = tmp_path / "mirror"
+        populated_mirror(mirror_dir, {server.url("/a.tar.xz"): b"corrupted later"})
+        blob = next((mirror_dir / "sha256").iterdir())
+        blob.write_bytes(b"corrupted now")
+        monkeypatch.setenv(provisioning.ARTIFACT_MIRROR_ENV_VAR, str(mirror_dir))
+
+        for path in ["/a.tar.xz", "/b.tar.xz"]:  # Corrupt, and absent, respectively.
+            dest = tmp_path / path.lstrip("/")
+            provisioning.download(server.url(path), dest)
+            assert dest.read_bytes() == data
+        assert [path for path, _range in server.requests] == ["/a.tar.xz", "/b.tar.xz"]
+
+
+def test_download_prefers_http_mirror(monkeypatch, tmp_path: Path, no_retry_delay):
+    upstream_url = "http://127.0.0.1:1/a.tar.xz"
+    data = artifact_bytes(5000, seed=40)
+    mirror_dir = tmp_path / "mirror"
+    populated_mirror(mirror_dir, {upstream_url: data})
+    served = {
+        "/" + path.relative_to(mirror_dir).as_posix(): path.read_bytes()
+        for path in mirror_dir.rglob("*")
+        if path.is_file()
+    }
+    with ArtifactServer(served) as mirror:
+        monkeypatch.setenv(provisioning.ARTIFACT_MIRROR_ENV_VAR, mirror.url("/"))
+
+        dest = tmp_path / "a.tar.xz"
+        provisioning.download(upstream_url, dest, sha256=hashlib.sha256(data).hexdigest())
+        assert dest.read_bytes() == data
+
+        # A mirrored copy that doesn't match the expected checksum is not used.
+        with pytest.raises(SystemExit):
+            provisioning.download(upstream_url, tmp_path / "b.tar.xz", sha256="0" * 64)
+
+
+def test_populate_artifact_mirror(monkeypatch, tmp_path: Path):
+    artifacts = {f"/{i}.tar.xz": artifact_bytes(5000, seed=50 + i) for i in range(3)}
+    with ArtifactServer(artifacts) as server:
+        wanted: list[tuple[str, str | None]] = [(server.url(path), None) for path in artifacts]
+        monkeypatch.setattr(
+            provisioning, "artifacts_to_provision", lambda _wanted, only_missing: wanted
+        )
+        mirror_dir = tmp_path / "mirror"
+        provisioning.populate_artifact_mirror(mirror_dir, "all")
+        provisioning.populate_artifact_mirror(mirror_dir, "all")
+        assert len(server.requests) == len(artifacts)
+
+    # The upstream server is gone now.
+    monkeypatch.setenv(provisioning.ARTIFACT_MIRROR_ENV_VAR, str(mirror_dir))
+    for (url, _sha256), data in zip(wanted, artifacts.values()):
+        dest = tmp_path / "dest.tar.xz"
+        provisioning.download(url, dest)
+        assert dest.read_bytes() == data
+        dest.unlink()
+
+
+def make_tarball(path: Path, files: dict[str, bytes]) -> Path:
+    """Writes `files` into a tarball, compressed according to the name of `path`."""
+    plain = path.with_name(
+        path.name.removesuffix(".xz").removesuffix(".gz").removesuffix(".zst") + ".tmp"
+    )
+    with tarfile.open(plain, "w") as tar:
+        for name, data in files.items():
+            member = tarfile.TarInfo(name)
+            member.size = len(data)
+            tar.addfile(member, io.BytesIO(data))
+    if path.name.endswith(".tar.gz"):
+        with open(plain, "rb") as src, gzip.open(path, "wb", compresslevel=1) as dst:
+            shutil.copyfileobj(src, dst)
+    elif path.name.endswith(".tar.zst"):
+        if shutil.which("zstd") is not None:
+            with open(plain, "rb") as src, open(path, "wb") as dst:
+                subprocess.check_call(["zstd", "-q", "-c", "-1"], stdin=src, stdout=dst)
+        else:
+            with open(plain, "rb") as src, compression.zstd.open(path, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+    elif shutil.which("xz") is not None:
+        # Multiple blocks let xz decompress it with several threads.
+        with open(plain, "rb") as src, open(path, "wb") as dst:
+            subprocess.check_call(
+                ["xz", "-c", "-0", "-T0", "--block-size=4MiB"], stdin=src, stdout=dst
+            )
+    else:
+        with open(plain, "rb") as src, lzma.open(path, "wb", preset=1) as dst:
+            shutil.copyfileobj(src, dst)
+    plain.unlink()
+    return path
+
+
+def tree_contents(root: Path) -> dict[str, bytes]:
+    return {
+        path.relative_to(root).as_posix(): path.read_bytes()
+        for path in root.rglob("*")
+        if path.is_file()
+    }
+
+
+SAMPLE_FILES = {
+    f"sample/{subdir}/{i}.txt": artifact_bytes(20_000, seed=i).hex().encode()
+    for i in range(6)
+    for subdir in ["bin", "lib"]
+}
+
+
+@pytest.fixture(params=["external", "python"])
+def decompressor(request, monkeypatch) -> str:
+    if request.param == "external" and shutil.which("xz") is None:
+        pytest.skip("xz is not installed")
+    monkeypatch.setenv("XJ_EXTERNAL_DECOMPRESSOR", "1" if request.param == "external" else "0")
+    return request.param
+
+
+@pytest.mark.parametrize("suffix", [".tar.xz", ".tar.gz", ".tar.zst"])
+def test_extract_tarball(tmp_path: Path, decompressor: str, suffix: str):
+    if suffix == ".tar.zst":
+        if decompressor == "external" and shutil.which("zstd") is None:
+            pytest.skip("needs the zstd command")
+        if decompressor == "python" and "zst" not in tarfile.TarFile.OPEN_METH:
+            pytest.skip("this Python's tarfile can't read zstd")
+    tarball = make_tarball(tmp_path / f"sample{suffix}", SAMPLE_FILES)
+    target = tmp_path / "target"
+
+    assert provisioning.extract_tarball(tarball, target, ctx="(test) ") == target
+
+    # The tarball's top-level directory is flattened away.
+    assert tree_contents(target) == {
+        name.removeprefix("sample/"): data for name, data in SAMPLE_FILES.items()
+    }
+
+
+def test_extract_tarball_cleans_up_after_failure(tmp_path: Path, decompressor: str):
+    tarball = make_tarball(tmp_path / "sample.tar.xz", SAMPLE_FILES)
+    tarball.write_bytes(tarball.read_bytes()[: tarball.stat().st_size // 2])
+    target = tmp_path / "target"
+
+    with pytest.raises(Exception):  # Which one depends on the decompressor.
+        provisioning.extract_tarball(tarball, target, ctx="(test) ")
+    assert not target.exists()
+
+
+def test_download_and_extract_tarball_while_downloading(
+    monkeypatch, tmp_path: Path, decompressor: str
+):
+    monkeypatch.chdir(tmp_path)
+    tarball = make_tarball(tmp_path / "sample.tar.xz", SAMPLE_FILES)
+    with ArtifactServer({"/sample.tar.xz": tarball.read_bytes()}) as server:
+        tarball.unlink()
+        provisioning.download_and_extract_tarball(
+            server.url("/sample.tar.xz"), tmp_path / "target", ctx="(test) "
+        )
+        assert server.requests == [("/sample.tar.xz", None)]
+    assert tree_contents(tmp_path / "target") == {
+        name.removeprefix("sample/"): data for name, data in SAMPLE_FILES.items()
+    }
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["target"]
+
+
+def test_download_and_extract_tarball_resumes_after_interruption(
+    monkeypatch, tmp_path: Path, decompressor: str, no_retry_delay
+):
+    monkeypatch.chdir(tmp_path)
+    tarball = make_tarball(tmp_path / "sample.tar.xz", SAMPLE_FILES)
+    data = tarball.read_bytes()
+    tarball.unlink()
+    with ArtifactServer({"/sample.tar.xz": data}) as server:
+        server.truncate_once["/sample.tar.xz"] = len(data) // 2
+        provisioning.download_and_extract_tarball(
+            server.url("/sample.tar.xz"), tmp_path / "target", ctx="(test) "
+        )
+        assert server.requests == [
+            ("/sample.tar.xz", None),
+            ("/sample.tar.xz", f"bytes={len(data) // 2}-"),
+        ]
+    assert tree_contents(tmp_path / "target") == {
+        name.removeprefix("sample/"): data for name, data in SAMPLE_FILES.items()
+    }
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["target"]
+
+
+@pytest.mark.slow
+def test_benchmark_tarball_extraction(monkeypatch, tmp_path: Path, request: pytest.FixtureRequest):
+    """Compares extraction of a large synthetic archive, as before (downloading
+    first, then extracting with Python's tarfile) and now."""
+    monkeypatch.chdir(tmp_path)
+    files = {
+        f"big/{i // 64}/{i}.bin": artifact_bytes(128 * 1024, seed=i).hex().encode()
+        for i in range(256)
+    }
+    tarball = make_tarball(tmp_path / "big.tar.xz", files)
+    data = tarball.read_bytes()
+    unpacked_mb = sum(len(d) for d in files.values()) / 1e6
+
+    def timed(run) -> float:
+        for path in tmp_path.iterdir():
+            if path.is_dir():
+                shutil.rmtree(path)
+        start_ns = time.perf_counter_ns()
+        run()
+        return (time.perf_counter_ns() - start_ns) / 1e9
+
+    def extract_as_before(path: Path):
+        with tarfile.open(path, "r:*") as tar:
+            tar.extractall(path=tmp_path / "before", filter="tar")
+
+    results = {"tarfile": timed(lambda: extract_as_before(tarball))}
+    results["extract_tarball"] = timed(
+        lambda: provisioning.extract_tarball(tarball, tmp_path / "now", ctx="(bench) ")
+    )
+    tarball.unlink()
+
+    with ArtifactServer({"/big.tar.xz": data}) as server:
+        url = server.url("/big.tar.xz")
+
+        def download_then_extract_as_before():
+            provisioning.download(url, tmp_path / "big.tar.xz")
+            extract_as_before(tmp_path / "big.tar.xz")
+            (tmp_path / "big.tar.xz").unlink()
+
+        results["download, then tarfile"] = timed(download_then_extract_as_before)
+        results["download_and_extract_tarball"] = timed(
+            lambda: provisioning.download_and_extract_tarball(url, tmp_path / "now", ctx="(bench) ")
+        )
+
+    summary = f"{unpacked_mb:.0f} MB unpacked from {len(data) / 1e6:.0f} MB .tar.xz: " + ", ".join(
+        f"{name} {secs:.2f} s ({unpacked_mb / secs:.0f} MB/s)" for name, secs in results.items()
+    )
+    print(summary)
+    request.node.summary_html = summary
@@ -1,5 +1,8 @@
+import time
 from pathlib import Path
 
+import pytest
+
 import targets
 import targets_from_intercept
 
@@ -171,3 +174,77 @@ def test_dotted_static_lib_output_legalized_for_c2rust(tmp_path):
 
     assert link_outputs == [".libs/usb_1_0.a"]
     assert "." not in Path(link_outputs[0]).stem
+
+
+def mk_synthetic_build(builddir: Path, num_libs: int, objs_per_lib: int):
+    commands = []
+    for lib in range(num_libs):
+        objs = []
+        for obj in range(objs_per_lib):
+            src = f"lib{lib}/f{obj}.c"
+            objs.append(f"lib{lib}/f{obj}.o")
+            commands.append(
+                targets_from_intercept.convert_intercepted_entry({
+                    "type": "cc",
+                    "directory": builddir.as_posix(),
+                    "arguments": ["clang", "-c", "-o", objs[-1], src],
+                    "file": None,
+                    "output": None,
+                })
+            )
+        commands.append(
+            targets_from_intercept.convert_intercepted_entry({
+                "type": "cc",
+                "directory": builddir.as_posix(),
+                "arguments": ["clang", "-shared", "-o", f"libx{lib}.so", *objs],
+                "file": None,
+                "output": None,
+            })
+        )
+    return commands
+
+
+def test_build_info_recomputes_targets_when_commands_change(tmp_path):
+    builddir = tmp_path / "build"
+    build_info = targets.BuildInfo()
+    build_info.set_intercepted_commands(mk_synthetic_build(builddir, 2, 2))
+    assert sorted(t.key for t in build_info.get_all_targets()) == ["libx0.so", "libx1.so"]
+    assert build_info._process_targets() is build_info._process_targets()
+
+    build_info.set_intercepted_commands(mk_synthetic_build(builddir, 3, 1))
+    assert sorted(t.key for t in build_info.get_all_targets()) == [
+        "libx0.so",
+        "libx1.so",
+        "libx2.so",
+    ]
+
+
+@pytest.mark.slow
+def test_benchmark_repeated_target_queries(tmp_path, request: pytest.FixtureRequest):
+    """Reports the cost of the repeated target queries that passes make, on a
+    synthetic build with thousands of commands."""
+    builddir = tmp_path / "build"
+    build_info = targets.BuildInfo()
+    build_info.set_intercepted_commands(mk_synthetic_build(builddir, 40, 50))
+
+    queries = 20
+
+    def time_queries_ms(before_each_query) -> float:
+        start_ns = time.perf_counter_ns()
+        for _ in range(queries):
+            before_each_query()
+            build_info.get_all_targets()
+        return (time.perf_counter_ns() - start_ns) / 1_000_000.0
+
+    def forget_targets():
+        build_info._processed_targets = None
+
+    unmemoized_ms = time_queries_ms(forget_targets)
+    memoized_ms = time_queries_ms(lambda: None)
+
+    summary = (
+        f"{len(build_info._intercepted_commands)} commands, {queries} target queries:"
+        f" {unmemoized_ms:.1f} ms unmemoized, {memoized_ms:.1f} ms memoized"
+    )
+    print(summary)
+    request.node.summary_html = summary
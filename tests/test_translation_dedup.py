@@ -0,0 +1,125 @@
+import threading
+from pathlib import Path
+
+import ingest
+import translation_dedup
+
+
+def mk_prepared(resultsdir: Path, body: str) -> Path:
+    codebase = resultsdir / "c_20_refold_preprocessor"
+    codebase.mkdir(parents=True)
+    (codebase / "main.c").write_text(body, encoding="utf-8")
+    (codebase / "compile_commands.json").write_text(
+        f'[{{"directory": "{codebase.as_posix()}", "file": "main.c"}}]', encoding="utf-8"
+    )
+    return codebase
+
+
+def test_digest_ignores_resultsdir_but_not_contents(tmp_path: Path):
+    a, b, c = tmp_path / "A=ON", tmp_path / "A=OFF", tmp_path / "B=ON"
+    digest_a = translation_dedup.prepared_codebase_digest(
+        mk_prepared(a, "int main(void) { return 0; }\n"), a, ["--emit-build-files"]
+    )
+    digest_b = translation_dedup.prepared_codebase_digest(
+        mk_prepared(b, "int main(void) { return 0; }\n"), b, ["--emit-build-files"]
+    )
+    digest_c = translation_dedup.prepared_codebase_digest(
+        mk_prepared(c, "int main(void) { return 1; }\n"), c, ["--emit-build-files"]
+    )
+    assert digest_a == digest_b
+    assert digest_a != digest_c
+
+
+def test_followers_wait_for_and_reuse_leader_results(tmp_path: Path):
+    dedup = translation_dedup.TranslationDedup()
+    leader, follower = tmp_path / "leader", tmp_path / "follower"
+    assert dedup.claim_or_wait("k", leader) is None
+
+    reused: list[Path | None] = []
+    waiter = threading.Thread(target=lambda: reused.append(dedup.claim_or_wait("k", follower)))
+    waiter.start()
+    (leader / "final").mkdir(parents=True)
+    dedup.release(leader)
+    waiter.join(timeout=10)
+
+    assert reused == [leader]
+    assert dedup.reused_by(follower) is not None
+    assert dedup.reused_by(leader) is None
+
+
+def test_follower_takes_over_after_leader_fails(tmp_path: Path):
+    dedup = translation_dedup.TranslationDedup()
+    leader, follower = tmp_path / "leader", tmp_path / "follower"
+    assert dedup.claim_or_wait("k", leader) is None
+
+    reused: list[Path | None] = []
+    waiter = threading.Thread(target=lambda: reused.append(dedup.claim_or_wait("k", follower)))
+    waiter.start()
+    dedup.release(leader)  # No `final` directory: the translation failed.
+    waiter.join(timeout=10)
+
+    assert reused == [None]
+    assert dedup.reused_by(follower) is None
+
+
+def test_copy_results_with_relocation_rewrites_paths(tmp_path: Path):
+    src_resultsdir, dst_resultsdir = tmp_path / "A=ON", tmp_path / "A=OFF"
+    (src_resultsdir / "final" / "src").mkdir(parents=True)
+    (src_resultsdir / "final" / "src" / "lib.rs").write_text(
+        f"// from {src_resultsdir.as_posix()}/c_20/main.c\n", encoding="utf-8"
+    )
+
+    translation_dedup.copy_results_with_relocation(
+        src_resultsdir / "final", dst_resultsdir / "final", src_resultsdir, dst_resultsdir
+    )
+
+    assert (dst_resultsdir / "final" / "src" / "lib.rs").read_text(encoding="utf-8") == (
+        f"// from {dst_resultsdir.as_posix()}/c_20/main.c\n"
+    )
+
+
+def test_copy_results_with_relocation_leaves_binaries_and_other_paths_alone(tmp_path: Path):
+    src_resultsdir, dst_resultsdir = tmp_path / "A=ON", tmp_path / "A=OFF-longer"
+    final = src_resultsdir / "final"
+    (final / "src").mkdir(parents=True)
+    (final / "Cargo.toml").write_text("[package]\n", encoding="utf-8")
+    sibling = f"{src_resultsdir.as_posix()}2/c_20/main.c"
+    (final / "src" / "lib.rs").write_text(
+        f"// from {src_resultsdir.as_posix()}\n// not from {sibling}\n", encoding="utf-8"
+    )
+    binary = b"\x7fELF\0" + src_resultsdir.as_posix().encode("utf-8") + b"\0"
+    (final / "blob.bin").write_bytes(binary)
+    (final / "target" / "debug").mkdir(parents=True)
+    (final / "target" / "debug" / "libx.rlib").write_bytes(binary)
+
+    translation_dedup.copy_results_with_relocation(
+        final, dst_resultsdir / "final", src_resultsdir, dst_resultsdir
+    )
+
+    copied = dst_resultsdir / "final"
+    assert (copied / "src" / "lib.rs").read_text(encoding="utf-8") == (
+        f"// from {dst_resultsdir.as_posix()}\n// not from {sibling}\n"
+    )
+    assert (copied / "blob.bin").read_bytes() == binary
+    assert not (copied / "target").exists()
+
+
+def test_followers_get_leader_results(tmp_path: Path):
+    dedup = translation_dedup.TranslationDedup()
+    leader, follower = tmp_path / "leader", tmp_path / "follower"
+    assert dedup.claim_or_wait("k", leader) is None
+    (leader / "final").mkdir(parents=True)
+    results = ingest.TranslationResults(
+        translation_start_unix_timestamp=0,
+        translation_elapsed_ms=0,
+        static_measurement_elapsed_ms=0,
+        transformations=[],
+        c2rust_baseline={"fns": 1},
+        tenjin_initial={"fns": 2},
+        tenjin_final={"fns": 3},
+    )
+    dedup.release(leader, results)
+
+    assert dedup.claim_or_wait("k", follower) == leader
+    assert dedup.reused_results(follower) is results
+    assert dedup.reused_results(leader) is None
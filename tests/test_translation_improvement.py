@@ -0,0 +1,82 @@
+import random
+import threading
+
+import pytest
+
+import translation_improvement
+
+
+def reference_find_all_bad(num_edits: int, check) -> tuple[list[int], frozenset[int]]:
+    """The original, recursive formulation of the halving search."""
+    applied: set[int] = set()
+
+    def go(edits: list[int]) -> list[int]:
+        if not edits:
+            return []
+        if check(frozenset(applied | set(edits))):
+            applied.update(edits)
+            return []
+        if len(edits) == 1:
+            return edits
+        mid = len(edits) // 2
+        return go(edits[:mid]) + go(edits[mid:])
+
+    return go(list(range(num_edits))), frozenset(applied)
+
+
+def mk_oracle(num_edits: int, seed: int):
+    """Some edits are bad on their own; some pairs of edits conflict with each other,
+    so the result depends on the order in which edits are tried."""
+    rng = random.Random(seed)
+    bad = {i for i in range(num_edits) if rng.random() < 0.2}
+    conflicts = [
+        (rng.randrange(num_edits), rng.randrange(num_edits)) for _ in range(num_edits // 4)
+    ]
+
+    def check(applied: frozenset[int]) -> bool:
+        if applied & bad:
+            return False
+        return not any(a in applied and b in applied and a != b for a, b in conflicts)
+
+    return check
+
+
+@pytest.mark.parametrize("seed", range(8))
+@pytest.mark.parametrize("num_edits", [0, 1, 2, 7, 40, 129])
+def test_bisect_good_edits_matches_reference(num_edits: int, seed: int):
+    check = mk_oracle(num_edits, seed)
+    expected = reference_find_all_bad(num_edits, check)
+
+    assert translation_improvement.bisect_good_edits(num_edits, check) == expected
+
+
+@pytest.mark.parametrize("seed", range(8))
+@pytest.mark.parametrize("jobs", [2, 8])
+def test_speculative_bisect_good_edits_matches_serial(jobs: int, seed: int):
+    num_edits = 97
+    check = mk_oracle(num_edits, seed)
+    lock = threading.Lock()
+    probed: list[frozenset[int]] = []
+
+    def probe(applied: frozenset[int]) -> bool:
+        with lock:
+            probed.append(applied)
+        return check(applied)
+
+    serial = translation_improvement.bisect_good_edits(num_edits, check)
+    speculative = translation_improvement.speculative_bisect_good_edits(num_edits, probe, jobs)
+
+    assert speculative == serial
+    # Speculation may waste some probes, but never repeats one.
+    assert len(probed) == len(set(probed))
+
+
+def test_remove_trivial_cast_preserves_offsets():
+    content = b"let x: u32 = 5 as u32; let y = 6 as u8;"
+    start = content.index(b"5 as")
+    end = start + len(b"5 as u32")
+
+    removed = translation_improvement.remove_trivial_cast(content, start, end)
+
+    assert removed == b"let x: u32 = 5       ; let y = 6 as u8;"
+    assert len(removed) == len(content)
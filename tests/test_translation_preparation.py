@@ -1,5 +1,9 @@
 import os
+from pathlib import Path
 
+import c_refact
+import compilation_database
+import decl_index
 import translation_preparation
 
 
@@ -25,3 +29,187 @@ def test_xj_generated_sources_preserves_extensionless_prebuild_output(tmp_path,
     assert (builddir / "blocktags").exists()
     assert (current_codebase / "blocktags").exists()
     assert os.access(current_codebase / "blocktags", os.X_OK)
+
+
+def mk_codebase_with_shared_header(codebase: Path) -> compilation_database.CompileCommands:
+    codebase.mkdir()
+    (codebase / "shared.h").write_text(
+        "struct point { int x, y; };\nint norm(struct point p);\n", encoding="utf-8"
+    )
+    commands: list[compilation_database.CompileCommand] = []
+    for name in ("a", "b"):
+        source = codebase / f"{name}.c"
+        source.write_text(
+            f'#include "shared.h"\nint {name}_fn(struct point p) {{ return norm(p); }}\n',
+            encoding="utf-8",
+        )
+        commands.extend(
+            compilation_database.synthetic_compile_commands_for_c_file(source, codebase).commands
+        )
+    return compilation_database.CompileCommands(commands)
+
+
+def test_collect_decls_by_rel_tu_reuses_decl_index_across_codebase_copies(tmp_path, monkeypatch):
+    monkeypatch.setattr(decl_index, "index_path", lambda: tmp_path / "decl-index.sqlite3")
+    parsed: list[str] = []
+    real_map_tu_parse_jobs = c_refact.map_tu_parse_jobs
+
+    def counting_map_tu_parse_jobs(parse_jobs, extract, jobs=1):
+        parsed.extend(Path(job.abs_path).name for job in parse_jobs)
+        return real_map_tu_parse_jobs(parse_jobs, extract, jobs)
+
+    monkeypatch.setattr(c_refact, "map_tu_parse_jobs", counting_map_tu_parse_jobs)
+
+    def collect(codebase: Path, compdb: compilation_database.CompileCommands):
+        return translation_preparation.collect_decls_by_rel_tu(
+            codebase,
+            compdb,
+            restricted_to_files={(codebase / "shared.h").as_posix()},
+            fn_def_handling=translation_preparation.FnDefHandling.INCLUDE_BODY,
+        )
+
+    first = tmp_path / "c_00"
+    monkeypatch.setenv("XJ_DECL_INDEX", "0")
+    expected = collect(first, mk_codebase_with_shared_header(first))
+    assert set(expected) == {"a.c", "b.c"}
+    assert expected["a.c"]
+    monkeypatch.setenv("XJ_DECL_INDEX", "1")
+
+    populated = tmp_path / "c_01"
+    parsed.clear()
+    assert collect(populated, mk_codebase_with_shared_header(populated)) == expected
+    assert sorted(parsed) == ["a.c", "b.c"]
+
+    # An identical copy, as made for each preparation pass, needs no parsing at all.
+    second = tmp_path / "c_02"
+    parsed.clear()
+    assert collect(second, mk_codebase_with_shared_header(second)) == expected
+    assert parsed == []
+
+    # Changing an included header invalidates the TUs which include it.
+    third = tmp_path / "c_03"
+    compdb = mk_codebase_with_shared_header(third)
+    (third / "shared.h").write_text(
+        "struct point { long x, y; };\nint norm(struct point p);\n", encoding="utf-8"
+    )
+    parsed.clear()
+    changed = collect(third, compdb)
+    assert sorted(parsed) == ["a.c", "b.c"]
+    assert changed != expected
+
+
+def test_collect_decls_by_rel_tu_relocates_anonymous_records_from_decl_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(decl_index, "index_path", lambda: tmp_path / "decl-index.sqlite3")
+    parsed: list[str] = []
+    real_map_tu_parse_jobs = c_refact.map_tu_parse_jobs
+
+    def counting_map_tu_parse_jobs(parse_jobs, extract, jobs=1):
+        parsed.extend(Path(job.abs_path).name for job in parse_jobs)
+        return real_map_tu_parse_jobs(parse_jobs, extract, jobs)
+
+    monkeypatch.setattr(c_refact, "map_tu_parse_jobs", counting_map_tu_parse_jobs)
+
+    def mk_codebase(codebase: Path) -> compilation_database.CompileCommands:
+        compdb = mk_codebase_with_shared_header(codebase)
+        (codebase / "shared.h").write_text(
+            "struct { int x, y; } origin;\nunion { int i; float f; } shared_bits;\n",
+            encoding="utf-8",
+        )
+        return compdb
+
+    def collect(codebase: Path, compdb: compilation_database.CompileCommands):
+        return translation_preparation.collect_decls_by_rel_tu(
+            codebase, compdb, restricted_to_files={(codebase / "shared.h").as_posix()}
+        )
+
+    second = tmp_path / "c_02"
+    compdb = mk_codebase(second)
+    monkeypatch.setenv("XJ_DECL_INDEX", "0")
+    expected = collect(second, compdb)
+    unnamed = [q for q in expected["a.c"] if "unnamed at" in q]
+    assert len(unnamed) == 2
+    assert all(second.as_posix() + "/shared.h" in q for q in unnamed)
+    monkeypatch.setenv("XJ_DECL_INDEX", "1")
+
+    first = tmp_path / "c_01"
+    collect(first, mk_codebase(first))
+    parsed.clear()
+    assert collect(second, compdb) == expected
+    assert parsed == []
+
+
+def replay_cmd(output: str, *args: str) -> compilation_database.CompileCommand:
+    return compilation_database.CompileCommand(
+        directory="/build",
+        file=args[0] if args else output,
+        arguments=["cc", *args, "-o", output],
+        output=output,
+    )
+
+
+def test_coverage_replay_batches_orders_objects_libraries_then_executables():
+    main_o = replay_cmd("main.o", "main.c")
+    util_o = replay_cmd("util.o", "util.c")
+    libutil_a = replay_cmd("libutil.a", "util.o")
+    libapi_so = replay_cmd("libapi.so", "/build/libutil.a")
+    exe = replay_cmd("prog", "main.o", "libapi.so")
+    tool = replay_cmd("tool", "main.o")
+    no_output = compilation_database.CompileCommand(directory="/build", file="x.c", arguments=[])
+
+    batches = translation_preparation.coverage_replay_batches([
+        exe,
+        main_o,
+        no_output,
+        libutil_a,
+        libapi_so,
+        tool,
+        util_o,
+    ])
+
+    assert batches == [[main_o, util_o], [libutil_a], [libapi_so], [exe, tool]]
+
+
+def test_coverage_replay_batches_keeps_libraries_in_build_order():
+    foo_o = replay_cmd("foo.o", "foo.c")
+    libfoo_so = replay_cmd("libfoo.so", "foo.o")
+    # Neither names the other's output, but both depend on an earlier library.
+    libbar_so = replay_cmd("libbar.so", "bar.c", "-L.", "-lfoo")
+    libbaz_a = replay_cmd("libbaz.a", "@baz.rsp")
+
+    batches = translation_preparation.coverage_replay_batches([
+        foo_o,
+        libfoo_so,
+        libbar_so,
+        libbaz_a,
+    ])
+
+    assert batches == [[foo_o], [libfoo_so], [libbar_so], [libbaz_a]]
+
+
+def test_coverage_replay_batches_serializes_commands_with_the_same_output():
+    a_o = replay_cmd("a.o", "a.c")
+    a_o_again = replay_cmd("a.o", "a.c", "-DAGAIN")
+    b_o = replay_cmd("b.o", "b.c")
+    create_libx = compilation_database.CompileCommand(
+        directory="/build", file="a.o", arguments=["ar", "rcs", "libx.a", "a.o"], output="libx.a"
+    )
+    append_libx = compilation_database.CompileCommand(
+        directory="/build", file="b.o", arguments=["ar", "rcs", "libx.a", "b.o"], output="libx.a"
+    )
+    conftest = replay_cmd("conftest", "a.o")
+    conftest_relinked = replay_cmd("conftest", "b.o")
+    prog = replay_cmd("prog", "a.o", "libx.a")
+
+    batches = translation_preparation.coverage_replay_batches([
+        a_o,
+        b_o,
+        a_o_again,
+        create_libx,
+        append_libx,
+        conftest,
+        conftest_relinked,
+        prog,
+    ])
+
+    # Only the first command for an executable is replayed.
+    assert batches == [[a_o, b_o], [a_o_again], [create_libx], [append_libx], [conftest, prog]]